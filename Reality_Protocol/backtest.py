@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Orion Rangi Sonic Engine - Backtest Engine
+Rolling HRI/SSS over historical tick files in bulk
+
+Reads MarketDataPoint columns (symbol, price, volume, change_24h, timestamp,
+source) from CSV or Parquet in chunks. Every full window of the chunk is
+evaluated at once with strided NumPy operations, and results are appended to
+the output file chunk by chunk so memory stays bounded by chunk_size.
+
+W.J. McCrea - Reality Protocol LLC
+"""
+
+import argparse
+import csv
+import logging
+import time
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from sensory_data_layer import HarmonicResonanceCalculator, nearest_ratio_distance
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+logger = logging.getLogger(__name__)
+
+TICK_COLUMNS = ('symbol', 'price', 'volume', 'change_24h', 'timestamp', 'source')
+NUMERIC_COLUMNS = ('price', 'volume', 'change_24h', 'timestamp')
+
+RESULT_COLUMNS = (
+    'timestamp', 'hri', 'sss', 'harmonic_quality',
+    'price_harmonic', 'volume_harmonic', 'volatility_harmonic', 'momentum_harmonic',
+    'resonance_factor', 'spectral_stability', 'temporal_stability', 'amplitude_stability'
+)
+
+def iter_tick_chunks(path: str, chunk_size: int = 100000,
+                     symbol: Optional[str] = None) -> Iterator[Dict[str, np.ndarray]]:
+    """Yield numeric tick columns from a CSV or Parquet file, chunk_size rows at a time"""
+    if path.endswith('.parquet'):
+        if pq is None:
+            raise ImportError("Reading Parquet tick files requires pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size, columns=list(TICK_COLUMNS)):
+            columns = batch.to_pydict()
+            yield _chunk_columns(columns, symbol)
+        return
+
+    with open(path, newline='') as handle:
+        reader = csv.reader(handle)
+        header = next(reader)
+        index = {name: header.index(name) for name in TICK_COLUMNS if name in header}
+        rows: List[List[str]] = []
+        for row in reader:
+            rows.append(row)
+            if len(rows) == chunk_size:
+                yield _chunk_columns({name: [r[i] for r in rows] for name, i in index.items()}, symbol)
+                rows = []
+        if rows:
+            yield _chunk_columns({name: [r[i] for r in rows] for name, i in index.items()}, symbol)
+
+def _chunk_columns(columns: Dict[str, list], symbol: Optional[str]) -> Dict[str, np.ndarray]:
+    chunk = {name: np.asarray(columns[name], dtype=np.float64) for name in NUMERIC_COLUMNS}
+    if symbol is not None:
+        mask = np.asarray(columns['symbol']) == symbol
+        chunk = {name: values[mask] for name, values in chunk.items()}
+    return chunk
+
+class BacktestEngine:
+    """
+    Vectorized rolling HRI/SSS over count-based windows
+
+    Evaluates the same formulas as HarmonicResonanceCalculator and
+    SonicStabilityCalculator for every window of `window` consecutive ticks.
+    Pairwise terms are built lag by lag from prefix sums (O(N * window) work
+    with no per-window Python loop); moment terms use sliding window views.
+    Only full windows are emitted, and windows containing a zero price yield
+    NaN where the live calculators would raise.
+    """
+
+    def __init__(self, base_frequency: float = 432.0, window: int = 50,
+                 harmonic_weights: Optional[Dict[str, float]] = None, chunk_size: int = 100000):
+        if window < 3:
+            raise ValueError("Backtest windows need at least 3 ticks")
+        self.base_frequency = base_frequency
+        self.window = window
+        self.harmonic_weights = dict(harmonic_weights or HarmonicResonanceCalculator(base_frequency).harmonic_weights)
+        self.chunk_size = chunk_size
+
+    def compute_windows(self, ticks: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Results for every full window in a contiguous run of ticks"""
+        price = ticks['price']
+        volume = ticks['volume']
+        change = ticks['change_24h']
+        timestamp = ticks['timestamp']
+        w = self.window
+        windows = len(price) - w + 1
+        if windows <= 0:
+            return {name: np.empty(0) for name in RESULT_COLUMNS}
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            price_pairs = self._rolling_pair_sum(price, windows, self._price_pair_quality)
+            correlation_pairs = self._rolling_pair_sum(change, windows, self._change_correlation)
+            pair_count = w * (w - 1) / 2
+            price_harmonic = price_pairs / pair_count * 100
+            resonance_factor = 0.5 + (correlation_pairs / pair_count) * 1.5
+
+            volume_windows = sliding_window_view(volume, w)
+            volume_mean = volume_windows.mean(axis=1)
+            volume_std = volume_windows.std(axis=1)
+            volume_stability = 1.0 / (1.0 + (volume_std / (volume_mean + 1)))
+            volume_harmonic = volume_stability * 100
+
+            velocity = np.diff(price) / price[:-1]
+            avg_volatility = sliding_window_view(np.abs(velocity), w - 1).mean(axis=1)
+            volatility_harmonic = 1.0 / (1.0 + np.abs(avg_volatility - 0.02) * 50) * 100
+
+            momentum_std = sliding_window_view(np.diff(velocity), w - 2).std(axis=1)
+            momentum_harmonic = 1.0 / (1.0 + momentum_std * 1000) * 100
+
+        weights = self.harmonic_weights
+        weighted_hri = (
+            price_harmonic * weights['price'] +
+            volume_harmonic * weights['volume'] +
+            volatility_harmonic * weights['volatility'] +
+            momentum_harmonic * weights['momentum']
+        )
+        hri = np.clip(weighted_hri * resonance_factor, 0.0, 100.0)
+
+        spectral_stability = self._rolling_spectral_stability(change, volume)
+        intervals = sliding_window_view(np.diff(timestamp), w - 1)
+        temporal_stability = 1.0 / (1.0 + (intervals.std(axis=1) / (intervals.mean(axis=1) + 1)))
+        combined_stability = (
+            spectral_stability * 0.5 +
+            temporal_stability * 0.3 +
+            volume_stability * 0.2
+        )
+        sss = np.clip((1.0 - combined_stability) * 100, 0.0, 100.0)
+
+        zero_price = sliding_window_view(price == 0, w).any(axis=1)
+        hri[zero_price] = np.nan
+        sss[zero_price] = np.nan
+
+        return {
+            'timestamp': timestamp[w - 1:],
+            'hri': hri,
+            'sss': sss,
+            'harmonic_quality': (hri + (100.0 - sss)) / 2.0,
+            'price_harmonic': price_harmonic,
+            'volume_harmonic': volume_harmonic,
+            'volatility_harmonic': volatility_harmonic,
+            'momentum_harmonic': momentum_harmonic,
+            'resonance_factor': resonance_factor,
+            'spectral_stability': spectral_stability,
+            'temporal_stability': temporal_stability,
+            'amplitude_stability': volume_stability
+        }
+
+    def _rolling_pair_sum(self, values: np.ndarray, windows: int, pair_term) -> np.ndarray:
+        """Sum of pair_term(values[i], values[j]) over i < j inside every window"""
+        w = self.window
+        starts = np.arange(windows)
+        totals = np.zeros(windows)
+        invalid = np.zeros(windows)
+        for lag in range(1, w):
+            terms = pair_term(values[:-lag], values[lag:])
+            # Keep one bad pair from poisoning every later prefix sum
+            bad = ~np.isfinite(terms)
+            terms[bad] = 0.0
+            prefix = np.concatenate(([0.0], np.cumsum(terms)))
+            bad_prefix = np.concatenate(([0], np.cumsum(bad)))
+            # Pairs (m, m + lag) with m in [start, start + w - lag)
+            totals += prefix[starts + w - lag] - prefix[starts]
+            invalid += bad_prefix[starts + w - lag] - bad_prefix[starts]
+        totals[invalid > 0] = np.nan
+        return totals
+
+    @staticmethod
+    def _price_pair_quality(earlier: np.ndarray, later: np.ndarray) -> np.ndarray:
+        return 1.0 / (1.0 + nearest_ratio_distance(earlier / later))
+
+    @staticmethod
+    def _change_correlation(earlier: np.ndarray, later: np.ndarray) -> np.ndarray:
+        return np.maximum(1.0 - np.abs(earlier - later) / 100, 0.0)
+
+    def _rolling_spectral_stability(self, change: np.ndarray, volume: np.ndarray) -> np.ndarray:
+        # Frequencies relative to the base frequency; the weighted variance is shift-invariant
+        offsets = sliding_window_view(self.base_frequency * (change / 100), self.window)
+        amplitudes = sliding_window_view(np.log10(volume + 1) / 10, self.window)
+        total_amplitude = amplitudes.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weighted_mean = (offsets * amplitudes).sum(axis=1) / total_amplitude
+            variance = ((offsets - weighted_mean[:, None]) ** 2 * amplitudes).sum(axis=1) / total_amplitude
+            stability = 1.0 / (1.0 + variance / 1000)
+        return np.where(total_amplitude == 0, 1.0, stability)
+
+    def run(self, source_path: str, output_path: str, symbol: Optional[str] = None) -> int:
+        """Stream windows from a tick file to CSV/Parquet output; returns windows written"""
+        writer = _ResultWriter(output_path)
+        carry: Optional[Dict[str, np.ndarray]] = None
+        written = 0
+        try:
+            for chunk in iter_tick_chunks(source_path, self.chunk_size, symbol):
+                if carry is not None:
+                    chunk = {name: np.concatenate((carry[name], chunk[name])) for name in NUMERIC_COLUMNS}
+                results = self.compute_windows(chunk)
+                writer.write(results)
+                written += len(results['timestamp'])
+                # Keep the last window - 1 ticks so the next chunk's first window is complete
+                carry = {name: values[-(self.window - 1):] for name, values in chunk.items()}
+        finally:
+            writer.close()
+        return written
+
+class _ResultWriter:
+    """Appends result chunks to CSV, or to Parquet row groups when pyarrow is present"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._parquet = None
+        if path.endswith('.parquet'):
+            if pq is None:
+                raise ImportError("Writing Parquet results requires pyarrow")
+            self._handle = None
+        else:
+            self._handle = open(path, 'w', newline='')
+            self._handle.write(','.join(RESULT_COLUMNS) + '\n')
+
+    def write(self, results: Dict[str, np.ndarray]):
+        if not len(results['timestamp']):
+            return
+        if self._handle is not None:
+            np.savetxt(self._handle, np.column_stack([results[name] for name in RESULT_COLUMNS]),
+                       delimiter=',', fmt='%.10g')
+            return
+        table = pa.table({name: results[name] for name in RESULT_COLUMNS})
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.path, table.schema)
+        self._parquet.write_table(table)
+
+    def close(self):
+        if self._handle is not None:
+            self._handle.close()
+        if self._parquet is not None:
+            self._parquet.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Rolling HRI/SSS backtest over a historical tick file")
+    parser.add_argument('source', help="CSV or Parquet file with MarketDataPoint columns")
+    parser.add_argument('output', help="CSV or Parquet file for window results")
+    parser.add_argument('--window', type=int, default=50)
+    parser.add_argument('--symbol', default=None, help="Only use ticks for this symbol")
+    parser.add_argument('--chunk-size', type=int, default=100000)
+    parser.add_argument('--base-frequency', type=float, default=432.0)
+    parser.add_argument('--weights', default=None,
+                        help="Harmonic weights as price,volume,volatility,momentum")
+    args = parser.parse_args()
+
+    weights = None
+    if args.weights:
+        values = [float(value) for value in args.weights.split(',')]
+        weights = dict(zip(('price', 'volume', 'volatility', 'momentum'), values))
+
+    engine = BacktestEngine(args.base_frequency, args.window, weights, args.chunk_size)
+    started = time.perf_counter()
+    written = engine.run(args.source, args.output, args.symbol)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {written:,} windows to {args.output} in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
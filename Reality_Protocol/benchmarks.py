@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Orion Rangi Sonic Engine - Sensory Layer Benchmarks
+Throughput and latency measurements for the Python market data pipeline
+
+Suites:
+- decode:    frames/s for the legacy path and every available ticker decoder
+- ingest:    ticks/s through MarketDataIngestionEngine._process_market_data,
+             alone and with a SensoryDataLayer consuming the ticks
+- consensus: per-call latency of calculate_hri / calculate_sss and of the
+             incremental window updates for each window size
+- memory:    traced allocations and retained bytes per tick while ingesting
+
+Every input is generated from a fixed seed, so two runs on the same host
+differ only by the code under test. Results go to stdout as a table and,
+with --output, to a JSON file (with host and library versions) for
+comparing runs:
+
+    python benchmarks.py --suite ingest,consensus --output before.json
+
+W.J. McCrea - Reality Protocol LLC
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from metrics import LatencyHistogram
+from sensory_data_layer import (
+    HarmonicResonanceCalculator,
+    IncrementalHRICalculator,
+    IncrementalSSSCalculator,
+    MarketDataIngestionEngine,
+    MarketDataPoint,
+    SensoryDataLayer,
+    SonicStabilityCalculator,
+    available_ticker_decoders,
+    make_ticker_decoder
+)
+
+SUITES = ('decode', 'ingest', 'consensus', 'memory')
+
+def coinbase_frames(count: int, symbols: List[str], heartbeat_ratio: float = 0.1,
+                    seed: int = 7) -> List[str]:
+    """Synthetic Coinbase frames: mostly tickers with interleaved heartbeats"""
+    rng = random.Random(seed)
+    prices = {symbol: rng.uniform(1, 60000) for symbol in symbols}
+    frames = []
+    for sequence in range(count):
+        symbol = rng.choice(symbols)
+        if rng.random() < heartbeat_ratio:
+            frames.append(json.dumps({
+                "type": "heartbeat",
+                "sequence": sequence,
+                "last_trade_id": sequence,
+                "product_id": f"{symbol}-USD",
+                "time": "2025-01-01T00:00:00.000000Z"
+            }, separators=(',', ':')))
+            continue
+        prices[symbol] *= 1 + rng.gauss(0, 0.001)
+        frames.append(json.dumps({
+            "type": "ticker",
+            "sequence": sequence,
+            "product_id": f"{symbol}-USD",
+            "price": f"{prices[symbol]:.2f}",
+            "open_24h": f"{prices[symbol] * 0.98:.2f}",
+            "volume_24h": f"{rng.uniform(1e3, 1e6):.8f}",
+            "low_24h": f"{prices[symbol] * 0.95:.2f}",
+            "high_24h": f"{prices[symbol] * 1.05:.2f}",
+            "volume_30d": f"{rng.uniform(1e5, 1e8):.8f}",
+            "best_bid": f"{prices[symbol] * 0.999:.2f}",
+            "best_ask": f"{prices[symbol] * 1.001:.2f}",
+            "side": rng.choice(["buy", "sell"]),
+            "time": "2025-01-01T00:00:00.000000Z",
+            "trade_id": sequence,
+            "last_size": f"{rng.uniform(0, 2):.8f}"
+        }, separators=(',', ':')))
+    return frames
+
+def synthetic_ticks(count: int, symbols: int = 4, rate: float = 1000.0, burstiness: float = 0.0,
+                    volatility: float = 0.001, seed: int = 7, start: float = 1735689600.0) -> List[MarketDataPoint]:
+    """
+    Synthetic tick stream with a geometric random walk per symbol
+
+    Arrivals are Poisson at `rate` ticks/s overall. With burstiness b in
+    [0, 1), a fraction b of ticks arrive in bursts at 100x the base rate
+    while the rest are spread out so the mean rate stays `rate`. Prices
+    take log-normal steps of `volatility` per tick; volumes and 24h changes
+    drift along with them. Timestamps are synthetic, so runs reproduce exactly.
+    """
+    rng = random.Random(seed)
+    names = [f"SYM{i}" for i in range(symbols)]
+    prices = {name: rng.uniform(1, 60000) for name in names}
+    opens = dict(prices)
+    volumes = {name: rng.uniform(1e3, 1e6) for name in names}
+    sources = ('coinbase', 'binance', 'kraken')
+
+    # Mean gap stays 1/rate: bursty gaps are 100x shorter, calm gaps stretch to compensate
+    burst_gap = 1.0 / (rate * 100.0)
+    calm_gap = (1.0 / rate - burstiness * burst_gap) / (1.0 - burstiness) if burstiness < 1.0 else burst_gap
+
+    ticks = []
+    timestamp = start
+    for _ in range(count):
+        timestamp += rng.expovariate(1.0 / (burst_gap if rng.random() < burstiness else calm_gap))
+        name = names[rng.randrange(symbols)]
+        prices[name] *= math.exp(rng.gauss(0, volatility))
+        volumes[name] = max(1.0, volumes[name] * (1 + rng.gauss(0, 0.01)))
+        ticks.append(MarketDataPoint(
+            symbol=name,
+            price=prices[name],
+            volume=volumes[name],
+            change_24h=(prices[name] / opens[name] - 1) * 100,
+            timestamp=timestamp,
+            source=rng.choice(sources)
+        ))
+    return ticks
+
+def legacy_decode(frame: str):
+    """Decode path used before pluggable decoders: json.loads + dict parsing per frame"""
+    data = json.loads(frame)
+    if data.get('type') == 'ticker':
+        return MarketDataPoint(
+            symbol=data.get('product_id', '').replace('-USD', ''),
+            price=float(data.get('price', 0)),
+            volume=float(data.get('volume_24h', 0)),
+            change_24h=0.0,
+            timestamp=time.time(),
+            source='coinbase'
+        )
+    return None
+
+def _rate(fn: Callable[[], Any], count: int, repeat: int) -> float:
+    """Best-of-repeat items per second for fn processing `count` items"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return count / best
+
+def bench_decoders(frame_count: int = 50000, repeat: int = 5) -> Dict[str, Any]:
+    """Frames per second on one core for the legacy path and each available decoder"""
+    frames = coinbase_frames(frame_count, ['BTC', 'ETH', 'SOL', 'ADA'])
+    results = {'legacy': _rate(lambda: [legacy_decode(f) for f in frames], frame_count, repeat)}
+
+    for name in available_ticker_decoders():
+        decode = make_ticker_decoder(name).decode
+
+        def run():
+            for frame in frames:
+                row = decode(frame, time.time())
+                if row:
+                    MarketDataPoint(*row)
+
+        results[name] = _rate(run, frame_count, repeat)
+
+    return {'benchmark': 'decode', 'frames': frame_count, 'frames_per_second': results}
+
+async def _ingest(engine: MarketDataIngestionEngine, ticks: List[MarketDataPoint],
+                  layer: Optional[SensoryDataLayer] = None) -> float:
+    process = engine._process_market_data
+    started = time.perf_counter()
+    for market_data in ticks:
+        await process(market_data)
+    if layer is not None:
+        # Count the consensus work the ticks caused, not just queueing them
+        await layer.shutdown()
+    return time.perf_counter() - started
+
+def bench_ingestion(tick_count: int = 50000, symbols: int = 4, burstiness: float = 0.0,
+                    repeat: int = 3, seed: int = 7) -> Dict[str, Any]:
+    """Sustained ticks per second through _process_market_data, bare engine and full layer"""
+    ticks = synthetic_ticks(tick_count, symbols, burstiness=burstiness, seed=seed)
+    results = {}
+    for name in ('engine', 'layer'):
+        best = float('inf')
+        for _ in range(repeat):
+            if name == 'engine':
+                engine, layer = MarketDataIngestionEngine(), None
+            else:
+                layer = SensoryDataLayer(consensus_interval=0.0)
+                engine = layer.ingestion_engine
+            best = min(best, asyncio.run(_ingest(engine, ticks, layer)))
+        results[name] = tick_count / best
+    return {'benchmark': 'ingest', 'ticks': tick_count, 'symbols': symbols,
+            'burstiness': burstiness, 'ticks_per_second': results}
+
+def _latency(fn: Callable[[], Any], calls: int) -> Dict[str, Any]:
+    histogram = LatencyHistogram()
+    clock = time.perf_counter_ns
+    for _ in range(calls):
+        started = clock()
+        fn()
+        histogram.record(clock() - started)
+    summary = histogram.to_dict()
+    return {
+        'calls': calls,
+        'mean_us': summary['mean_ns'] / 1e3,
+        'p50_us': histogram.quantile(0.5) / 1e3,
+        'p99_us': histogram.quantile(0.99) / 1e3,
+        'max_us': summary['max_ns'] / 1e3
+    }
+
+def bench_consensus(window_sizes: Sequence[int] = (10, 50, 200, 1000), calls: int = 200,
+                    symbols: int = 4, seed: int = 7) -> Dict[str, Any]:
+    """Per-call latency of the batch HRI/SSS calculators and the incremental window updates"""
+    hri_calculator = HarmonicResonanceCalculator()
+    sss_calculator = SonicStabilityCalculator()
+    results = {}
+    for window in window_sizes:
+        ticks = synthetic_ticks(window + calls, symbols, seed=seed)
+        batch = ticks[:window]
+        hri_stream = IncrementalHRICalculator(hri_calculator, window)
+        sss_stream = IncrementalSSSCalculator(sss_calculator, window)
+        for market_data in batch:
+            hri_stream.update(market_data)
+            sss_stream.update(market_data)
+        feed = iter(ticks[window:])
+        fresh = iter(ticks[window:])
+        # The batch calculators grow quadratically with the window; fewer calls keep big windows quick
+        batch_calls = min(calls, max(10, 20000 // window))
+        results[str(window)] = {
+            'calculate_hri': _latency(lambda: hri_calculator.calculate_hri(batch), batch_calls),
+            'calculate_sss': _latency(lambda: sss_calculator.calculate_sss(batch), batch_calls),
+            'hri_update': _latency(lambda: hri_stream.update(next(feed)), calls),
+            'sss_update': _latency(lambda: sss_stream.update(next(fresh)), calls)
+        }
+    return {'benchmark': 'consensus', 'windows': results}
+
+def bench_memory(tick_count: int = 50000, symbols: int = 4, checkpoints: int = 5,
+                 seed: int = 7) -> Dict[str, Any]:
+    """
+    Traced memory while a layer ingests ticks
+
+    Bytes should level off once the ring buffers are full; steady growth
+    between the later checkpoints points at an unbounded structure.
+    """
+    ticks = synthetic_ticks(tick_count, symbols, seed=seed)
+    step = max(1, tick_count // checkpoints)
+
+    async def run():
+        layer = SensoryDataLayer(consensus_interval=0.0)
+        process = layer.ingestion_engine._process_market_data
+        samples = []
+        for start in range(0, tick_count, step):
+            for market_data in ticks[start:start + step]:
+                await process(market_data)
+            await layer._tick_subscription.drain()
+            gc.collect()
+            current, peak = tracemalloc.get_traced_memory()
+            samples.append({'ticks': min(tick_count, start + step), 'current_bytes': current, 'peak_bytes': peak})
+        await layer.shutdown()
+        return samples
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        samples = asyncio.run(run())
+    finally:
+        tracemalloc.stop()
+
+    later = samples[len(samples) // 2:]
+    growth = 0.0
+    if len(later) > 1 and later[-1]['ticks'] > later[0]['ticks']:
+        growth = (later[-1]['current_bytes'] - later[0]['current_bytes']) / (later[-1]['ticks'] - later[0]['ticks'])
+    return {'benchmark': 'memory', 'ticks': tick_count, 'checkpoints': samples,
+            'steady_growth_bytes_per_tick': growth}
+
+def environment() -> Dict[str, Any]:
+    return {
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'decoders': available_ticker_decoders(),
+        'timestamp': time.time()
+    }
+
+def run_suites(suites: Sequence[str], args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {'environment': environment(), 'seed': args.seed}
+    if 'decode' in suites:
+        results['decode'] = bench_decoders(args.frames, args.repeat)
+    if 'ingest' in suites:
+        results['ingest'] = bench_ingestion(args.ticks, args.symbols, args.burstiness, args.repeat, args.seed)
+    if 'consensus' in suites:
+        results['consensus'] = bench_consensus(args.windows, args.calls, args.symbols, args.seed)
+    if 'memory' in suites:
+        results['memory'] = bench_memory(args.ticks, args.symbols, seed=args.seed)
+    return results
+
+def print_results(results: Dict[str, Any]):
+    if 'decode' in results:
+        for name, rate in results['decode']['frames_per_second'].items():
+            print(f"decode {name:>9}: {rate:12,.0f} frames/s")
+    if 'ingest' in results:
+        for name, rate in results['ingest']['ticks_per_second'].items():
+            print(f"ingest {name:>9}: {rate:12,.0f} ticks/s")
+    if 'consensus' in results:
+        for window, timings in results['consensus']['windows'].items():
+            for name, timing in timings.items():
+                print(f"window {window:>5} {name:>13}: p50 {timing['p50_us']:10.1f} us  p99 {timing['p99_us']:10.1f} us")
+    if 'memory' in results:
+        memory = results['memory']
+        for sample in memory['checkpoints']:
+            print(f"memory {sample['ticks']:>9,} ticks: {sample['current_bytes'] / 1e6:8.2f} MB "
+                  f"(peak {sample['peak_bytes'] / 1e6:.2f} MB)")
+        print(f"memory steady growth: {memory['steady_growth_bytes_per_tick']:.1f} bytes/tick")
+
+def main():
+    parser = argparse.ArgumentParser(description="Sensory data layer benchmarks")
+    parser.add_argument('--suite', default='decode', help=f"comma-separated subset of {','.join(SUITES)}, or 'all'")
+    parser.add_argument('--frames', type=int, default=50000)
+    parser.add_argument('--ticks', type=int, default=50000)
+    parser.add_argument('--symbols', type=int, default=4)
+    parser.add_argument('--burstiness', type=float, default=0.0)
+    parser.add_argument('--windows', type=lambda value: [int(size) for size in value.split(',')],
+                        default=[10, 50, 200, 1000])
+    parser.add_argument('--calls', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    suites = SUITES if args.suite == 'all' else args.suite.split(',')
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    results = run_suites(suites, args)
+    print_results(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
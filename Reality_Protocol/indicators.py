@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Orion Rangi Sonic Engine - Technical Indicators
+Incremental and vectorized MACD, Wilder RSI and Bollinger Bands
+
+Live updates cost O(1) per price per symbol: MACD keeps three EMAs, RSI keeps
+Wilder-smoothed average gain/loss, and Bollinger keeps running sums over its
+window. The batch functions compute the same series over whole arrays for
+backfill, and IndicatorBank.backfill leaves the live state exactly where the
+batch ended, so live updates continue the backfilled series.
+
+Conventions: EMAs are seeded with the first value (pandas ewm(adjust=False)),
+RSI is seeded with the simple mean of the first `period` gains and losses,
+and Bollinger uses the population standard deviation.
+
+W.J. McCrea - Reality Protocol LLC
+"""
+
+import math
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+RSI_PERIOD = 14
+BOLLINGER_PERIOD = 20
+BOLLINGER_STD = 2.0
+
+# Largest 1 / decay^k the blockwise EMA filter lets build up inside one block
+EMA_BLOCK_RANGE = 1e100
+
+class MACDValue(NamedTuple):
+    macd: float
+    signal: float
+    histogram: float
+
+class BollingerBands(NamedTuple):
+    middle: float
+    upper: float
+    lower: float
+
+class IndicatorValues(NamedTuple):
+    """Latest indicator readings of one symbol; None until warmed up"""
+    price: float
+    macd: MACDValue
+    rsi: Optional[float]
+    bollinger: Optional[BollingerBands]
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            'price': self.price,
+            'macd': self.macd._asdict(),
+            'rsi': self.rsi,
+            'bollinger': self.bollinger._asdict() if self.bollinger is not None else None
+        }
+
+# Batch versions
+
+def _smooth(values: np.ndarray, alpha: float, initial: float) -> np.ndarray:
+    """
+    y[t] = (1 - alpha) * y[t-1] + alpha * x[t] with y[-1] = initial
+
+    Evaluated blockwise in closed form, y[j] = d^(j+1) * (initial + alpha *
+    sum(x[i] / d^(i+1))), with blocks short enough that 1 / d^k stays finite.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.empty(len(values))
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        out[:] = values
+        return out
+    block = max(1, min(len(values), int(math.log(EMA_BLOCK_RANGE) / -math.log(decay))))
+    powers = decay ** np.arange(1, block + 1)
+    previous = initial
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        scale = powers[:len(chunk)]
+        out[start:start + len(chunk)] = scale * (previous + alpha * np.cumsum(chunk / scale))
+        previous = out[start + len(chunk) - 1]
+    return out
+
+def ema(values: np.ndarray, period: int) -> np.ndarray:
+    """Exponential moving average seeded with the first value"""
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return np.empty(0)
+    return _smooth(values, 2.0 / (period + 1), values[0])
+
+def macd(prices: np.ndarray, fast: int = MACD_FAST, slow: int = MACD_SLOW,
+         signal: int = MACD_SIGNAL) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line and histogram"""
+    line = ema(prices, fast) - ema(prices, slow)
+    signal_line = ema(line, signal)
+    return line, signal_line, line - signal_line
+
+def _rsi_from_averages(gain, loss):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + gain / loss)
+    rsi = np.where(loss == 0, 100.0, rsi)
+    return np.where((loss == 0) & (gain == 0), 50.0, rsi)
+
+def rsi(prices: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    """Wilder RSI; NaN until `period` price changes have been seen"""
+    prices = np.asarray(prices, dtype=np.float64)
+    out = np.full(len(prices), np.nan)
+    if len(prices) <= period:
+        return out
+    changes = np.diff(prices)
+    gains = np.maximum(changes, 0.0)
+    losses = np.maximum(-changes, 0.0)
+    first_gain = gains[:period].mean()
+    first_loss = losses[:period].mean()
+    avg_gain = np.concatenate(([first_gain], _smooth(gains[period:], 1.0 / period, first_gain)))
+    avg_loss = np.concatenate(([first_loss], _smooth(losses[period:], 1.0 / period, first_loss)))
+    out[period:] = _rsi_from_averages(avg_gain, avg_loss)
+    return out
+
+def bollinger(prices: np.ndarray, period: int = BOLLINGER_PERIOD,
+              num_std: float = BOLLINGER_STD) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Middle, upper and lower bands; NaN until `period` prices have been seen"""
+    prices = np.asarray(prices, dtype=np.float64)
+    middle = np.full(len(prices), np.nan)
+    width = np.full(len(prices), np.nan)
+    if len(prices) >= period:
+        windows = sliding_window_view(prices, period)
+        middle[period - 1:] = windows.mean(axis=1)
+        width[period - 1:] = windows.std(axis=1) * num_std
+    return middle, middle + width, middle - width
+
+# Incremental state
+
+class _EMA:
+    __slots__ = ('alpha', 'value')
+
+    def __init__(self, period: int):
+        self.alpha = 2.0 / (period + 1)
+        self.value: Optional[float] = None
+
+    def update(self, x: float) -> float:
+        if self.value is None:
+            self.value = x
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+class _WilderRSI:
+    __slots__ = ('period', 'previous', 'seen', 'avg_gain', 'avg_loss')
+
+    def __init__(self, period: int):
+        self.period = period
+        self.previous: Optional[float] = None
+        self.seen = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+
+    def update(self, price: float) -> Optional[float]:
+        previous, self.previous = self.previous, price
+        if previous is None:
+            return None
+        change = price - previous
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        self.seen += 1
+        if self.seen <= self.period:
+            # Seed with the simple mean of the first `period` changes
+            self.avg_gain += gain / self.period
+            self.avg_loss += loss / self.period
+            if self.seen < self.period:
+                return None
+        else:
+            self.avg_gain += (gain - self.avg_gain) / self.period
+            self.avg_loss += (loss - self.avg_loss) / self.period
+        return self.value()
+
+    def value(self) -> Optional[float]:
+        if self.seen < self.period:
+            return None
+        if self.avg_loss == 0:
+            return 50.0 if self.avg_gain == 0 else 100.0
+        return 100.0 - 100.0 / (1.0 + self.avg_gain / self.avg_loss)
+
+class _RollingBands:
+    """Bollinger bands from running sums of prices shifted by a reference price"""
+
+    __slots__ = ('period', 'num_std', 'window', 'shift', 'total', 'total_sq', 'resync_interval', '_updates')
+
+    def __init__(self, period: int, num_std: float, resync_interval: int = 1000):
+        self.period = period
+        self.num_std = num_std
+        self.window: deque = deque()
+        self.shift = 0.0
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.resync_interval = resync_interval
+        self._updates = 0
+
+    def update(self, price: float) -> Optional[BollingerBands]:
+        if not self.window:
+            self.shift = price
+        x = price - self.shift
+        self.window.append(price)
+        self.total += x
+        self.total_sq += x * x
+        if len(self.window) > self.period:
+            old = self.window.popleft() - self.shift
+            self.total -= old
+            self.total_sq -= old * old
+        self._updates += 1
+        if self._updates % self.resync_interval == 0:
+            self.resync()
+        return self.value()
+
+    def resync(self):
+        """Re-center on the current mean and rebuild the sums to shed drift"""
+        values = np.fromiter(self.window, dtype=np.float64)
+        self.shift = float(values.mean())
+        centered = values - self.shift
+        self.total = float(centered.sum())
+        self.total_sq = float((centered * centered).sum())
+
+    def value(self) -> Optional[BollingerBands]:
+        n = len(self.window)
+        if n < self.period:
+            return None
+        mean = self.total / n
+        variance = max(0.0, self.total_sq / n - mean * mean)
+        width = math.sqrt(variance) * self.num_std
+        middle = self.shift + mean
+        return BollingerBands(middle, middle + width, middle - width)
+
+class IndicatorState:
+    """O(1)-per-price MACD, RSI and Bollinger state of one symbol"""
+
+    def __init__(self, fast: int = MACD_FAST, slow: int = MACD_SLOW, signal: int = MACD_SIGNAL,
+                 rsi_period: int = RSI_PERIOD, bollinger_period: int = BOLLINGER_PERIOD,
+                 bollinger_std: float = BOLLINGER_STD):
+        self.periods = (fast, slow, signal, rsi_period, bollinger_period, bollinger_std)
+        self._fast = _EMA(fast)
+        self._slow = _EMA(slow)
+        self._signal = _EMA(signal)
+        self._rsi = _WilderRSI(rsi_period)
+        self._bands = _RollingBands(bollinger_period, bollinger_std)
+        self.latest: Optional[IndicatorValues] = None
+
+    def update(self, price: float) -> IndicatorValues:
+        line = self._fast.update(price) - self._slow.update(price)
+        signal = self._signal.update(line)
+        self.latest = IndicatorValues(
+            price=price,
+            macd=MACDValue(line, signal, line - signal),
+            rsi=self._rsi.update(price),
+            bollinger=self._bands.update(price)
+        )
+        return self.latest
+
+    def backfill(self, prices: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Compute full series for historical prices and continue live from their end
+
+        Must be called on a fresh state. Returns the batch series keyed by
+        name; the live state afterwards equals having update()d every price.
+        """
+        prices = np.asarray(prices, dtype=np.float64)
+        fast, slow, signal, rsi_period, bollinger_period, bollinger_std = self.periods
+        if not len(prices):
+            return {}
+        fast_ema = ema(prices, fast)
+        slow_ema = ema(prices, slow)
+        line = fast_ema - slow_ema
+        signal_line = ema(line, signal)
+        rsi_series = rsi(prices, rsi_period)
+        middle, upper, lower = bollinger(prices, bollinger_period, bollinger_std)
+
+        self._fast.value = float(fast_ema[-1])
+        self._slow.value = float(slow_ema[-1])
+        self._signal.value = float(signal_line[-1])
+        self._restore_rsi(prices)
+        for price in prices[-bollinger_period:].tolist():
+            self._bands.update(price)
+        self._bands.resync()
+
+        last_price = float(prices[-1])
+        self.latest = IndicatorValues(
+            price=last_price,
+            macd=MACDValue(float(line[-1]), float(signal_line[-1]), float(line[-1] - signal_line[-1])),
+            rsi=self._rsi.value(),
+            bollinger=self._bands.value()
+        )
+        return {
+            'macd': line, 'signal': signal_line, 'histogram': line - signal_line,
+            'rsi': rsi_series, 'bollinger_middle': middle,
+            'bollinger_upper': upper, 'bollinger_lower': lower
+        }
+
+    def _restore_rsi(self, prices: np.ndarray):
+        state = self._rsi
+        period = state.period
+        changes = np.diff(prices)
+        state.previous = float(prices[-1])
+        state.seen = len(changes)
+        if not len(changes):
+            return
+        gains = np.maximum(changes, 0.0)
+        losses = np.maximum(-changes, 0.0)
+        if len(changes) < period:
+            state.avg_gain = float(gains.sum() / period)
+            state.avg_loss = float(losses.sum() / period)
+            return
+        first_gain = gains[:period].mean()
+        first_loss = losses[:period].mean()
+        tail_gain = _smooth(gains[period:], 1.0 / period, first_gain)
+        tail_loss = _smooth(losses[period:], 1.0 / period, first_loss)
+        state.avg_gain = float(tail_gain[-1]) if len(tail_gain) else float(first_gain)
+        state.avg_loss = float(tail_loss[-1]) if len(tail_loss) else float(first_loss)
+
+class IndicatorBank:
+    """Per-symbol IndicatorState, shared by the oracle and the sensory layer"""
+
+    def __init__(self, **periods):
+        self.periods = periods
+        self.states: Dict[str, IndicatorState] = {}
+
+    def state(self, symbol: str) -> IndicatorState:
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = IndicatorState(**self.periods)
+        return state
+
+    def update(self, symbol: str, price: float) -> IndicatorValues:
+        return self.state(symbol).update(price)
+
+    def backfill(self, symbol: str, prices: np.ndarray) -> Dict[str, np.ndarray]:
+        """Seed a symbol from history (replacing any live state) and return its series"""
+        self.states[symbol] = IndicatorState(**self.periods)
+        return self.states[symbol].backfill(prices)
+
+    def latest(self, symbol: str) -> Optional[IndicatorValues]:
+        state = self.states.get(symbol)
+        return state.latest if state is not None else None
+
+    def attach(self, engine, batch_size: int = 256):
+        """Update from every tick of a MarketDataIngestionEngine"""
+        async def on_ticks(batch: List):
+            for market_data in batch:
+                self.update(market_data.symbol, market_data.price)
+
+        return engine.add_callback(on_ticks, overflow='block', batch_size=batch_size)
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Orion Rangi Sonic Engine - Pipeline Metrics
+Stage latency histograms, per-source counters and a Prometheus text exporter
+
+The ingestion engine, the sensory layer and their subscriber buses each hold
+an optional `metrics` attribute. While it is None (the default) the hot path
+pays one attribute check per stage; attach_metrics() points them at a
+MetricsRegistry, and detach_metrics() switches everything off again.
+
+Stages are timed with the monotonic perf_counter_ns clock:
+- frame:          websocket receive until the frame is fully handled (live feeds only)
+- decode:         parsing one raw frame into a ticker row
+- index:          columnar buffer, symbol index and tick store writes
+- publish:        queueing a tick for subscribers, including backpressure waits
+- hri_update:     sliding the HRI window by one tick
+- sss_update:     sliding the SSS window by one tick
+- consensus_run:  one scheduled consensus pass, publication included
+- callback:       one subscriber callback invocation (labelled by subscriber)
+
+Queue depths, subscriber drops and connection health are read from the
+layer at scrape time, so they add nothing to the hot path.
+
+W.J. McCrea - Reality Protocol LLC
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sensory_data_layer import SensoryDataLayer, configure_logging
+
+logger = logging.getLogger(__name__)
+
+# Histogram precision: 2**(PRECISION_BITS - 1) buckets per power of two, under 1.6% relative error
+PRECISION_BITS = 7
+
+# Largest recordable latency; longer samples are clamped (about 18 minutes)
+MAX_TRACKABLE_NS = 1 << 40
+
+EXPORT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+# Prometheus label name of each stage's label value (default 'source')
+STAGE_LABELS = {'callback': 'subscriber'}
+
+Sample = Tuple[str, Dict[str, str], float]
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of nanosecond latencies
+
+    Values below 2**PRECISION_BITS get exact buckets; above that every power
+    of two is split into 2**(PRECISION_BITS - 1) equal buckets, so recording
+    is a shift and a list increment and quantiles keep a fixed relative error
+    across nanoseconds to minutes.
+    """
+
+    __slots__ = ('counts', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        half = 1 << (PRECISION_BITS - 1)
+        top_shift = MAX_TRACKABLE_NS.bit_length() - PRECISION_BITS
+        self.counts = [0] * ((top_shift + 2) * half)
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        shift = value.bit_length() - PRECISION_BITS
+        if shift <= 0:
+            return value
+        return (shift << (PRECISION_BITS - 1)) + (value >> shift)
+
+    @staticmethod
+    def _upper_bound(index: int) -> int:
+        """Largest value that falls in bucket `index`"""
+        half = 1 << (PRECISION_BITS - 1)
+        if index < 2 * half:
+            return index
+        shift = index // half - 1
+        mantissa = index - shift * half
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value: int):
+        if value < 0:
+            value = 0
+        elif value > MAX_TRACKABLE_NS:
+            value = MAX_TRACKABLE_NS
+        self.counts[self._index(value)] += 1
+        if self.count == 0 or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def quantile(self, q: float) -> int:
+        """Upper bound of the bucket holding the q-quantile, capped at the recorded max"""
+        if self.count == 0:
+            return 0
+        rank = max(1, int(q * self.count + 0.5))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = self.total = self.min = self.max = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'min_ns': self.min,
+            'mean_ns': self.mean(),
+            'max_ns': self.max,
+            **{f'p{q * 100:g}_ns': self.quantile(q) for q in EXPORT_QUANTILES}
+        }
+
+class MetricsRegistry:
+    """Stage histograms and counters keyed by (name, label)"""
+
+    def __init__(self, namespace: str = 'orion'):
+        self.namespace = namespace
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.counters: Dict[Tuple[str, str], int] = {}
+        self._collectors: List[Callable[[], Iterator[Tuple[str, str, str, List[Sample]]]]] = []
+
+    def observe(self, stage: str, elapsed_ns: int, label: str = ''):
+        """Record one stage duration"""
+        histogram = self.histograms.get((stage, label))
+        if histogram is None:
+            histogram = self.histograms[(stage, label)] = LatencyHistogram()
+        histogram.record(elapsed_ns)
+
+    def count(self, name: str, label: str = '', amount: int = 1):
+        key = (name, label)
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    @contextmanager
+    def span(self, stage: str, label: str = ''):
+        """Time a block outside the hot path: `with registry.span('snapshot'): ...`"""
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter_ns() - started, label)
+
+    def add_collector(self, collector: Callable[[], Iterator[Tuple[str, str, str, List[Sample]]]]):
+        """
+        Register a scrape-time source of extra metric families
+
+        A collector yields (name, type, help, samples) with samples as
+        (suffix, labels, value); names get the registry namespace prepended.
+        """
+        self._collectors.append(collector)
+
+    def remove_collector(self, collector):
+        if collector in self._collectors:
+            self._collectors.remove(collector)
+
+    def reset(self):
+        for histogram in self.histograms.values():
+            histogram.reset()
+        self.counters.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Histogram summaries and counters as plain dicts"""
+        return {
+            'latency': {
+                f'{stage}:{label}' if label else stage: histogram.to_dict()
+                for (stage, label), histogram in sorted(self.histograms.items())
+            },
+            'counters': {
+                f'{name}:{label}' if label else name: value
+                for (name, label), value in sorted(self.counters.items())
+            }
+        }
+
+    def render(self) -> str:
+        """Prometheus text exposition (format 0.0.4) of everything registered"""
+        ns = self.namespace
+        lines: List[str] = []
+
+        if self.histograms:
+            name = f'{ns}_stage_latency_seconds'
+            lines.append(f'# HELP {name} Pipeline stage latency')
+            lines.append(f'# TYPE {name} summary')
+            for (stage, label), histogram in sorted(self.histograms.items()):
+                labels = {'stage': stage}
+                if label:
+                    labels[STAGE_LABELS.get(stage, 'source')] = label
+                for q in EXPORT_QUANTILES:
+                    lines.append(_sample(name, {**labels, 'quantile': f'{q:g}'}, histogram.quantile(q) / 1e9))
+                lines.append(_sample(f'{name}_sum', labels, histogram.total / 1e9))
+                lines.append(_sample(f'{name}_count', labels, histogram.count))
+
+        families: Dict[str, List[Tuple[Dict[str, str], int]]] = {}
+        for (counter, label), value in sorted(self.counters.items()):
+            families.setdefault(counter, []).append(({'source': label} if label else {}, value))
+        for counter, samples in families.items():
+            name = f'{ns}_{counter}_total'
+            lines.append(f'# TYPE {name} counter')
+            lines.extend(_sample(name, labels, value) for labels, value in samples)
+
+        for collector in self._collectors:
+            try:
+                for family, kind, help_text, samples in collector():
+                    name = f'{ns}_{family}'
+                    lines.append(f'# HELP {name} {help_text}')
+                    lines.append(f'# TYPE {name} {kind}')
+                    lines.extend(_sample(name + suffix, labels, value) for suffix, labels, value in samples)
+            except Exception as e:
+                logger.error("Metrics collector failed: %s", e)
+
+        lines.append('')
+        return '\n'.join(lines)
+
+def _sample(name: str, labels: Dict[str, str], value: float) -> str:
+    if not labels:
+        return f'{name} {value}'
+    rendered = ','.join(f'{key}="{_escape(str(item))}"' for key, item in labels.items())
+    return f'{name}{{{rendered}}} {value}'
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def layer_collector(layer: SensoryDataLayer):
+    """Scrape-time gauges for queue depths, subscriber drops and source health"""
+    engine = layer.ingestion_engine
+    scheduler = layer.consensus_scheduler
+
+    def collect():
+        subscriptions = engine.callbacks.subscriptions + layer.consensus_callbacks.subscriptions
+        yield ('subscriber_queue_depth', 'gauge', 'Items queued but not yet delivered',
+               [('', {'subscriber': sub.name}, sub.lag) for sub in subscriptions])
+        yield ('subscriber_queue_max_depth', 'gauge', 'Deepest queue seen per subscriber',
+               [('', {'subscriber': sub.name}, sub.max_lag) for sub in subscriptions])
+        yield ('subscriber_dropped_total', 'counter', 'Items dropped by subscriber overflow policy',
+               [('', {'subscriber': sub.name}, sub.dropped) for sub in subscriptions])
+        yield ('subscriber_errors_total', 'counter', 'Subscriber callbacks that raised',
+               [('', {'subscriber': sub.name}, sub.errors) for sub in subscriptions])
+        yield ('consensus_pending_ticks', 'gauge', 'Ticks waiting for the next consensus run',
+               [('', {}, len(layer._pending_ticks))])
+        yield ('consensus_interval_seconds', 'gauge', 'Current consensus scheduler interval',
+               [('', {}, scheduler.current_interval)])
+        yield ('consensus_runs_total', 'counter', 'Consensus scheduler runs',
+               [('', {}, scheduler.runs)])
+        health = engine.source_health
+        yield ('source_connected', 'gauge', 'Whether a source websocket is connected',
+               [('', {'source': source}, int(state.connected)) for source, state in health.items()])
+        yield ('source_reconnects_total', 'counter', 'Source reconnect attempts',
+               [('', {'source': source}, state.reconnects) for source, state in health.items()])
+        yield ('source_missed_messages_total', 'counter', 'Messages lost to sequence gaps',
+               [('', {'source': source}, state.missed_messages) for source, state in health.items()])
+
+    return collect
+
+def attach_metrics(layer: SensoryDataLayer, registry: Optional[MetricsRegistry] = None) -> MetricsRegistry:
+    """Turn on stage timings and counters for a layer, its engine and their subscribers"""
+    registry = registry or MetricsRegistry()
+    _set_metrics(layer, registry)
+    collector = layer_collector(layer)
+    registry.add_collector(collector)
+    layer._metrics_collector = collector
+    return registry
+
+def detach_metrics(layer: SensoryDataLayer):
+    """Turn instrumentation off again; the registry keeps what it has recorded"""
+    registry = layer.metrics
+    collector = getattr(layer, '_metrics_collector', None)
+    if registry is not None and collector is not None:
+        registry.remove_collector(collector)
+    _set_metrics(layer, None)
+
+def _set_metrics(layer: SensoryDataLayer, registry: Optional[MetricsRegistry]):
+    engine = layer.ingestion_engine
+    layer.metrics = registry
+    engine.metrics = registry
+    for bus in (engine.callbacks, layer.consensus_callbacks):
+        bus.metrics = registry
+        for subscription in bus.subscriptions:
+            subscription.metrics = registry
+
+class MetricsExporter:
+    """Serve a registry's Prometheus text on GET /metrics"""
+
+    def __init__(self, registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9464):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.scrapes = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info("Serving metrics on http://%s:%s/metrics", self.host, self.port)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handler(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 10.0)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+            writer.close()
+            return
+
+        parts = request.split(b'\r\n', 1)[0].split(b' ')
+        path = parts[1].split(b'?', 1)[0] if len(parts) > 1 else b''
+        if path == b'/metrics':
+            body = self.registry.render().encode('utf-8')
+            self.scrapes += 1
+            writer.write(
+                b'HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4; charset=utf-8\r\n'
+                b'Content-Length: ' + str(len(body)).encode('ascii') +
+                b'\r\nConnection: close\r\n\r\n' + body
+            )
+        else:
+            writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+async def serve(symbols: List[str], host: str, port: int):
+    """Run an instrumented sensory layer with its metrics endpoint until cancelled"""
+    layer = SensoryDataLayer()
+    exporter = MetricsExporter(attach_metrics(layer), host, port)
+    await exporter.start()
+    try:
+        await layer.initialize(symbols)
+        await layer.wait_closed()
+    finally:
+        await exporter.stop()
+        await layer.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the sensory layer with a Prometheus metrics endpoint")
+    parser.add_argument('--symbols', default='BTC,ETH,SOL,ADA')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9464)
+    args = parser.parse_args()
+    configure_logging()
+    asyncio.run(serve(args.symbols.split(','), args.host, args.port))
+
+if __name__ == "__main__":
+    main()
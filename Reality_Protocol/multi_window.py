@@ -0,0 +1,492 @@
+#!/usr/bin/env python3
+"""
+Orion Rangi Sonic Engine - Multi-Window Consensus
+HRI/SSS per symbol, per symbol pair and globally, over several windows at once
+
+Every scope is a tick stream: a symbol's own ticks, the interleaved ticks of
+a pair, or every tick for the global scope. Each stream keeps one columnar
+history that all of its windows slide over. Per-tick quantities (velocity,
+acceleration, interval, spectral offset and amplitude) are computed once in
+the history, and the pairwise price-ratio and correlation row of a new tick
+is evaluated once against the longest window; shorter windows take their
+share from suffix sums of that row. Each window then only adjusts its own
+running aggregates.
+
+Pair and global windows therefore include cross-symbol tick pairs and match
+IncrementalHRICalculator / IncrementalSSSCalculator run over the same
+interleaved stream. Pair scopes are opt-in: listed up front, or opened the
+first time one is queried, so the cost does not grow with every combination
+of the symbols seen.
+
+W.J. McCrea - Reality Protocol LLC
+"""
+
+import heapq
+import logging
+import math
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sensory_data_layer import (
+    DRIFT_REBUILDS_PER_WINDOW,
+    PRICE_HARMONIC_BLOCK_THRESHOLD,
+    HarmonicResonanceCalculator,
+    HRIStats,
+    MarketDataIngestionEngine,
+    MarketDataPoint,
+    RunningMoments,
+    SSSStats,
+    Subscription,
+    hri_from_stats,
+    nearest_ratio_distance,
+    sss_from_stats
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TICK_WINDOWS = (10, 50, 500)
+DEFAULT_TIME_WINDOWS = (60.0, 300.0, 3600.0)
+
+# Scope name of the all-symbol stream
+GLOBAL_SCOPE = '*'
+
+def window_label(ticks: Optional[int] = None, seconds: Optional[float] = None) -> str:
+    """'50t' for tick windows, '1m' / '5m' / '1h' / '90s' for time windows"""
+    if ticks is not None:
+        return f"{ticks}t"
+    for unit, size in (('h', 3600), ('m', 60)):
+        if seconds >= size and seconds % size == 0:
+            return f"{int(seconds // size)}{unit}"
+    return f"{seconds:g}s"
+
+def pair_scope(first: str, second: str) -> str:
+    return f"{first}/{second}"
+
+class WindowResult(NamedTuple):
+    """HRI/SSS of one scope (symbol, pair or global) over one window"""
+    scope: str
+    window: str
+    hri: float
+    sss: float
+    count: int
+
+class _StreamHistory:
+    """Mirrored ring of one stream's ticks plus per-tick derived terms"""
+
+    def __init__(self, capacity: int, base_frequency: float):
+        self.capacity = capacity
+        self.base_frequency = base_frequency
+        self.end = 0  # sequence number of the next tick
+        self.price = np.zeros(2 * capacity)
+        self.change = np.zeros(2 * capacity)
+        self.volume = np.zeros(2 * capacity)
+        self.timestamp = np.zeros(2 * capacity)
+        self.velocity = np.zeros(2 * capacity)
+        self.acceleration = np.zeros(2 * capacity)
+        self.interval = np.zeros(2 * capacity)
+        self.offset = np.zeros(2 * capacity)
+        self.amplitude = np.zeros(2 * capacity)
+
+    def slot(self, sequence: int) -> int:
+        return sequence % self.capacity
+
+    def view(self, array: np.ndarray, start: int, stop: int) -> np.ndarray:
+        """Contiguous view of sequences [start, stop), at most capacity long"""
+        base = start % self.capacity
+        return array[base:base + stop - start]
+
+    def append(self, market_data: MarketDataPoint):
+        sequence = self.end
+        if sequence:
+            previous = self.slot(sequence - 1)
+            last_price = self.price[previous]
+            velocity = (market_data.price - last_price) / last_price
+            acceleration = velocity - self.velocity[previous]
+            interval = market_data.timestamp - self.timestamp[previous]
+        else:
+            velocity = acceleration = interval = 0.0
+        offset = self.base_frequency * (market_data.change_24h / 100)
+        amplitude = math.log10(market_data.volume + 1) / 10
+
+        slot = self.slot(sequence)
+        for index in (slot, slot + self.capacity):
+            self.price[index] = market_data.price
+            self.change[index] = market_data.change_24h
+            self.volume[index] = market_data.volume
+            self.timestamp[index] = market_data.timestamp
+            self.velocity[index] = velocity
+            self.acceleration[index] = acceleration
+            self.interval[index] = interval
+            self.offset[index] = offset
+            self.amplitude[index] = amplitude
+        self.end = sequence + 1
+
+    def points(self, symbol: str, limit: int) -> List[MarketDataPoint]:
+        """The last `limit` retained ticks, e.g. to seed another stream"""
+        start = max(0, self.end - min(limit, self.capacity))
+        return [
+            MarketDataPoint(symbol, float(price), float(volume), float(change), float(timestamp), '')
+            for price, volume, change, timestamp in zip(
+                self.view(self.price, start, self.end), self.view(self.volume, start, self.end),
+                self.view(self.change, start, self.end), self.view(self.timestamp, start, self.end))
+        ]
+
+def _pair_sums(prices: np.ndarray, changes: np.ndarray) -> Tuple[float, float]:
+    """Price-ratio and correlation sums over every pair (i < j) of a window"""
+    n = len(prices)
+    if n < 2:
+        return 0.0, 0.0
+    if n <= PRICE_HARMONIC_BLOCK_THRESHOLD:
+        rows, cols = np.triu_indices(n, 1)
+        price_sum = np.sum(1.0 / (1.0 + nearest_ratio_distance(prices[rows] / prices[cols])))
+        correlation_sum = np.sum(np.maximum(1.0 - np.abs(changes[rows] - changes[cols]) / 100, 0.0))
+        return float(price_sum), float(correlation_sum)
+    price_sum = correlation_sum = 0.0
+    for i in range(n - 1):
+        price_sum += float(np.sum(1.0 / (1.0 + nearest_ratio_distance(prices[i] / prices[i + 1:]))))
+        correlation_sum += float(np.sum(np.maximum(1.0 - np.abs(changes[i + 1:] - changes[i]) / 100, 0.0)))
+    return price_sum, correlation_sum
+
+class _Window:
+    """Running HRI/SSS aggregates over sequences [start, end) of one stream"""
+
+    def __init__(self, label: str, ticks: Optional[int], seconds: Optional[float], start: int):
+        self.label = label
+        self.ticks = ticks
+        self.seconds = seconds
+        self.start = start
+        self.count = 0
+        self.price_pair_sum = 0.0
+        self.correlation_pair_sum = 0.0
+        self.volatility_sum = 0.0
+        self.volume = RunningMoments()
+        self.momentum = RunningMoments()
+        self.intervals = RunningMoments()
+        self.amplitude_sum = 0.0
+        self.weighted_freq_sum = 0.0
+        self.weighted_freq_sq_sum = 0.0
+        self.nonzero_amplitudes = 0
+        # History sequence of the last moment rebuild, and how many there were
+        self.rebuilt_at = 0
+        self.moment_rebuilds = 0
+
+    @property
+    def drifted(self) -> bool:
+        return self.volume.drifted or self.momentum.drifted or self.intervals.drifted
+
+    def add(self, history: _StreamHistory, sequence: int, price_row_sum: float, correlation_row_sum: float):
+        """Extend the window by the newest tick given its pair sums against the window"""
+        slot = history.slot(sequence)
+        self.price_pair_sum += price_row_sum
+        self.correlation_pair_sum += correlation_row_sum
+        if self.count >= 1:
+            self.volatility_sum += abs(history.velocity[slot])
+            self.intervals.add(history.interval[slot])
+        if self.count >= 2:
+            self.momentum.add(history.acceleration[slot])
+        self._spectral(history, slot, 1)
+        self.count += 1
+
+    def evict(self, history: _StreamHistory):
+        """Drop the oldest tick of the window"""
+        oldest = self.start
+        slot = history.slot(oldest)
+        end = oldest + self.count
+
+        if self.count > 1:
+            # Pairs (oldest, j): oldest is always the numerator
+            prices = history.view(history.price, oldest + 1, end)
+            self.price_pair_sum -= float((1.0 / (1.0 + nearest_ratio_distance(history.price[slot] / prices))).sum())
+            changes = history.view(history.change, oldest + 1, end)
+            correlations = np.maximum(1.0 - np.abs(changes - history.change[slot]) / 100, 0.0)
+            self.correlation_pair_sum -= float(correlations.sum())
+
+            following = history.slot(oldest + 1)
+            self.volatility_sum -= abs(history.velocity[following])
+            self.intervals.remove(history.interval[following])
+        if self.count > 2:
+            self.momentum.remove(history.acceleration[history.slot(oldest + 2)])
+        self._spectral(history, slot, -1)
+        self.count -= 1
+        self.start += 1
+
+    def _spectral(self, history: _StreamHistory, slot: int, sign: int):
+        offset = history.offset[slot]
+        amplitude = history.amplitude[slot]
+        volume = history.volume[slot]
+        self.amplitude_sum += sign * amplitude
+        self.weighted_freq_sum += sign * offset * amplitude
+        self.weighted_freq_sq_sum += sign * offset * offset * amplitude
+        if amplitude != 0:
+            self.nonzero_amplitudes += sign
+        if sign > 0:
+            self.volume.add(volume)
+        else:
+            self.volume.remove(volume)
+
+    def resync(self, history: _StreamHistory):
+        """Rebuild every running aggregate, pair sums included, from the history to shed drift"""
+        start, end = self.start, self.start + self.count
+        self.price_pair_sum, self.correlation_pair_sum = _pair_sums(
+            history.view(history.price, start, end), history.view(history.change, start, end))
+        self.resync_moments(history)
+
+    def resync_moments(self, history: _StreamHistory):
+        """Rebuild the moment and linear aggregates; O(window), unlike the pair sums"""
+        start, end = self.start, self.start + self.count
+        self.volume = RunningMoments.from_values(history.view(history.volume, start, end))
+        self.intervals = RunningMoments.from_values(history.view(history.interval, start + 1, end))
+        self.momentum = RunningMoments.from_values(history.view(history.acceleration, start + 2, end))
+        self.volatility_sum = float(np.sum(np.abs(history.view(history.velocity, start + 1, end))))
+        offsets = history.view(history.offset, start, end)
+        amplitudes = history.view(history.amplitude, start, end)
+        self.amplitude_sum = float(np.sum(amplitudes))
+        self.weighted_freq_sum = float(np.sum(offsets * amplitudes))
+        self.weighted_freq_sq_sum = float(np.sum(offsets * offsets * amplitudes))
+        self.nonzero_amplitudes = int(np.count_nonzero(amplitudes))
+        self.rebuilt_at = history.end
+        self.moment_rebuilds += 1
+
+    def hri_stats(self) -> HRIStats:
+        n = self.count
+        return HRIStats(
+            count=n,
+            price_pair_count=n * (n - 1) // 2,
+            price_pair_sum=self.price_pair_sum,
+            correlation_pair_sum=self.correlation_pair_sum,
+            volatility_count=max(0, n - 1),
+            volatility_sum=self.volatility_sum,
+            volume=self.volume,
+            momentum=self.momentum
+        )
+
+    def sss_stats(self) -> SSSStats:
+        return SSSStats(
+            count=self.count,
+            amplitude_sum=self.amplitude_sum,
+            weighted_freq_sum=self.weighted_freq_sum,
+            weighted_freq_sq_sum=self.weighted_freq_sq_sum,
+            nonzero_amplitudes=self.nonzero_amplitudes,
+            intervals=self.intervals,
+            volume=self.volume
+        )
+
+class _Stream:
+    """One tick stream (a symbol, a pair or every symbol) and all of its windows"""
+
+    def __init__(self, capacity: int, base_frequency: float, window_specs):
+        self.history = _StreamHistory(capacity, base_frequency)
+        self.windows = [_Window(label, ticks, seconds, 0) for label, ticks, seconds in window_specs]
+
+    def update(self, market_data: MarketDataPoint, resync_interval: int):
+        """Slide every window of the stream forward by one tick"""
+        history = self.history
+        windows = self.windows
+
+        # Keep room in the ring for the incoming tick
+        for window in windows:
+            while window.count >= history.capacity:
+                window.evict(history)
+
+        sequence = history.end
+        history.append(market_data)
+
+        # One pair row against the longest window; shorter windows use its suffix sums
+        earliest = min(window.start for window in windows)
+        if sequence > earliest:
+            prices = history.view(history.price, earliest, sequence)
+            changes = history.view(history.change, earliest, sequence)
+            price_row = 1.0 / (1.0 + nearest_ratio_distance(prices / market_data.price))
+            correlation_row = np.maximum(1.0 - np.abs(changes - market_data.change_24h) / 100, 0.0)
+            price_suffix = np.cumsum(price_row[::-1])[::-1]
+            correlation_suffix = np.cumsum(correlation_row[::-1])[::-1]
+        else:
+            price_suffix = correlation_suffix = ()
+
+        for window in windows:
+            offset = window.start - earliest
+            if offset < len(price_suffix):
+                window.add(history, sequence, float(price_suffix[offset]), float(correlation_suffix[offset]))
+            else:
+                window.add(history, sequence, 0.0, 0.0)
+            if window.ticks is not None:
+                while window.count > window.ticks:
+                    window.evict(history)
+            else:
+                horizon = market_data.timestamp - window.seconds
+                while window.count > 1 and history.timestamp[history.slot(window.start)] < horizon:
+                    window.evict(history)
+            if history.end % resync_interval == 0:
+                window.resync(history)
+            elif (history.end - window.rebuilt_at >= max(1, window.count // DRIFT_REBUILDS_PER_WINDOW) and
+                  window.drifted):
+                # Rate-limited like the incremental calculators' drift rebuilds
+                window.resync_moments(history)
+
+class MultiWindowConsensus:
+    """
+    Keyed HRI/SSS results for every (scope, window) combination
+
+    Scopes are symbols, 'A/B' pairs and GLOBAL_SCOPE; windows are tick-count
+    windows ('10t', '50t', ...) and time windows ('1m', '5m', '1h'), the
+    latter anchored at the stream's newest tick. Symbol and global streams
+    hold at most history_capacity ticks, pair streams pair_history_capacity,
+    which also bounds time windows on very busy streams. Pair scopes exist
+    only for the `pairs` given, plus (with lazy_pairs) any 'A/B' scope passed
+    to get() once both symbols have ticks; such a pair is seeded from both
+    symbols' retained ticks merged by timestamp.
+    """
+
+    def __init__(self, base_frequency: float = 432.0,
+                 tick_windows: Sequence[int] = DEFAULT_TICK_WINDOWS,
+                 time_windows: Sequence[float] = DEFAULT_TIME_WINDOWS,
+                 pairs: Optional[Iterable[Tuple[str, str]]] = None,
+                 lazy_pairs: bool = True, history_capacity: int = 8192,
+                 pair_history_capacity: int = 2048, resync_interval: int = 1000):
+        if tick_windows and max(tick_windows) > min(history_capacity, pair_history_capacity):
+            raise ValueError("Tick windows cannot exceed history_capacity or pair_history_capacity")
+        self.base_frequency = base_frequency
+        self.harmonic_weights = HarmonicResonanceCalculator(base_frequency).harmonic_weights
+        self.window_specs = (
+            [(window_label(ticks=n), n, None) for n in tick_windows] +
+            [(window_label(seconds=s), None, s) for s in time_windows]
+        )
+        self.windows = [label for label, _, _ in self.window_specs]
+        self.history_capacity = history_capacity
+        self.pair_history_capacity = pair_history_capacity
+        self.resync_interval = resync_interval
+
+        self._symbols: Dict[str, _Stream] = {}
+        self._pairs: Dict[str, Tuple[str, str]] = {}
+        self._pair_streams: Dict[str, _Stream] = {}
+        self._symbol_pairs: Dict[str, List[str]] = {}
+        self._global = self._stream(history_capacity)
+        self.lazy_pairs = lazy_pairs
+        for pair in pairs or ():
+            self._add_pair(*pair)
+        self.rejected = 0
+        self._subscription: Optional[Subscription] = None
+
+    def _stream(self, capacity: int) -> _Stream:
+        return _Stream(capacity, self.base_frequency, self.window_specs)
+
+    def _add_pair(self, first: str, second: str) -> _Stream:
+        scope = pair_scope(first, second)
+        stream = self._pair_streams[scope] = self._stream(self.pair_history_capacity)
+        self._pairs[scope] = (first, second)
+        self._symbol_pairs.setdefault(first, []).append(scope)
+        self._symbol_pairs.setdefault(second, []).append(scope)
+        return stream
+
+    def attach(self, engine: MarketDataIngestionEngine, batch_size: int = 256) -> Subscription:
+        """Consume every tick of an ingestion engine (blocking, so windows never skip ticks)"""
+        self._subscription = engine.add_callback(self._on_ticks, overflow='block', batch_size=batch_size)
+        return self._subscription
+
+    async def _on_ticks(self, batch: List[MarketDataPoint]):
+        for market_data in batch:
+            self.update(market_data)
+
+    def symbols(self) -> List[str]:
+        return list(self._symbols)
+
+    def update(self, market_data: MarketDataPoint):
+        """Slide every window of the tick's symbol, pairs and the global stream forward"""
+        if market_data.price == 0:
+            # The price ratio terms divide by price; the batch calculator raises here
+            self.rejected += 1
+            return
+        symbol = market_data.symbol
+        stream = self._symbols.get(symbol)
+        if stream is None:
+            stream = self._symbols[symbol] = self._stream(self.history_capacity)
+        stream.update(market_data, self.resync_interval)
+
+        for scope in self._symbol_pairs.get(symbol, ()):
+            self._pair_streams[scope].update(market_data, self.resync_interval)
+        self._global.update(market_data, self.resync_interval)
+
+    def _open_pair(self, first: str, second: str) -> _Stream:
+        """Open a pair stream on request, seeded with both symbols' retained ticks"""
+        pair_stream = self._add_pair(first, second)
+        limit = self.pair_history_capacity
+        merged = heapq.merge(self._symbols[first].history.points(first, limit),
+                             self._symbols[second].history.points(second, limit),
+                             key=lambda market_data: market_data.timestamp)
+        for market_data in list(merged)[-limit:]:
+            pair_stream.update(market_data, self.resync_interval)
+        return pair_stream
+
+    def _scope_stream(self, scope: str) -> Optional[_Stream]:
+        if scope == GLOBAL_SCOPE:
+            return self._global
+        if '/' in scope:
+            stream = self._pair_streams.get(scope)
+            if stream is None:
+                stream = self._pair_streams.get(pair_scope(*reversed(scope.split('/', 1))))
+            if stream is None and self.lazy_pairs:
+                first, second = scope.split('/', 1)
+                if first != second and first in self._symbols and second in self._symbols:
+                    stream = self._open_pair(*sorted((first, second)))
+            return stream
+        return self._symbols.get(scope)
+
+    def _result(self, scope: str, label: str, stream: Optional[_Stream]) -> Optional[WindowResult]:
+        if stream is None:
+            return None
+        window = stream.windows[self.windows.index(label)]
+        if window.count < 2:
+            return None
+        return WindowResult(scope, label, float(hri_from_stats(window.hri_stats(), self.harmonic_weights)),
+                            float(sss_from_stats(window.sss_stats())), window.count)
+
+    def get(self, scope: str, window: str) -> Optional[WindowResult]:
+        """Result for one scope ('BTC', 'BTC/SOL' or '*') and window label"""
+        if window not in self.windows:
+            raise KeyError(f"Unknown window: {window}")
+        return self._result(scope, window, self._scope_stream(scope))
+
+    def query(self, scope: Optional[str] = None, window: Optional[str] = None,
+              kind: Optional[str] = None) -> List[WindowResult]:
+        """
+        Results filtered by scope, window label and/or kind
+
+        kind is 'symbol', 'pair' or 'global'. A symbol scope also matches the
+        pairs that contain it when kind is 'pair'.
+        """
+        scopes: List[Tuple[str, Sequence[str], _Stream]] = []
+        if kind in (None, 'symbol'):
+            scopes += [(symbol, [symbol], stream) for symbol, stream in self._symbols.items()]
+        if kind in (None, 'pair'):
+            scopes += [(name, self._pairs[name], stream) for name, stream in self._pair_streams.items()]
+        if kind in (None, 'global'):
+            scopes.append((GLOBAL_SCOPE, list(self._symbols), self._global))
+
+        if scope is not None:
+            if kind == 'pair':
+                scopes = [entry for entry in scopes if scope in entry[1]]
+            else:
+                scopes = [entry for entry in scopes if entry[0] == scope]
+        labels = [window] if window is not None else self.windows
+
+        results = []
+        for name, _, stream in scopes:
+            for label in labels:
+                result = self._result(name, label, stream)
+                if result is not None:
+                    results.append(result)
+        return results
+
+    def results(self) -> Dict[Tuple[str, str], WindowResult]:
+        """Every available result keyed by (scope, window)"""
+        return {(result.scope, result.window): result for result in self.query()}
+
+    def to_dict(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Nested {scope: {window: {hri, sss, count}}} view for serialization"""
+        nested: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for result in self.query():
+            nested.setdefault(result.scope, {})[result.window] = {
+                'hri': result.hri, 'sss': result.sss, 'count': result.count
+            }
+        return nested
@@ -0,0 +1,530 @@
+#!/usr/bin/env python3
+"""
+Orion Rangi Sonic Engine - Proof-of-Resonance Network
+Gossip signed consensus results between sensory nodes and aggregate them robustly
+
+Every node signs each local consensus result with its Ed25519 key and sends
+it to its peers as one compact frame over TCP:
+
+    u32 length | 'ORGS' | u8 version | u8 hops | 8-byte key id
+               | 49-byte encode_consensus_result() | 64-byte signature
+
+A node accepts a frame only if the key id belongs to a trusted public key
+and the signature checks out, then forwards it once to its own peers (up to
+max_hops), so partial topologies still reach everyone. Each node keeps the
+newest result per signing node; results dated within `window` seconds of the
+node's own clock are combined with a median or trimmed mean into an aggregate
+ConsensusResult whose participating_nodes is the number of contributors.
+Results dated more than `max_skew` seconds ahead of the local clock are
+rejected, so one node with a wrong clock cannot push the others out.
+
+The harness runs N nodes on localhost, in-process or as subprocesses, and
+reports how long results take to reach every node as N grows:
+
+    python resonance_network.py simulate --nodes 3,5,10 --duration 5
+    python resonance_network.py simulate --nodes 5 --faulty 1 --processes
+
+W.J. McCrea - Reality Protocol LLC
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import random
+import socket
+import struct
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from metrics import LatencyHistogram
+from sensory_data_layer import (
+    CONSENSUS_ENCODING,
+    ConsensusResult,
+    SensoryDataLayer,
+    SubscriberBus,
+    Subscription,
+    configure_logging,
+    decode_consensus_result,
+    encode_consensus_result
+)
+from signing import ConsensusSigner, verify_signature
+
+logger = logging.getLogger(__name__)
+
+FRAME_LENGTH = struct.Struct('<I')
+GOSSIP_HEADER = struct.Struct('<4sBB8s')
+GOSSIP_TAG = b'ORGS'
+GOSSIP_VERSION = 1
+SIGNATURE_SIZE = 64
+GOSSIP_SIZE = GOSSIP_HEADER.size + CONSENSUS_ENCODING.size + SIGNATURE_SIZE
+
+AGGREGATE_STATISTICS = ('median', 'trimmed_mean')
+
+# Seconds a peer's result may be dated ahead of the local clock
+MAX_CLOCK_SKEW = 1.0
+
+class GossipMessage(NamedTuple):
+    key_id: bytes
+    hops: int
+    payload: bytes
+    signature: bytes
+
+def encode_gossip(message: GossipMessage) -> bytes:
+    return (FRAME_LENGTH.pack(GOSSIP_SIZE) +
+            GOSSIP_HEADER.pack(GOSSIP_TAG, GOSSIP_VERSION, message.hops, message.key_id) +
+            message.payload + message.signature)
+
+def decode_gossip(body: bytes) -> GossipMessage:
+    if len(body) != GOSSIP_SIZE:
+        raise ValueError(f"Gossip frame of {len(body)} bytes, expected {GOSSIP_SIZE}")
+    tag, version, hops, kid = GOSSIP_HEADER.unpack_from(body)
+    if tag != GOSSIP_TAG or version != GOSSIP_VERSION:
+        raise ValueError("Not a gossip frame")
+    payload_end = GOSSIP_HEADER.size + CONSENSUS_ENCODING.size
+    return GossipMessage(kid, hops, body[GOSSIP_HEADER.size:payload_end], body[payload_end:])
+
+def robust_center(values: Sequence[float], statistic: str = 'median', trim: float = 0.2) -> float:
+    """Median, or mean after cutting floor(trim * n) values from each end"""
+    ordered = sorted(values)
+    n = len(ordered)
+    if statistic == 'median':
+        middle = n // 2
+        return ordered[middle] if n % 2 else (ordered[middle - 1] + ordered[middle]) / 2.0
+    cut = int(trim * n)
+    kept = ordered[cut:n - cut] or ordered
+    return sum(kept) / len(kept)
+
+class ResonanceAggregator:
+    """Newest result per node, combined over the nodes heard from within `window` seconds"""
+
+    def __init__(self, window: float = 1.0, statistic: str = 'median', trim: float = 0.2,
+                 max_skew: float = MAX_CLOCK_SKEW):
+        if statistic not in AGGREGATE_STATISTICS:
+            raise ValueError(f"Unknown aggregate statistic: {statistic}")
+        self.window = window
+        self.statistic = statistic
+        self.trim = trim
+        self.max_skew = max_skew
+        self.latest: Dict[bytes, Tuple[ConsensusResult, str]] = {}
+
+    def future_dated(self, result: ConsensusResult, now: Optional[float] = None) -> bool:
+        """True if a result is dated beyond the clock-skew allowance"""
+        return result.consensus_timestamp > (time.time() if now is None else now) + self.max_skew
+
+    def add(self, kid: bytes, result: ConsensusResult, signature: str) -> bool:
+        """Keep a node's result unless it is future-dated or an equally new one is already held"""
+        if self.future_dated(result):
+            return False
+        held = self.latest.get(kid)
+        if held is not None and held[0].consensus_timestamp >= result.consensus_timestamp:
+            return False
+        self.latest[kid] = (result, signature)
+        return True
+
+    def aggregate(self, now: Optional[float] = None) -> Optional[ConsensusResult]:
+        """Combine the results dated within `window` seconds of now (local clock); None if there are none"""
+        now = time.time() if now is None else now
+        current = [(result, signature) for result, signature in self.latest.values()
+                   if now - self.window <= result.consensus_timestamp <= now + self.max_skew]
+        if not current:
+            return None
+        newest = max(result.consensus_timestamp for result, _ in current)
+        hri = robust_center([result.hri_value for result, _ in current], self.statistic, self.trim)
+        sss = robust_center([result.sss_value for result, _ in current], self.statistic, self.trim)
+        return ConsensusResult(
+            hri_value=hri,
+            sss_value=sss,
+            harmonic_quality=(hri / 100.0 + (100.0 - sss) / 100.0) / 2.0 * 100.0,
+            consensus_timestamp=newest,
+            participating_nodes=len(current),
+            validation_signatures=[signature for _, signature in current]
+        )
+
+class _Peer:
+    """Outbound connection to one peer with a bounded send queue and reconnects"""
+
+    def __init__(self, host: str, port: int, queue_size: int = 1024, max_delay: float = 5.0):
+        self.host = host
+        self.port = port
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.max_delay = max_delay
+        self.connected = False
+        self.dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def send(self, frame: bytes):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+
+    async def _run(self):
+        attempt = 0
+        while True:
+            try:
+                _, writer = await asyncio.open_connection(self.host, self.port)
+            except OSError:
+                delay = min(self.max_delay, 0.05 * 2 ** attempt)
+                attempt += 1
+                await asyncio.sleep(delay / 2 + random.uniform(0, delay / 2))
+                continue
+            attempt = 0
+            self.connected = True
+            try:
+                while True:
+                    frames = [await self.queue.get()]
+                    while not self.queue.empty():
+                        frames.append(self.queue.get_nowait())
+                    writer.write(b''.join(frames))
+                    await writer.drain()
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                self.connected = False
+                writer.close()
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+class ResonanceNode:
+    """
+    One Proof-of-Resonance node: signs local results, gossips them, aggregates everyone's
+
+    trusted maps key ids to raw public keys; frames from other keys are
+    rejected (the node's own key is always trusted). Aggregates are
+    published on the `aggregates` bus after every accepted result.
+    """
+
+    def __init__(self, signer: ConsensusSigner, trusted: Dict[bytes, bytes], host: str = '127.0.0.1',
+                 port: int = 0, peers: Sequence[Tuple[str, int]] = (), window: float = 1.0,
+                 statistic: str = 'median', trim: float = 0.2, max_hops: int = 3,
+                 dedup_capacity: int = 65536, max_skew: float = MAX_CLOCK_SKEW):
+        self.signer = signer
+        self.trusted = dict(trusted)
+        self.trusted[signer.key_id] = signer.public_key
+        self.base_frequency = signer.base_frequency
+        self.host = host
+        self.port = port
+        self.peers = [_Peer(peer_host, peer_port) for peer_host, peer_port in peers]
+        self.max_hops = max_hops
+        self.aggregator = ResonanceAggregator(window, statistic, trim, max_skew)
+        self.aggregates = SubscriberBus('aggregate')
+        self.current: Optional[ConsensusResult] = None
+
+        self._seen: 'OrderedDict[bytes, None]' = OrderedDict()
+        self._dedup_capacity = dedup_capacity
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._inbound: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self._subscription: Optional[Subscription] = None
+        self._layer: Optional[SensoryDataLayer] = None
+
+        # Node statistics; delivery latency is origin consensus_timestamp to acceptance here
+        self.delivery_latency = LatencyHistogram()
+        self.published = 0
+        self.accepted = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.forwarded = 0
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_peer, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        for peer in self.peers:
+            peer.start()
+        logger.info("Resonance node %s listening on %s:%s", self.signer.key_id.hex(), self.host, self.port)
+
+    def connect(self, host: str, port: int):
+        """Add an outbound peer after start()"""
+        peer = _Peer(host, port)
+        self.peers.append(peer)
+        if self._server is not None:
+            peer.start()
+
+    async def stop(self):
+        if self._subscription is not None:
+            await self._layer.consensus_callbacks.unsubscribe(self._subscription)
+            self._subscription = None
+        for peer in self.peers:
+            await peer.close()
+        if self._server is not None:
+            self._server.close()
+            for writer in self._inbound.values():
+                writer.close()
+            await asyncio.gather(*self._inbound, return_exceptions=True)
+            await self._server.wait_closed()
+        await self.aggregates.close()
+
+    def attach(self, layer: SensoryDataLayer) -> Subscription:
+        """Gossip every consensus result a local sensory layer publishes"""
+        async def on_consensus(result: ConsensusResult):
+            await self.submit(result)
+
+        self._layer = layer
+        self._subscription = layer.add_consensus_callback(on_consensus, overflow='drop_oldest')
+        return self._subscription
+
+    async def submit(self, result: ConsensusResult):
+        """Sign a local result, fold it into the aggregate and send it to every peer"""
+        payload = encode_consensus_result(result, self.base_frequency)
+        message = GossipMessage(self.signer.key_id, 0, payload, self.signer.sign_bytes(payload))
+        self._remember(self._message_id(message))
+        self.published += 1
+        self._broadcast(message)
+        await self._accept(message, result)
+
+    @staticmethod
+    def _message_id(message: GossipMessage) -> bytes:
+        """Dedupe key over key id, payload and signature, so a reused signature never shadows a message"""
+        return hashlib.sha256(message.key_id + message.payload + message.signature).digest()[:16]
+
+    def _remember(self, message_id: bytes):
+        self._seen[message_id] = None
+        if len(self._seen) > self._dedup_capacity:
+            self._seen.popitem(last=False)
+
+    def _broadcast(self, message: GossipMessage):
+        frame = encode_gossip(message)
+        for peer in self.peers:
+            peer.send(frame)
+
+    async def _accept(self, message: GossipMessage, result: ConsensusResult):
+        signature = f"ed25519:{message.key_id.hex()}:{message.signature.hex()}"
+        if not self.aggregator.add(message.key_id, result, signature):
+            return
+        aggregate = self.aggregator.aggregate()
+        if aggregate is None:
+            return
+        self.current = aggregate
+        await self.aggregates.publish(aggregate)
+
+    async def _handle_peer(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._inbound[task] = writer
+        try:
+            while True:
+                (length,) = FRAME_LENGTH.unpack(await reader.readexactly(FRAME_LENGTH.size))
+                if length != GOSSIP_SIZE:
+                    # Never buffer a peer-chosen length; frames have one fixed size
+                    self.rejected += 1
+                    logger.warning("Closing peer that sent a %d byte gossip frame", length)
+                    break
+                body = await reader.readexactly(length)
+                await self._receive(body)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._inbound.pop(task, None)
+            writer.close()
+
+    async def _receive(self, body: bytes):
+        try:
+            message = decode_gossip(body)
+        except (ValueError, struct.error) as e:
+            self.rejected += 1
+            logger.warning("Dropping malformed gossip frame: %s", e)
+            return
+        message_id = self._message_id(message)
+        if message_id in self._seen:
+            self.duplicates += 1
+            return
+
+        public_key = self.trusted.get(message.key_id)
+        if public_key is None or not verify_signature(public_key, message.signature, message.payload):
+            self.rejected += 1
+            return
+        self._remember(message_id)
+        result, base_frequency = decode_consensus_result(message.payload)
+        if base_frequency != self.base_frequency or self.aggregator.future_dated(result):
+            self.rejected += 1
+            return
+
+        self.accepted += 1
+        self.delivery_latency.record(int(max(0.0, time.time() - result.consensus_timestamp) * 1e9))
+        if message.hops + 1 < self.max_hops:
+            self._broadcast(message._replace(hops=message.hops + 1))
+            self.forwarded += 1
+        await self._accept(message, result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'key_id': self.signer.key_id.hex(),
+            'port': self.port,
+            'published': self.published,
+            'accepted': self.accepted,
+            'duplicates': self.duplicates,
+            'rejected': self.rejected,
+            'forwarded': self.forwarded,
+            'peers_connected': sum(peer.connected for peer in self.peers),
+            'peer_drops': sum(peer.dropped for peer in self.peers),
+            'participating_nodes': self.current.participating_nodes if self.current else 0,
+            'delivery_latency': self.delivery_latency.to_dict()
+        }
+
+# Local simulation harness
+
+def node_seed(index: int) -> bytes:
+    """Deterministic per-index key seed so simulated nodes can trust each other up front"""
+    return hashlib.sha256(b'orion-resonance-sim-%d' % index).digest()
+
+def topology_peers(index: int, ports: Sequence[int], topology: str) -> List[Tuple[str, int]]:
+    """'mesh': dial every other node; 'ring': dial the next two nodes only (relies on forwarding)"""
+    count = len(ports)
+    if topology == 'mesh':
+        targets = [other for other in range(count) if other != index]
+    else:
+        targets = sorted({(index + step) % count for step in (1, 2)} - {index})
+    return [('127.0.0.1', ports[other]) for other in targets]
+
+def simulated_result(rng: random.Random, base: Tuple[float, float], faulty: bool) -> ConsensusResult:
+    """A node's view of a shared HRI/SSS signal: small noise, or garbage for a faulty node"""
+    if faulty:
+        hri, sss = rng.choice((0.0, 100.0)), rng.uniform(0, 100)
+    else:
+        hri = min(100.0, max(0.0, base[0] + rng.gauss(0, 0.5)))
+        sss = min(100.0, max(0.0, base[1] + rng.gauss(0, 0.5)))
+    return ConsensusResult(hri, sss, (hri / 100.0 + (100.0 - sss) / 100.0) / 2.0 * 100.0, time.time(), 1, [])
+
+def shared_signal(t: float) -> Tuple[float, float]:
+    return 60.0 + 10.0 * math.sin(t / 3.0), 30.0 + 5.0 * math.cos(t / 5.0)
+
+async def drive_node(node: ResonanceNode, index: int, duration: float, rate: float, faulty: bool):
+    """Submit simulated results at `rate` per second for `duration` seconds"""
+    rng = random.Random(index)
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    # Stagger nodes so their results do not all land on the same instant
+    await asyncio.sleep(rng.uniform(0, 1.0 / rate))
+    while loop.time() - started < duration:
+        await node.submit(simulated_result(rng, shared_signal(time.time()), faulty))
+        await asyncio.sleep(1.0 / rate)
+
+def make_node(index: int, count: int, ports: Sequence[int], topology: str, window: float,
+              statistic: str) -> ResonanceNode:
+    signers = [ConsensusSigner(node_seed(other), mode='each') for other in range(count)]
+    trusted = {signer.key_id: signer.public_key for signer in signers}
+    return ResonanceNode(signers[index], trusted, port=ports[index],
+                         peers=topology_peers(index, ports, topology), window=window, statistic=statistic)
+
+def summarize(stats: List[Dict[str, Any]], faulty: int) -> Dict[str, Any]:
+    honest = stats[faulty:]
+    return {
+        'nodes': len(stats),
+        'faulty': faulty,
+        'accepted': sum(node['accepted'] for node in stats),
+        'published': sum(node['published'] for node in stats),
+        'duplicates': sum(node['duplicates'] for node in stats),
+        'rejected': sum(node['rejected'] for node in stats),
+        'delivery_p50_ms': max(node['delivery_latency']['p50_ns'] for node in stats) / 1e6,
+        'delivery_p99_ms': max(node['delivery_latency']['p99_ns'] for node in stats) / 1e6,
+        'participating_nodes': min(node['participating_nodes'] for node in honest),
+        'aggregate_spread_hri': (max(node['aggregate_hri'] for node in honest) -
+                                 min(node['aggregate_hri'] for node in honest))
+    }
+
+def free_ports(count: int) -> List[int]:
+    sockets = [socket.socket() for _ in range(count)]
+    try:
+        for sock in sockets:
+            sock.bind(('127.0.0.1', 0))
+        return [sock.getsockname()[1] for sock in sockets]
+    finally:
+        for sock in sockets:
+            sock.close()
+
+async def run_node(index: int, count: int, ports: Sequence[int], topology: str, window: float,
+                   statistic: str, duration: float, rate: float, faulty: bool,
+                   settle: float = 0.5) -> Dict[str, Any]:
+    """Run one simulated node to completion and return its stats"""
+    node = make_node(index, count, ports, topology, window, statistic)
+    await node.start()
+    await asyncio.sleep(settle)
+    await drive_node(node, index, duration, rate, faulty)
+    await asyncio.sleep(settle)
+    stats = node.get_stats()
+    stats['aggregate_hri'] = node.current.hri_value if node.current else float('nan')
+    await node.stop()
+    return stats
+
+async def simulate(count: int, duration: float = 5.0, rate: float = 10.0, faulty: int = 0,
+                   topology: str = 'mesh', window: float = 1.0, statistic: str = 'median',
+                   processes: bool = False) -> Dict[str, Any]:
+    """N nodes on localhost; the first `faulty` nodes publish garbage"""
+    ports = free_ports(count)
+    if not processes:
+        stats = await asyncio.gather(*(
+            run_node(index, count, ports, topology, window, statistic, duration, rate, index < faulty)
+            for index in range(count)
+        ))
+        return summarize(list(stats), faulty)
+
+    children = [
+        await asyncio.create_subprocess_exec(
+            sys.executable, __file__, 'node', '--index', str(index), '--ports', ','.join(map(str, ports)),
+            '--topology', topology, '--window', str(window), '--statistic', statistic,
+            '--duration', str(duration), '--rate', str(rate), *(['--faulty'] if index < faulty else []),
+            stdout=asyncio.subprocess.PIPE
+        )
+        for index in range(count)
+    ]
+    outputs = await asyncio.gather(*(child.communicate() for child in children))
+    return summarize([json.loads(stdout.decode().strip().splitlines()[-1]) for stdout, _ in outputs], faulty)
+
+def main():
+    parser = argparse.ArgumentParser(description="Proof-of-Resonance gossip nodes and local simulation")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sim = commands.add_parser('simulate', help="Run N nodes on localhost and report aggregation latency")
+    sim.add_argument('--nodes', default='3,5,10', help="comma-separated node counts to compare")
+    sim.add_argument('--faulty', type=int, default=0)
+    sim.add_argument('--processes', action='store_true', help="one subprocess per node instead of one event loop")
+    sim.add_argument('--output', help="write results as JSON to this path")
+
+    node = commands.add_parser('node', help="Run one simulated node (used by simulate --processes)")
+    node.add_argument('--index', type=int, required=True)
+    node.add_argument('--ports', required=True)
+    node.add_argument('--faulty', action='store_true')
+
+    for sub in (sim, node):
+        sub.add_argument('--duration', type=float, default=5.0)
+        sub.add_argument('--rate', type=float, default=10.0, help="results per second per node")
+        sub.add_argument('--topology', default='mesh', choices=['mesh', 'ring'])
+        sub.add_argument('--window', type=float, default=1.0)
+        sub.add_argument('--statistic', default='median', choices=AGGREGATE_STATISTICS)
+    args = parser.parse_args()
+
+    if args.command == 'node':
+        ports = [int(port) for port in args.ports.split(',')]
+        stats = asyncio.run(run_node(args.index, len(ports), ports, args.topology, args.window,
+                                     args.statistic, args.duration, args.rate, args.faulty))
+        print(json.dumps(stats))
+        return
+
+    configure_logging(logging.WARNING)
+    results = []
+    for count in [int(value) for value in args.nodes.split(',')]:
+        summary = asyncio.run(simulate(count, args.duration, args.rate, args.faulty, args.topology,
+                                       args.window, args.statistic, args.processes))
+        results.append(summary)
+        print(f"{count:>4} nodes: delivery p50 {summary['delivery_p50_ms']:7.2f} ms  "
+              f"p99 {summary['delivery_p99_ms']:7.2f} ms  participating {summary['participating_nodes']:>3}  "
+              f"HRI spread {summary['aggregate_spread_hri']:.3f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -8,22 +8,125 @@ Patent Pending: US2025/STYRD
 """
 
 import asyncio
+import hashlib
 import json
 import time
 import math
+import random
+import struct
 import numpy as np
 import websockets
 import requests
 from datetime import datetime, timezone
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
 from dataclasses import dataclass, asdict
 from collections import deque
 import logging
+import logging.handlers
+import queue
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Perfect harmonic ratios used by the price harmonic (must stay sorted)
+PERFECT_RATIOS = np.array([1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0])
+
+# Window size above which the price harmonic switches to row-by-row evaluation
+PRICE_HARMONIC_BLOCK_THRESHOLD = 256
+
+# Relative tolerance between the NumPy and pure-Python price harmonic
+PRICE_HARMONIC_TOLERANCE = 1e-9
+
+# Unit roundoff of the float64 running sums
+FLOAT_EPSILON = float(np.finfo(np.float64).eps)
+
+# Rounding bound, relative to m2, above which running moments ask for a resync.
+# Keeps incremental HRI/SSS within ~1e-9 (absolute, on the 0-100 scale) of a
+# batch recompute even when a huge sample leaves a window of small ones.
+MOMENT_DRIFT_TOLERANCE = 1e-10
+
+# Drift-triggered moment rebuilds allowed per window_size updates; each costs
+# O(window_size), so their amortized cost stays a few moment updates per tick
+DRIFT_REBUILDS_PER_WINDOW = 8
+
+# Column order of the consensus metrics kept by ConsensusHistory
+CONSENSUS_METRICS = ('hri', 'sss', 'harmonic_quality')
+
+# Consensus rollup resolutions as (label, seconds, buckets kept)
+CONSENSUS_ROLLUPS = (('1s', 1.0, 3600), ('1m', 60.0, 1440), ('1h', 3600.0, 720))
+
+# Cheap pre-parse filter for Coinbase frames that could be tickers
+TICKER_MARKER = '"ticker"'
+TICKER_MARKER_BYTES = b'"ticker"'
+BINANCE_MARKER = '"24hrTicker"'
+BINANCE_MARKER_BYTES = b'"24hrTicker"'
+
+# Canonical binary form of a ConsensusResult for hashing and signing: tag, version,
+# then HRI, SSS, quality, timestamp and base frequency as float64 and the node count as uint32
+CONSENSUS_ENCODING = struct.Struct('<4sBdddddI')
+CONSENSUS_ENCODING_TAG = b'ORPR'
+CONSENSUS_ENCODING_VERSION = 1
+
+# Fastest available generic JSON parser for exchange frames
+_fast_loads = orjson.loads if orjson is not None else json.loads
+
+def fast_dumps(data: Any) -> bytes:
+    """Compact JSON bytes, via orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(',', ':')).encode('utf-8')
+
+# (handler, listener) installed by configure_logging; set once per process
+_log_setup: Optional[Tuple[logging.Handler, Optional[logging.handlers.QueueListener]]] = None
+
+def configure_logging(level: int = logging.INFO, non_blocking: bool = False,
+                      fmt: str = logging.BASIC_FORMAT) -> Optional[logging.handlers.QueueListener]:
+    """
+    Send log records to stderr; for entry points only, importing never configures logging
+    
+    With non_blocking, callers only enqueue records and a listener thread does
+    the formatting and stderr writes, so a slow terminal cannot stall the
+    event loop. Returns that listener; stop() it on exit to flush the queue.
+    Only the first call installs a handler; later calls just set the level and
+    return the listener already running (if any), so records are never doubled.
+    """
+    global _log_setup
+    root = logging.getLogger()
+    root.setLevel(level)
+    if _log_setup is not None:
+        return _log_setup[1]
+    
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(fmt))
+    if not non_blocking:
+        root.addHandler(handler)
+        _log_setup = (handler, None)
+        return None
+    
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    root.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(records, handler, respect_handler_level=True)
+    listener.start()
+    _log_setup = (queue_handler, listener)
+    return listener
+
+def nearest_ratio_distance(ratios: np.ndarray) -> np.ndarray:
+    """Distance from each ratio to its nearest entry in PERFECT_RATIOS"""
+    idx = np.searchsorted(PERFECT_RATIOS, ratios)
+    upper = PERFECT_RATIOS[np.minimum(idx, len(PERFECT_RATIOS) - 1)]
+    lower = PERFECT_RATIOS[np.maximum(idx - 1, 0)]
+    return np.minimum(np.abs(ratios - upper), np.abs(ratios - lower))
+
 @dataclass
 class MarketDataPoint:
     """Structured market data with harmonic properties"""
@@ -64,6 +167,30 @@ class ConsensusResult:
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
 
+def encode_consensus_result(result: ConsensusResult, base_frequency: float = 432.0) -> bytes:
+    """Canonical bytes of a result (signatures excluded), identical on every platform and process"""
+    return CONSENSUS_ENCODING.pack(
+        CONSENSUS_ENCODING_TAG, CONSENSUS_ENCODING_VERSION,
+        result.hri_value, result.sss_value, result.harmonic_quality,
+        result.consensus_timestamp, base_frequency, result.participating_nodes
+    )
+
+def decode_consensus_result(payload: bytes) -> Tuple[ConsensusResult, float]:
+    """Inverse of encode_consensus_result: the result (without signatures) and its base frequency"""
+    tag, version, hri, sss, quality, timestamp, base_frequency, nodes = CONSENSUS_ENCODING.unpack(payload)
+    if tag != CONSENSUS_ENCODING_TAG or version != CONSENSUS_ENCODING_VERSION:
+        raise ValueError(f"Not a version {CONSENSUS_ENCODING_VERSION} consensus encoding")
+    return ConsensusResult(hri, sss, quality, timestamp, nodes, []), base_frequency
+
+if msgspec is not None:
+    class CoinbaseTicker(msgspec.Struct):
+        """Typed schema for the Coinbase ticker fields the engine consumes"""
+        type: str
+        product_id: str = ''
+        price: float = 0.0
+        volume_24h: float = 0.0
+        sequence: Optional[int] = None
+
 class HarmonicResonanceCalculator:
     """Advanced HRI calculation with multiple market factors"""
     
@@ -110,23 +237,57 @@ class HarmonicResonanceCalculator:
         return max(0.0, min(100.0, final_hri))
     
     def _calculate_price_harmonic(self, market_data: List[MarketDataPoint]) -> float:
-        """Calculate harmonic component from price relationships"""
+        """
+        Calculate harmonic component from price relationships
+
+        Scores every ordered pair (i < j) by how close price_i / price_j lies
+        to a perfect ratio. Small windows build the upper-triangle ratio
+        vector in one shot and broadcast it against PERFECT_RATIOS; windows
+        above PRICE_HARMONIC_BLOCK_THRESHOLD are walked one row at a time
+        with a searchsorted lookup so memory stays O(n).
+
+        Matches _calculate_price_harmonic_python to within
+        PRICE_HARMONIC_TOLERANCE (relative); only summation order differs.
+        """
+        n = len(market_data)
+        if n < 2:
+            return 50.0  # Neutral value
+
+        prices = np.fromiter((data.price for data in market_data), dtype=np.float64, count=n)
+        if not prices[1:].all():
+            # Keep the pure-Python behaviour of rejecting zero divisors
+            raise ZeroDivisionError("float division by zero")
+
+        if n <= PRICE_HARMONIC_BLOCK_THRESHOLD:
+            rows, cols = np.triu_indices(n, 1)
+            price_ratios = prices[rows] / prices[cols]
+            min_distance = np.abs(price_ratios[:, None] - PERFECT_RATIOS).min(axis=1)
+            return float(np.mean(1.0 / (1.0 + min_distance))) * 100
+
+        total_harmonic = 0.0
+        for i in range(n - 1):
+            price_ratios = prices[i] / prices[i + 1:]
+            min_distance = nearest_ratio_distance(price_ratios)
+            total_harmonic += float(np.sum(1.0 / (1.0 + min_distance)))
+
+        pair_count = n * (n - 1) // 2
+        return total_harmonic / pair_count * 100
+
+    def _calculate_price_harmonic_python(self, market_data: List[MarketDataPoint]) -> float:
+        """Reference pure-Python price harmonic, kept for verifying the NumPy path"""
         if len(market_data) < 2:
             return 50.0  # Neutral value
             
         # Calculate price ratios and harmonic relationships
         total_harmonic = 0.0
         pair_count = 0
+        perfect_ratios = PERFECT_RATIOS.tolist()
         
         for i in range(len(market_data)):
             for j in range(i + 1, len(market_data)):
                 price_ratio = market_data[i].price / market_data[j].price
                 
-                # Convert ratio to harmonic frequency
-                harmonic_freq = self.base_frequency * (price_ratio % 10)
-                
                 # Calculate harmonic quality (closer to perfect ratios = higher quality)
-                perfect_ratios = [1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0]
                 min_distance = min(abs(price_ratio - ratio) for ratio in perfect_ratios)
                 harmonic_quality = 1.0 / (1.0 + min_distance)
                 
@@ -362,44 +523,1204 @@ class SonicStabilityCalculator:
         
         return amplitude_stability
 
+class RunningMoments:
+    """
+    Running mean/variance over shifted sums, supporting removal of old samples
+    
+    Samples are summed as offsets from `shift` (the first sample since a
+    reset), so a stream with a large mean and a small spread keeps full
+    precision: each offset and square costs one rounding of its own size.
+    Removing an outsized sample, or samples wandering far from the shift,
+    leaves rounding that is large next to the remaining spread; `error`
+    bounds it, and callers rebuild with from_values() (which re-centres the
+    shift on the mean) once `drifted` turns true.
+    """
+    
+    __slots__ = ('count', 'shift', 'total', 'total_sq', 'total_error', 'sq_error')
+    
+    def __init__(self):
+        self.reset()
+        
+    def reset(self):
+        self.count = 0
+        self.shift = 0.0
+        self.total = 0.0
+        self.total_sq = 0.0
+        # Accumulated rounding bounds on total and total_sq since the last reset
+        self.total_error = 0.0
+        self.sq_error = 0.0
+        
+    def add(self, value: float):
+        if self.count == 0:
+            self.shift = value
+        self.count += 1
+        self._accumulate(value - self.shift, 1.0)
+        
+    def remove(self, value: float):
+        if self.count <= 1:
+            self.reset()
+            return
+        self.count -= 1
+        self._accumulate(value - self.shift, -1.0)
+    
+    def _accumulate(self, offset: float, sign: float):
+        square = offset * offset
+        self.total += sign * offset
+        self.total_sq += sign * square
+        # One rounding each for the offset, its square and both sums
+        self.total_error += FLOAT_EPSILON * (abs(self.total) + abs(offset))
+        self.sq_error += FLOAT_EPSILON * (abs(self.total_sq) + 3 * square)
+    
+    @classmethod
+    def from_values(cls, values: np.ndarray) -> 'RunningMoments':
+        """Moments of a batch of samples, shifted to their mean"""
+        moments = cls()
+        count = len(values)
+        if count == 0:
+            return moments
+        values = np.asarray(values, dtype=np.float64)
+        offsets = values - float(values.mean())
+        moments.count = count
+        moments.shift = float(values.mean())
+        moments.total = float(offsets.sum())
+        moments.total_sq = float(np.dot(offsets, offsets))
+        moments.total_error = FLOAT_EPSILON * count * float(np.abs(offsets).sum())
+        moments.sq_error = FLOAT_EPSILON * (count + 3) * moments.total_sq
+        return moments
+    
+    @property
+    def mean(self) -> float:
+        return self.shift + self.total / self.count if self.count else 0.0
+    
+    @property
+    def error(self) -> float:
+        """Rounding bound on m2"""
+        if self.count == 0:
+            return 0.0
+        correction = self.total * self.total / self.count
+        return (self.sq_error + 2 * abs(self.total) / self.count * self.total_error +
+                FLOAT_EPSILON * (abs(self.total_sq) + correction))
+    
+    @property
+    def m2(self) -> float:
+        if self.count < 2:
+            return 0.0
+        m2 = self.total_sq - self.total * self.total / self.count
+        # Whatever is left below the rounding bound is residue, not variance
+        return m2 if m2 > self.error else 0.0
+    
+    @property
+    def drifted(self) -> bool:
+        """True once the rounding bound on m2 or the mean exceeds MOMENT_DRIFT_TOLERANCE of the spread"""
+        if self.count == 0:
+            return False
+        m2 = self.total_sq - self.total * self.total / self.count
+        spread = math.sqrt(max(m2, 0.0) / self.count)
+        return (self.error > MOMENT_DRIFT_TOLERANCE * m2 or
+                self.total_error / self.count > MOMENT_DRIFT_TOLERANCE * (abs(self.mean) + spread))
+        
+    @property
+    def std(self) -> float:
+        """Population standard deviation (matches np.std)"""
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(self.m2 / self.count)
+    
+    def copy(self) -> 'RunningMoments':
+        moments = RunningMoments()
+        moments.count, moments.shift = self.count, self.shift
+        moments.total, moments.total_sq = self.total, self.total_sq
+        moments.total_error, moments.sq_error = self.total_error, self.sq_error
+        return moments
+    
+    @staticmethod
+    def merged(parts: List['RunningMoments']) -> 'RunningMoments':
+        """Combine moments of disjoint sample sets (Chan et al. parallel update)"""
+        moments = RunningMoments()
+        mean = m2 = error = mean_error = 0.0
+        for part in parts:
+            if part.count == 0:
+                continue
+            count = moments.count + part.count
+            delta = part.mean - mean
+            mean += delta * part.count / count
+            m2 += part.m2 + delta * delta * moments.count * part.count / count
+            moments.count = count
+            error += part.error
+            mean_error = max(mean_error, part.total_error / part.count)
+        if moments.count:
+            # Shifted to the merged mean, so the offsets sum to zero
+            moments.shift = mean
+            moments.total_sq = m2
+            moments.total_error = mean_error * moments.count
+            moments.sq_error = error + FLOAT_EPSILON * len(parts) * m2
+        return moments
+
+class HRIStats(NamedTuple):
+    """Mergeable sufficient statistics behind an HRI value"""
+    count: int
+    price_pair_count: int
+    price_pair_sum: float
+    correlation_pair_sum: float
+    volatility_count: int
+    volatility_sum: float
+    volume: RunningMoments
+    momentum: RunningMoments
+
+def hri_from_stats(stats: HRIStats, weights: Dict[str, float]) -> float:
+    """Evaluate the HRI formula over (possibly merged) sufficient statistics"""
+    if stats.count == 0:
+        return 0.0
+    pair_count = stats.price_pair_count
+    
+    price_harmonic = stats.price_pair_sum / pair_count * 100 if pair_count else 50.0
+    volume_harmonic = 1.0 / (1.0 + (stats.volume.std / (stats.volume.mean + 1))) * 100
+    
+    if stats.volatility_count:
+        avg_volatility = stats.volatility_sum / stats.volatility_count
+        volatility_harmonic = 1.0 / (1.0 + abs(avg_volatility - 0.02) * 50) * 100
+    else:
+        volatility_harmonic = 50.0
+        
+    if stats.momentum.count:
+        momentum_harmonic = 1.0 / (1.0 + stats.momentum.std * 1000) * 100
+    else:
+        momentum_harmonic = 50.0
+    
+    weighted_hri = (
+        price_harmonic * weights['price'] +
+        volume_harmonic * weights['volume'] +
+        volatility_harmonic * weights['volatility'] +
+        momentum_harmonic * weights['momentum']
+    )
+    
+    resonance_factor = 0.5 + (stats.correlation_pair_sum / pair_count) * 1.5 if pair_count else 1.0
+    
+    return max(0.0, min(100.0, weighted_hri * resonance_factor))
+
+def merge_hri_stats(parts: List[HRIStats]) -> HRIStats:
+    """Merge HRI statistics of disjoint windows; pairs never span windows"""
+    return HRIStats(
+        count=sum(part.count for part in parts),
+        price_pair_count=sum(part.price_pair_count for part in parts),
+        price_pair_sum=sum(part.price_pair_sum for part in parts),
+        correlation_pair_sum=sum(part.correlation_pair_sum for part in parts),
+        volatility_count=sum(part.volatility_count for part in parts),
+        volatility_sum=sum(part.volatility_sum for part in parts),
+        volume=RunningMoments.merged([part.volume for part in parts]),
+        momentum=RunningMoments.merged([part.momentum for part in parts])
+    )
+
+class SSSStats(NamedTuple):
+    """Mergeable sufficient statistics behind an SSS value"""
+    count: int
+    amplitude_sum: float
+    weighted_freq_sum: float
+    weighted_freq_sq_sum: float
+    nonzero_amplitudes: int
+    intervals: RunningMoments
+    volume: RunningMoments
+
+def sss_from_stats(stats: SSSStats) -> float:
+    """Evaluate the SSS formula over (possibly merged) sufficient statistics"""
+    if stats.count == 0:
+        return 0.0
+        
+    if stats.count < 2 or stats.nonzero_amplitudes == 0:
+        spectral_stability = 1.0
+    else:
+        weighted_mean = stats.weighted_freq_sum / stats.amplitude_sum
+        spectral_variance = max(0.0, stats.weighted_freq_sq_sum / stats.amplitude_sum - weighted_mean ** 2)
+        spectral_stability = 1.0 / (1.0 + spectral_variance / 1000)
+    
+    if stats.intervals.count < 2:
+        temporal_stability = 1.0
+    else:
+        temporal_stability = 1.0 / (1.0 + (stats.intervals.std / (stats.intervals.mean + 1)))
+        
+    if stats.volume.count < 2:
+        amplitude_stability = 1.0
+    else:
+        amplitude_stability = 1.0 / (1.0 + (stats.volume.std / (stats.volume.mean + 1)))
+    
+    combined_stability = (
+        spectral_stability * 0.5 +
+        temporal_stability * 0.3 +
+        amplitude_stability * 0.2
+    )
+    
+    return max(0.0, min(100.0, (1.0 - combined_stability) * 100))
+
+def merge_sss_stats(parts: List[SSSStats]) -> SSSStats:
+    """Merge SSS statistics of disjoint windows"""
+    return SSSStats(
+        count=sum(part.count for part in parts),
+        amplitude_sum=sum(part.amplitude_sum for part in parts),
+        weighted_freq_sum=sum(part.weighted_freq_sum for part in parts),
+        weighted_freq_sq_sum=sum(part.weighted_freq_sq_sum for part in parts),
+        nonzero_amplitudes=sum(part.nonzero_amplitudes for part in parts),
+        intervals=RunningMoments.merged([part.intervals for part in parts]),
+        volume=RunningMoments.merged([part.volume for part in parts])
+    )
+
+class IncrementalHRICalculator:
+    """
+    Streaming HRI over a sliding tick window with constant-time moment updates
+    
+    Mirrors HarmonicResonanceCalculator.calculate_hri over the last
+    window_size points. Volume, volatility and momentum terms are kept as
+    running sums / Welford moments; the pairwise price-ratio and correlation
+    aggregates are adjusted by one vectorized row on append and on eviction
+    instead of being rebuilt over every pair.
+    
+    Values track calculate_hri to ~1e-9 absolute. The window is rebuilt every
+    resync_interval updates. In between, the volume and momentum moments alone
+    are rebuilt when their rounding exceeds MOMENT_DRIFT_TOLERANCE (e.g. after
+    evicting an outsized sample), at most DRIFT_REBUILDS_PER_WINDOW times per
+    window_size updates.
+    """
+    
+    def __init__(self, calculator: HarmonicResonanceCalculator, window_size: int = 50,
+                 resync_interval: int = 1000):
+        self.calculator = calculator
+        self.window_size = window_size
+        self.resync_interval = resync_interval
+        self.points = deque()
+        
+        # Slot arrays for the pairwise aggregates; slots fill in order, then get reused
+        self._slots = deque()
+        self._prices = np.zeros(window_size)
+        self._changes = np.zeros(window_size)
+        
+        self._price_pair_sum = 0.0
+        self._correlation_pair_sum = 0.0
+        self._volatility_sum = 0.0
+        self._volume = RunningMoments()
+        self._momentum = RunningMoments()
+        self._updates = 0
+        self._rebuild_spacing = max(1, window_size // DRIFT_REBUILDS_PER_WINDOW)
+        self._rebuilt_at = 0
+        self.moment_rebuilds = 0
+        
+    def __len__(self) -> int:
+        return len(self.points)
+    
+    def update(self, market_data: MarketDataPoint) -> float:
+        """Slide the window forward by one point and return the new HRI"""
+        if market_data.price == 0:
+            raise ZeroDivisionError("float division by zero")
+            
+        slot = len(self.points)
+        if slot == self.window_size:
+            slot = self._evict()
+        self._append(market_data, slot)
+        
+        self._updates += 1
+        if self._updates % self.resync_interval == 0:
+            self.resync()
+        elif (self._updates - self._rebuilt_at >= self._rebuild_spacing and
+              (self._volume.drifted or self._momentum.drifted)):
+            self.resync_moments()
+            
+        return self.value()
+    
+    def _evict(self) -> int:
+        oldest = self.points.popleft()
+        slot = self._slots.popleft()
+        active = len(self.points) + 1
+        
+        # Pairs (oldest, j): oldest is always the numerator; drop the self term
+        ratios = oldest.price / self._prices[:active]
+        self._price_pair_sum -= float(np.sum(1.0 / (1.0 + nearest_ratio_distance(ratios)))) - 1.0
+        self._correlation_pair_sum -= self._correlation_row(oldest.change_24h, active) - 1.0
+        
+        self._volume.remove(oldest.volume)
+        if self.points:
+            following = self.points[0]
+            self._volatility_sum -= abs(following.price - oldest.price) / oldest.price
+        if len(self.points) >= 2:
+            self._momentum.remove(self._acceleration(oldest, self.points[0], self.points[1]))
+            
+        return slot
+    
+    def _append(self, market_data: MarketDataPoint, slot: int):
+        self._prices[slot] = market_data.price
+        self._changes[slot] = market_data.change_24h
+        
+        if self.points:
+            # Pairs (i, new): the new point is always the denominator; drop the self term
+            active = len(self.points) + 1
+            ratios = self._prices[:active] / market_data.price
+            self._price_pair_sum += float(np.sum(1.0 / (1.0 + nearest_ratio_distance(ratios)))) - 1.0
+            self._correlation_pair_sum += self._correlation_row(market_data.change_24h, active) - 1.0
+            
+            last = self.points[-1]
+            self._volatility_sum += abs(market_data.price - last.price) / last.price
+            if len(self.points) >= 2:
+                self._momentum.add(self._acceleration(self.points[-2], last, market_data))
+                
+        self._volume.add(market_data.volume)
+        self.points.append(market_data)
+        self._slots.append(slot)
+    
+    def _correlation_row(self, change_24h: float, active: int) -> float:
+        correlations = 1.0 - np.abs(self._changes[:active] - change_24h) / 100
+        return float(np.sum(np.maximum(correlations, 0.0)))
+    
+    @staticmethod
+    def _acceleration(first: MarketDataPoint, second: MarketDataPoint, third: MarketDataPoint) -> float:
+        v1 = (second.price - first.price) / first.price
+        v2 = (third.price - second.price) / second.price
+        return v2 - v1
+    
+    def resync(self):
+        """Rebuild every running aggregate from the window to shed float drift"""
+        points = list(self.points)
+        self.points.clear()
+        self._slots.clear()
+        self._price_pair_sum = 0.0
+        self._correlation_pair_sum = 0.0
+        self._volatility_sum = 0.0
+        self._volume.reset()
+        self._momentum.reset()
+        for slot, point in enumerate(points):
+            self._append(point, slot)
+    
+    def resync_moments(self):
+        """Rebuild only the volume and momentum moments; O(window), unlike the pair sums"""
+        prices = np.array([point.price for point in self.points])
+        self._volume = RunningMoments.from_values(np.array([point.volume for point in self.points]))
+        velocity = np.diff(prices) / prices[:-1] if len(prices) >= 2 else prices[:0]
+        self._momentum = RunningMoments.from_values(np.diff(velocity) if len(velocity) >= 2 else velocity[:0])
+        self._rebuilt_at = self._updates
+        self.moment_rebuilds += 1
+    
+    def stats(self) -> HRIStats:
+        """Snapshot of the running aggregates, safe to merge or send elsewhere"""
+        n = len(self.points)
+        return HRIStats(
+            count=n,
+            price_pair_count=n * (n - 1) // 2,
+            price_pair_sum=self._price_pair_sum,
+            correlation_pair_sum=self._correlation_pair_sum,
+            volatility_count=max(0, n - 1),
+            volatility_sum=self._volatility_sum,
+            volume=self._volume.copy(),
+            momentum=self._momentum.copy()
+        )
+    
+    def value(self) -> float:
+        """Current HRI for the window, computed from the running aggregates"""
+        return hri_from_stats(self.stats(), self.calculator.harmonic_weights)
+
+class IncrementalSSSCalculator:
+    """
+    Streaming SSS over a sliding tick window with O(1) updates
+    
+    Mirrors SonicStabilityCalculator.calculate_sss over the last window_size
+    points using amplitude-weighted frequency sums and Welford moments for
+    timestamp intervals and volume. Drift is bounded the same way as in
+    IncrementalHRICalculator.
+    """
+    
+    def __init__(self, calculator: SonicStabilityCalculator, window_size: int = 50,
+                 resync_interval: int = 1000):
+        self.calculator = calculator
+        self.window_size = window_size
+        self.resync_interval = resync_interval
+        self.points = deque()
+        
+        # Frequencies are held relative to the base frequency to limit cancellation
+        self._amplitude_sum = 0.0
+        self._weighted_freq_sum = 0.0
+        self._weighted_freq_sq_sum = 0.0
+        self._nonzero_amplitudes = 0
+        self._intervals = RunningMoments()
+        self._volume = RunningMoments()
+        self._updates = 0
+        self._rebuild_spacing = max(1, window_size // DRIFT_REBUILDS_PER_WINDOW)
+        self._rebuilt_at = 0
+        self.moment_rebuilds = 0
+        
+    def __len__(self) -> int:
+        return len(self.points)
+    
+    def _component(self, market_data: MarketDataPoint) -> Tuple[float, float]:
+        offset = self.calculator.base_frequency * (market_data.change_24h / 100)
+        amplitude = math.log10(market_data.volume + 1) / 10
+        return offset, amplitude
+    
+    def update(self, market_data: MarketDataPoint) -> float:
+        """Slide the window forward by one point and return the new SSS"""
+        if len(self.points) == self.window_size:
+            self._evict()
+        self._append(market_data)
+        
+        self._updates += 1
+        if self._updates % self.resync_interval == 0:
+            self.resync()
+        elif (self._updates - self._rebuilt_at >= self._rebuild_spacing and
+              (self._volume.drifted or self._intervals.drifted)):
+            self.resync_moments()
+            
+        return self.value()
+    
+    def _evict(self):
+        oldest = self.points.popleft()
+        offset, amplitude = self._component(oldest)
+        self._amplitude_sum -= amplitude
+        self._weighted_freq_sum -= offset * amplitude
+        self._weighted_freq_sq_sum -= offset * offset * amplitude
+        if amplitude != 0:
+            self._nonzero_amplitudes -= 1
+        self._volume.remove(oldest.volume)
+        if self.points:
+            self._intervals.remove(self.points[0].timestamp - oldest.timestamp)
+    
+    def _append(self, market_data: MarketDataPoint):
+        offset, amplitude = self._component(market_data)
+        self._amplitude_sum += amplitude
+        self._weighted_freq_sum += offset * amplitude
+        self._weighted_freq_sq_sum += offset * offset * amplitude
+        if amplitude != 0:
+            self._nonzero_amplitudes += 1
+        self._volume.add(market_data.volume)
+        if self.points:
+            self._intervals.add(market_data.timestamp - self.points[-1].timestamp)
+        self.points.append(market_data)
+    
+    def resync(self):
+        """Rebuild every running aggregate from the window to shed float drift"""
+        points = list(self.points)
+        self.points.clear()
+        self._amplitude_sum = 0.0
+        self._weighted_freq_sum = 0.0
+        self._weighted_freq_sq_sum = 0.0
+        self._nonzero_amplitudes = 0
+        self._intervals.reset()
+        self._volume.reset()
+        for point in points:
+            self._append(point)
+    
+    def resync_moments(self):
+        """Rebuild only the volume and interval moments from the window"""
+        self._volume = RunningMoments.from_values(np.array([point.volume for point in self.points]))
+        self._intervals = RunningMoments.from_values(np.diff([point.timestamp for point in self.points]))
+        self._rebuilt_at = self._updates
+        self.moment_rebuilds += 1
+    
+    def stats(self) -> SSSStats:
+        """Snapshot of the running aggregates, safe to merge or send elsewhere"""
+        return SSSStats(
+            count=len(self.points),
+            amplitude_sum=self._amplitude_sum,
+            weighted_freq_sum=self._weighted_freq_sum,
+            weighted_freq_sq_sum=self._weighted_freq_sq_sum,
+            nonzero_amplitudes=self._nonzero_amplitudes,
+            intervals=self._intervals.copy(),
+            volume=self._volume.copy()
+        )
+    
+    def value(self) -> float:
+        """Current SSS for the window, computed from the running aggregates"""
+        return sss_from_stats(self.stats())
+
+class TickColumns(NamedTuple):
+    """Column views over a run of buffered ticks"""
+    price: np.ndarray
+    volume: np.ndarray
+    change_24h: np.ndarray
+    timestamp: np.ndarray
+    symbol_code: np.ndarray
+    source_code: np.ndarray
+
+class ColumnarRingBuffer:
+    """
+    Preallocated struct-of-arrays tick buffer
+    
+    Every row is written twice, at slot and slot + capacity, so the last N
+    rows always form one contiguous slice and can be handed out as zero-copy
+    NumPy views. Views alias the ring: they stay valid for the next
+    capacity - N appends, so copy them if they must live longer.
+    Symbols and sources are interned to small integer codes.
+    """
+    
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.price = np.zeros(2 * capacity, dtype=np.float64)
+        self.volume = np.zeros(2 * capacity, dtype=np.float64)
+        self.change_24h = np.zeros(2 * capacity, dtype=np.float64)
+        self.timestamp = np.zeros(2 * capacity, dtype=np.float64)
+        self.symbol_code = np.zeros(2 * capacity, dtype=np.int32)
+        self.source_code = np.zeros(2 * capacity, dtype=np.int32)
+        
+        self.symbol_names: List[str] = []
+        self.source_names: List[str] = []
+        self._symbol_codes: Dict[str, int] = {}
+        self._source_codes: Dict[str, int] = {}
+        
+        self._head = 0
+        self._count = 0
+        
+    def __len__(self) -> int:
+        return self._count
+    
+    def intern_symbol(self, symbol: str) -> int:
+        code = self._symbol_codes.get(symbol)
+        if code is None:
+            code = self._symbol_codes[symbol] = len(self.symbol_names)
+            self.symbol_names.append(symbol)
+        return code
+    
+    def intern_source(self, source: str) -> int:
+        code = self._source_codes.get(source)
+        if code is None:
+            code = self._source_codes[source] = len(self.source_names)
+            self.source_names.append(source)
+        return code
+    
+    def append(self, symbol: str, price: float, volume: float, change_24h: float,
+               timestamp: float, source: str):
+        """Write one tick into the ring, overwriting the oldest row when full"""
+        symbol_code = self.intern_symbol(symbol)
+        source_code = self.intern_source(source)
+        
+        for slot in (self._head, self._head + self.capacity):
+            self.price[slot] = price
+            self.volume[slot] = volume
+            self.change_24h[slot] = change_24h
+            self.timestamp[slot] = timestamp
+            self.symbol_code[slot] = symbol_code
+            self.source_code[slot] = source_code
+        
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+    
+    def append_point(self, market_data: MarketDataPoint):
+        self.append(market_data.symbol, market_data.price, market_data.volume,
+                    market_data.change_24h, market_data.timestamp, market_data.source)
+    
+    def tail(self, limit: Optional[int] = None) -> TickColumns:
+        """Zero-copy views over the last `limit` rows, oldest first"""
+        n = self._count if limit is None else max(0, min(limit, self._count))
+        end = self._head + self.capacity
+        window = slice(end - n, end)
+        return TickColumns(
+            self.price[window], self.volume[window], self.change_24h[window],
+            self.timestamp[window], self.symbol_code[window], self.source_code[window]
+        )
+    
+    def to_points(self, columns: TickColumns) -> List[MarketDataPoint]:
+        """Materialize column views back into MarketDataPoint rows"""
+        symbols = self.symbol_names
+        sources = self.source_names
+        return [
+            MarketDataPoint(
+                symbol=symbols[symbol_code],
+                price=price,
+                volume=volume,
+                change_24h=change_24h,
+                timestamp=timestamp,
+                source=sources[source_code]
+            )
+            for price, volume, change_24h, timestamp, symbol_code, source_code in zip(
+                columns.price.tolist(), columns.volume.tolist(), columns.change_24h.tolist(),
+                columns.timestamp.tolist(), columns.symbol_code.tolist(), columns.source_code.tolist()
+            )
+        ]
+
+class OHLCVBar(NamedTuple):
+    """
+    One fixed-interval bar of a symbol's ticks
+    
+    Exposes price (the close) alongside timestamp (the bar start), volume and
+    change_24h, so the calculators accept bars wherever they take ticks.
+    volume and change_24h are the last values seen, as the feeds report
+    rolling 24h figures rather than per-trade sizes. Bars with ticks == 0
+    were carried forward from the previous close.
+    """
+    symbol: str
+    timestamp: float
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: float
+    change_24h: float
+    ticks: int
+    source: str
+    
+    @property
+    def price(self) -> float:
+        return self.close
+
+class BarResampler:
+    """
+    Incremental per-symbol OHLCV resampling on the feed's own clock
+    
+    A bar interval closes for every known symbol as soon as any tick lands
+    in a later interval, so quiet symbols get carry-forward bars and bars
+    come out ordered by time, then symbol. Ticks older than the open
+    interval are folded into it. Gaps longer than max_gap_bars are not
+    back-filled beyond their last max_gap_bars intervals.
+    """
+    
+    def __init__(self, interval: float = 1.0, history: int = 1000, max_gap_bars: int = 3600):
+        self.interval = interval
+        self.history = history
+        self.max_gap_bars = max_gap_bars
+        self._bucket: Optional[int] = None
+        # symbol -> [open, high, low, close, volume, change_24h, ticks, source]
+        self._open: Dict[str, list] = {}
+        self._last: Dict[str, OHLCVBar] = {}
+        self._bars: Dict[str, deque] = {}
+        self.late_ticks = 0
+        
+    def update(self, market_data: MarketDataPoint) -> List[OHLCVBar]:
+        """Add one tick; returns the bars its arrival closed"""
+        bucket = int(market_data.timestamp // self.interval)
+        closed: List[OHLCVBar] = []
+        if self._bucket is None:
+            self._bucket = bucket
+        elif bucket > self._bucket:
+            closed = self._close_until(bucket)
+        elif bucket < self._bucket:
+            self.late_ticks += 1
+        
+        price = market_data.price
+        state = self._open.get(market_data.symbol)
+        if state is None:
+            self._open[market_data.symbol] = [price, price, price, price, market_data.volume,
+                                              market_data.change_24h, 1, market_data.source]
+        else:
+            if price > state[1]:
+                state[1] = price
+            if price < state[2]:
+                state[2] = price
+            state[3] = price
+            state[4] = market_data.volume
+            state[5] = market_data.change_24h
+            state[6] += 1
+            state[7] = market_data.source
+        return closed
+    
+    def _close_until(self, bucket: int) -> List[OHLCVBar]:
+        """Close every interval before `bucket`, carrying quiet symbols forward"""
+        buckets = [self._bucket]
+        buckets += range(max(self._bucket + 1, bucket - self.max_gap_bars), bucket)
+        closed = []
+        for index in buckets:
+            start = index * self.interval
+            for symbol in sorted(self._open.keys() | self._last.keys()):
+                state = self._open.pop(symbol, None)
+                if state is not None:
+                    bar = OHLCVBar(symbol, start, *state)
+                else:
+                    last = self._last[symbol]
+                    bar = OHLCVBar(symbol, start, last.close, last.close, last.close, last.close,
+                                   last.volume, last.change_24h, 0, last.source)
+                self._last[symbol] = bar
+                bars = self._bars.get(symbol)
+                if bars is None:
+                    bars = self._bars[symbol] = deque(maxlen=self.history)
+                bars.append(bar)
+                closed.append(bar)
+        self._bucket = bucket
+        return closed
+    
+    def flush(self) -> List[OHLCVBar]:
+        """Close the open interval, e.g. at the end of a replay"""
+        if self._bucket is None or not self._open:
+            return []
+        return self._close_until(self._bucket + 1)
+    
+    def bars(self, symbol: str, limit: Optional[int] = None) -> List[OHLCVBar]:
+        """Closed bars of a symbol, oldest first"""
+        bars = list(self._bars.get(symbol, ()))
+        return bars if limit is None else bars[-limit:] if limit else []
+
+# Row layout shared by ColumnarRingBuffer.append and MarketDataPoint:
+# (symbol, price, volume, change_24h, timestamp, source)
+TickerRow = Tuple[str, float, float, float, float, str]
+
+class CoinbaseTickerDecoder:
+    """
+    Decodes Coinbase websocket frames into ticker rows using stdlib json
+    
+    Frames without a "ticker" marker (heartbeats, status) are rejected by a
+    substring check before any JSON parsing. Subclasses swap in faster
+    parsers; see make_ticker_decoder.
+    """
+    
+    name = 'json'
+    source = 'coinbase'
+    
+    # Per-product sequence number of the last decoded ticker, if the feed sent one
+    last_sequence: Optional[int] = None
+    
+    def decode(self, frame: Any, received_at: float) -> Optional[TickerRow]:
+        """Return a ticker row for ticker frames, None for anything else"""
+        if (TICKER_MARKER if isinstance(frame, str) else TICKER_MARKER_BYTES) not in frame:
+            return None
+        return self._row_from_dict(self._loads(frame), received_at)
+    
+    def _loads(self, frame: Any) -> Dict[str, Any]:
+        return json.loads(frame)
+    
+    def _row_from_dict(self, data: Dict[str, Any], received_at: float) -> Optional[TickerRow]:
+        if data.get('type') != 'ticker':
+            return None
+        self.last_sequence = data.get('sequence')
+        return (
+            data.get('product_id', '').replace('-USD', ''),
+            float(data.get('price', 0)),
+            float(data.get('volume_24h', 0)),
+            0.0,  # 24h change needs historical data
+            received_at,
+            self.source
+        )
+
+class OrjsonTickerDecoder(CoinbaseTickerDecoder):
+    """Coinbase ticker decoder backed by orjson"""
+    
+    name = 'orjson'
+    
+    def _loads(self, frame: Any) -> Dict[str, Any]:
+        return orjson.loads(frame)
+
+class MsgspecTickerDecoder(CoinbaseTickerDecoder):
+    """Coinbase ticker decoder that validates straight into a typed schema"""
+    
+    name = 'msgspec'
+    
+    def __init__(self):
+        # Lax mode lets msgspec convert Coinbase's decimal strings to floats
+        self._decoder = msgspec.json.Decoder(CoinbaseTicker, strict=False)
+        
+    def decode(self, frame: Any, received_at: float) -> Optional[TickerRow]:
+        if (TICKER_MARKER if isinstance(frame, str) else TICKER_MARKER_BYTES) not in frame:
+            return None
+        ticker = self._decoder.decode(frame)
+        if ticker.type != 'ticker':
+            return None
+        self.last_sequence = ticker.sequence
+        return (
+            ticker.product_id.replace('-USD', ''),
+            ticker.price,
+            ticker.volume_24h,
+            0.0,  # 24h change needs historical data
+            received_at,
+            self.source
+        )
+
+TICKER_DECODERS = {
+    'json': CoinbaseTickerDecoder,
+    'orjson': OrjsonTickerDecoder,
+    'msgspec': MsgspecTickerDecoder
+}
+
+def available_ticker_decoders() -> List[str]:
+    """Decoder names usable in this environment, fastest first"""
+    names = []
+    if msgspec is not None:
+        names.append('msgspec')
+    if orjson is not None:
+        names.append('orjson')
+    names.append('json')
+    return names
+
+def make_ticker_decoder(name: str = 'auto') -> CoinbaseTickerDecoder:
+    """Build a ticker decoder by name; 'auto' picks the fastest available"""
+    if name == 'auto':
+        name = available_ticker_decoders()[0]
+    if name not in available_ticker_decoders():
+        raise ValueError(f"Ticker decoder not available: {name}")
+    return TICKER_DECODERS[name]()
+
+class BinanceTickerDecoder:
+    """
+    Decodes Binance 24hrTicker events into ticker rows
+    
+    Accepts both raw events (/ws with SUBSCRIBE) and combined-stream frames
+    wrapped as {"stream": ..., "data": ...}.
+    """
+    
+    name = 'binance'
+    source = 'binance'
+    quote = 'USDT'
+    last_sequence: Optional[int] = None
+    
+    def decode(self, frame: Any, received_at: float) -> Optional[TickerRow]:
+        if (BINANCE_MARKER if isinstance(frame, str) else BINANCE_MARKER_BYTES) not in frame:
+            return None
+        data = _fast_loads(frame)
+        data = data.get('data', data)
+        if data.get('e') != '24hrTicker':
+            return None
+        symbol = data['s']
+        if symbol.endswith(self.quote):
+            symbol = symbol[:-len(self.quote)]
+        return (
+            symbol,
+            float(data['c']),
+            float(data['v']),
+            float(data['P']),
+            received_at,
+            self.source
+        )
+    
+    def subscribe_message(self, symbols: List[str]) -> Dict[str, Any]:
+        """One SUBSCRIBE covering every symbol's ticker stream"""
+        return {
+            "method": "SUBSCRIBE",
+            "params": [f"{symbol.lower()}{self.quote.lower()}@ticker" for symbol in symbols],
+            "id": 1
+        }
+
+class KrakenTickerDecoder:
+    """
+    Decodes Kraken v1 ticker channel messages into ticker rows
+    
+    Ticker updates arrive as [channel_id, payload, "ticker", "XBT/USD"];
+    event frames (heartbeat, status, subscription acks) are dicts and skipped.
+    """
+    
+    name = 'kraken'
+    source = 'kraken'
+    quote = 'USD'
+    last_sequence: Optional[int] = None
+    
+    # Kraken's legacy asset codes
+    ALIASES = {'BTC': 'XBT', 'DOGE': 'XDG'}
+    
+    def __init__(self):
+        self._symbols = {alias: symbol for symbol, alias in self.ALIASES.items()}
+        
+    def decode(self, frame: Any, received_at: float) -> Optional[TickerRow]:
+        if (TICKER_MARKER if isinstance(frame, str) else TICKER_MARKER_BYTES) not in frame:
+            return None
+        data = _fast_loads(frame)
+        if not isinstance(data, list) or len(data) < 4 or data[-2] != 'ticker':
+            return None
+        payload = data[1]
+        base = data[-1].split('/', 1)[0]
+        price = float(payload['c'][0])
+        open_24h = float(payload['o'][1])
+        return (
+            self._symbols.get(base, base),
+            price,
+            float(payload['v'][1]),
+            (price - open_24h) / open_24h * 100 if open_24h else 0.0,
+            received_at,
+            self.source
+        )
+    
+    def subscribe_message(self, symbols: List[str]) -> Dict[str, Any]:
+        """One subscribe event covering every pair's ticker"""
+        return {
+            "event": "subscribe",
+            "pair": [f"{self.ALIASES.get(symbol, symbol)}/{self.quote}" for symbol in symbols],
+            "subscription": {"name": "ticker"}
+        }
+
+class Subscription:
+    """
+    One subscriber on a SubscriberBus: a bounded queue drained by its own task
+    
+    Overflow policies when the queue is full:
+    - 'drop_oldest': discard the oldest queued item to make room
+    - 'drop_newest': discard the incoming item
+    - 'block':       make the publisher wait for room
+    With batch_size set, the callback receives lists of up to batch_size items.
+    """
+    
+    OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest', 'block')
+    
+    def __init__(self, callback: Callable[[Any], Awaitable[None]], name: str,
+                 queue_size: int = 1000, overflow: str = 'drop_oldest',
+                 batch_size: Optional[int] = None):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.callback = callback
+        self.name = name
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        
+        # Subscriber statistics
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+        self.max_lag = 0
+        
+        # Optional latency sink, e.g. metrics.MetricsRegistry
+        self.metrics = None
+        self._worker: Optional[asyncio.Task] = None
+        
+    @property
+    def lag(self) -> int:
+        """Items queued but not yet delivered"""
+        return self.queue.qsize()
+    
+    async def publish(self, item: Any):
+        if self._worker is None:
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+            
+        if self.overflow == 'block':
+            await self.queue.put(item)
+        elif not self.queue.full():
+            self.queue.put_nowait(item)
+        elif self.overflow == 'drop_oldest':
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.queue.put_nowait(item)
+            self.dropped += 1
+        else:
+            self.dropped += 1
+        
+        if self.queue.qsize() > self.max_lag:
+            self.max_lag = self.queue.qsize()
+    
+    async def _run(self):
+        while True:
+            item = await self.queue.get()
+            if self.batch_size:
+                batch = [item]
+                while len(batch) < self.batch_size and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                item = batch
+            count = len(item) if self.batch_size else 1
+            metrics = self.metrics
+            started = time.perf_counter_ns() if metrics is not None else 0
+            try:
+                await self.callback(item)
+                self.delivered += count
+            except Exception as e:
+                self.errors += 1
+                logger.error("Error in subscriber %s: %s", self.name, e)
+            finally:
+                if metrics is not None:
+                    metrics.observe('callback', time.perf_counter_ns() - started, self.name)
+                for _ in range(count):
+                    self.queue.task_done()
+    
+    async def drain(self):
+        """Wait until every queued item has been delivered"""
+        if self._worker is not None:
+            await self.queue.join()
+    
+    async def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'lag': self.lag,
+            'max_lag': self.max_lag,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'overflow': self.overflow,
+            'batch_size': self.batch_size
+        }
+
+class SubscriberBus:
+    """Fan-out of published items to independently queued subscribers"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.subscriptions: List[Subscription] = []
+        # Handed to every subscription, see Subscription.metrics
+        self.metrics = None
+        
+    def subscribe(self, callback: Callable[[Any], Awaitable[None]], **options) -> Subscription:
+        """Register an async callback; options are passed to Subscription"""
+        name = getattr(callback, '__qualname__', repr(callback))
+        subscription = Subscription(callback, f"{self.name}:{name}", **options)
+        subscription.metrics = self.metrics
+        self.subscriptions.append(subscription)
+        return subscription
+    
+    async def unsubscribe(self, subscription: Subscription):
+        """Stop a subscription's worker and remove it from the bus"""
+        await subscription.close()
+        if subscription in self.subscriptions:
+            self.subscriptions.remove(subscription)
+    
+    async def publish(self, item: Any):
+        """Queue an item for every subscriber without waiting for delivery"""
+        for subscription in self.subscriptions:
+            await subscription.publish(item)
+    
+    async def drain(self):
+        """Wait until every subscriber has been handed everything published so far"""
+        for subscription in self.subscriptions:
+            await subscription.drain()
+    
+    async def close(self):
+        for subscription in self.subscriptions:
+            await subscription.close()
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {subscription.name: subscription.stats() for subscription in self.subscriptions}
+
+class SourceHealth:
+    """Connection, heartbeat and sequence counters for one data source"""
+    
+    def __init__(self):
+        self.connected = False
+        self.connects = 0
+        self.reconnects = 0
+        self.heartbeat_timeouts = 0
+        self.gaps = 0
+        self.missed_messages = 0
+        self.stale_messages = 0
+        self.last_message_at = 0.0
+        self.last_error = ''
+        self._sequences: Dict[str, int] = {}
+        
+    def observe_sequence(self, key: str, sequence: int) -> bool:
+        """
+        Track a per-key sequence number; returns False for stale/duplicate messages
+        
+        Note that Coinbase numbers every message of a product, so a ticker-only
+        subscription sees jumps for non-ticker traffic too: gap counts are an
+        upper bound on lost ticker frames.
+        """
+        last = self._sequences.get(key)
+        if last is not None:
+            if sequence <= last:
+                self.stale_messages += 1
+                return False
+            if sequence > last + 1:
+                self.gaps += 1
+                self.missed_messages += sequence - last - 1
+        self._sequences[key] = sequence
+        return True
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'connected': self.connected,
+            'connects': self.connects,
+            'reconnects': self.reconnects,
+            'heartbeat_timeouts': self.heartbeat_timeouts,
+            'gaps': self.gaps,
+            'missed_messages': self.missed_messages,
+            'stale_messages': self.stale_messages,
+            'last_message_at': self.last_message_at,
+            'last_error': self.last_error
+        }
+
 class MarketDataIngestionEngine:
     """Real-time market data ingestion with multiple sources"""
     
-    def __init__(self):
+    def __init__(self, buffer_capacity: int = 1000, symbol_capacity: int = 1000,
+                 decoder: str = 'auto', reconnect_base_delay: float = 0.5,
+                 reconnect_max_delay: float = 30.0, heartbeat_timeout: float = 30.0,
+                 ping_interval: float = 20.0):
         self.data_sources = {
             'coinbase': 'wss://ws-feed.pro.coinbase.com',
             'binance': 'wss://stream.binance.com:9443/ws',
             'kraken': 'wss://ws.kraken.com'
         }
         self.active_connections = {}
-        self.data_buffer = deque(maxlen=1000)
-        self.callbacks = []
+        self.decoders = {
+            'coinbase': make_ticker_decoder(decoder),
+            'binance': BinanceTickerDecoder(),
+            'kraken': KrakenTickerDecoder()
+        }
+        self.data_buffer = ColumnarRingBuffer(capacity=buffer_capacity)
+        
+        # Per-symbol index: one bounded ring per symbol plus latest-tick maps
+        self.symbol_capacity = symbol_capacity
+        self.symbol_buffers: Dict[str, ColumnarRingBuffer] = {}
+        self.latest_ticks: Dict[Tuple[str, str], MarketDataPoint] = {}
+        self.latest_by_symbol: Dict[str, MarketDataPoint] = {}
+        self.callbacks = SubscriberBus('market_data')
+        
+        # Connection supervision
+        self.reconnect_base_delay = reconnect_base_delay
+        self.reconnect_max_delay = reconnect_max_delay
+        self.heartbeat_timeout = heartbeat_timeout
+        self.ping_interval = ping_interval
+        self.source_health = {source: SourceHealth() for source in self.data_sources}
+        self._ingestion_tasks: List[asyncio.Task] = []
+        
+        # Optional raw frame sink, e.g. session_log.SessionRecorder
+        self.recorder = None
+        # Optional persistent tick sink, e.g. tick_store.TickStore
+        self.tick_store = None
+        # Optional stage timings and counters, e.g. metrics.MetricsRegistry
+        self.metrics = None
+        # Bumped whenever the latest-tick maps change
+        self.tick_version = 0
         
     async def start_ingestion(self, symbols: List[str]):
         """Start real-time data ingestion for specified symbols"""
-        logger.info(f"Starting market data ingestion for symbols: {symbols}")
+        logger.info("Starting market data ingestion for symbols: %s", symbols)
         
-        # Start connections to all data sources
-        tasks = []
-        for source, url in self.data_sources.items():
-            task = asyncio.create_task(self._connect_to_source(source, url, symbols))
-            tasks.append(task)
+        # Start a supervised connection per data source
+        self._ingestion_tasks = [
+            asyncio.create_task(self._connect_to_source(source, url, symbols))
+            for source, url in self.data_sources.items()
+        ]
         
-        # Wait for all connections to establish
-        await asyncio.gather(*tasks, return_exceptions=True)
+        # Supervisors only return when ingestion is stopped
+        await asyncio.gather(*self._ingestion_tasks, return_exceptions=True)
+    
+    async def stop_ingestion(self):
+        """Cancel every source supervisor and close its connection"""
+        for task in self._ingestion_tasks:
+            task.cancel()
+        await asyncio.gather(*self._ingestion_tasks, return_exceptions=True)
+        self._ingestion_tasks = []
         
     async def _connect_to_source(self, source: str, url: str, symbols: List[str]):
-        """Connect to a specific data source"""
-        try:
-            if source == 'coinbase':
-                await self._connect_coinbase(url, symbols)
-            elif source == 'binance':
-                await self._connect_binance(url, symbols)
-            elif source == 'kraken':
-                await self._connect_kraken(url, symbols)
-                
-        except Exception as e:
-            logger.error(f"Failed to connect to {source}: {e}")
+        """Keep a data source connected, reconnecting with jittered exponential backoff"""
+        connectors = {
+            'coinbase': self._connect_coinbase,
+            'binance': self._connect_binance,
+            'kraken': self._connect_kraken
+        }
+        connect = connectors[source]
+        health = self.source_health.setdefault(source, SourceHealth())
+        attempt = 0
+        
+        while True:
+            started = time.monotonic()
+            try:
+                # Each connect call subscribes afresh, so reconnects resubscribe
+                await connect(url, symbols)
+                health.last_error = 'connection closed'
+            except asyncio.TimeoutError:
+                health.heartbeat_timeouts += 1
+                health.last_error = f"no data for {self.heartbeat_timeout}s"
+            except Exception as e:
+                health.last_error = str(e) or type(e).__name__
+            finally:
+                health.connected = False
+                self.active_connections.pop(source, None)
+            
+            # A session that stayed up long enough resets the backoff
+            if time.monotonic() - started >= self.reconnect_max_delay:
+                attempt = 0
+            delay = min(self.reconnect_max_delay, self.reconnect_base_delay * 2 ** attempt)
+            delay = delay / 2 + random.uniform(0, delay / 2)
+            attempt += 1
+            health.reconnects += 1
+            
+            logger.warning("%s disconnected (%s); reconnecting in %.2fs", source, health.last_error, delay)
+            await asyncio.sleep(delay)
+    
+    def _open_connection(self, url: str):
+        """Open a websocket with protocol-level keepalive pings"""
+        return websockets.connect(url, ping_interval=self.ping_interval, ping_timeout=self.ping_interval)
     
     async def _connect_coinbase(self, url: str, symbols: List[str]):
         """Connect to Coinbase Pro WebSocket"""
@@ -409,141 +1730,713 @@ class MarketDataIngestionEngine:
             "channels": ["ticker"]
         }
         
-        async with websockets.connect(url) as websocket:
+        async with self._open_connection(url) as websocket:
             await websocket.send(json.dumps(subscribe_message))
             logger.info("Connected to Coinbase Pro WebSocket")
-            
-            async for message in websocket:
-                try:
-                    data = json.loads(message)
-                    if data.get('type') == 'ticker':
-                        market_data = self._parse_coinbase_data(data)
-                        if market_data:
-                            await self._process_market_data(market_data)
-                except Exception as e:
-                    logger.error(f"Error processing Coinbase data: {e}")
+            await self._consume(websocket, 'coinbase')
     
     async def _connect_binance(self, url: str, symbols: List[str]):
-        """Connect to Binance WebSocket"""
-        # Simplified Binance connection (would need full implementation)
-        logger.info("Binance connection placeholder - would implement full WebSocket here")
+        """Connect to Binance WebSocket, multiplexing every symbol on one socket"""
+        decoder = self.decoders['binance']
+        async with self._open_connection(url) as websocket:
+            await websocket.send(json.dumps(decoder.subscribe_message(symbols)))
+            logger.info("Connected to Binance WebSocket")
+            await self._consume(websocket, 'binance')
         
     async def _connect_kraken(self, url: str, symbols: List[str]):
-        """Connect to Kraken WebSocket"""
-        # Simplified Kraken connection (would need full implementation)
-        logger.info("Kraken connection placeholder - would implement full WebSocket here")
+        """Connect to Kraken WebSocket, multiplexing every pair on one socket"""
+        decoder = self.decoders['kraken']
+        async with self._open_connection(url) as websocket:
+            await websocket.send(json.dumps(decoder.subscribe_message(symbols)))
+            logger.info("Connected to Kraken WebSocket")
+            await self._consume(websocket, 'kraken')
+    
+    async def _consume(self, websocket, source: str):
+        """Read frames from a source socket until it closes or goes silent"""
+        health = self.source_health[source]
+        health.connected = True
+        health.connects += 1
+        self.active_connections[source] = websocket
+        
+        while True:
+            # Raises TimeoutError when the feed goes silent, ConnectionClosed on drop
+            message = await asyncio.wait_for(websocket.recv(), self.heartbeat_timeout)
+            received_at = time.time()
+            if self.recorder is not None:
+                self.recorder.record(source, message, received_at)
+            metrics = self.metrics
+            if metrics is None:
+                await self._handle_frame(source, message, received_at)
+            else:
+                received = time.perf_counter_ns()
+                await self._handle_frame(source, message, received_at)
+                metrics.observe('frame', time.perf_counter_ns() - received, source)
     
-    def _parse_coinbase_data(self, data: Dict[str, Any]) -> Optional[MarketDataPoint]:
-        """Parse Coinbase ticker data into MarketDataPoint"""
+    async def _handle_frame(self, source: str, message, received_at: float):
+        """Decode one raw frame and push its ticker row through the pipeline"""
+        decoder = self.decoders[source]
+        health = self.source_health[source]
+        health.last_message_at = received_at
+        metrics = self.metrics
         try:
-            symbol = data.get('product_id', '').replace('-USD', '')
-            price = float(data.get('price', 0))
-            volume = float(data.get('volume_24h', 0))
-            
-            # Calculate 24h change (simplified - would need historical data)
-            change_24h = 0.0  # Would calculate from historical data
-            
-            return MarketDataPoint(
-                symbol=symbol,
-                price=price,
-                volume=volume,
-                change_24h=change_24h,
-                timestamp=time.time(),
-                source='coinbase'
-            )
+            if metrics is None:
+                row = decoder.decode(message, received_at)
+            else:
+                started = time.perf_counter_ns()
+                row = decoder.decode(message, received_at)
+                metrics.observe('decode', time.perf_counter_ns() - started, source)
+                metrics.count('frames', source)
+            if not row:
+                return
+            if decoder.last_sequence is not None and not health.observe_sequence(row[0], decoder.last_sequence):
+                if metrics is not None:
+                    metrics.count('stale_frames', source)
+                return
+            await self._process_market_data(MarketDataPoint(*row))
         except Exception as e:
-            logger.error(f"Error parsing Coinbase data: {e}")
-            return None
+            if metrics is not None:
+                metrics.count('frame_errors', source)
+            logger.error("Error processing %s data: %s", source, e)
+    
+    async def replay(self, frames):
+        """
+        Drive the pipeline from recorded frames instead of live websockets
+        
+        `frames` is an async iterable of (source, frame, received_at), normally
+        a session_log.ReplaySource. Recorded receive times are handed to the
+        decoders, so replayed ticks carry the timestamps of the original session.
+        """
+        replayed = 0
+        async for source, message, received_at in frames:
+            await self._handle_frame(source, message, received_at)
+            replayed += 1
+        return replayed
+    
+    def get_connection_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Reconnect, heartbeat and sequence-gap counters per source"""
+        return {source: health.to_dict() for source, health in self.source_health.items()}
     
     async def _process_market_data(self, market_data: MarketDataPoint):
         """Process incoming market data"""
+        metrics = self.metrics
+        if metrics is not None:
+            started = time.perf_counter_ns()
+        
         # Add to buffer
-        self.data_buffer.append(market_data)
+        self.data_buffer.append_point(market_data)
+        self._index_market_data(market_data)
+        if self.tick_store is not None:
+            self.tick_store.append_point(market_data)
         
-        # Notify all callbacks
-        for callback in self.callbacks:
-            try:
-                await callback(market_data)
-            except Exception as e:
-                logger.error(f"Error in market data callback: {e}")
+        if metrics is None:
+            # Hand off to subscriber queues
+            await self.callbacks.publish(market_data)
+            return
+        
+        indexed = time.perf_counter_ns()
+        metrics.observe('index', indexed - started, market_data.source)
+        metrics.count('ticks', market_data.source)
+        await self.callbacks.publish(market_data)
+        # Includes time spent blocked on full 'block' subscriber queues
+        metrics.observe('publish', time.perf_counter_ns() - indexed, market_data.source)
+    
+    def _index_market_data(self, market_data: MarketDataPoint):
+        """Record a tick in its symbol ring and the latest-tick maps"""
+        symbol_buffer = self.symbol_buffers.get(market_data.symbol)
+        if symbol_buffer is None:
+            symbol_buffer = self.symbol_buffers[market_data.symbol] = ColumnarRingBuffer(self.symbol_capacity)
+        symbol_buffer.append_point(market_data)
+        
+        self.latest_ticks[(market_data.symbol, market_data.source)] = market_data
+        self.latest_by_symbol[market_data.symbol] = market_data
+        self.tick_version += 1
     
-    def add_callback(self, callback):
-        """Add callback for market data updates"""
-        self.callbacks.append(callback)
+    def add_callback(self, callback, **options) -> Subscription:
+        """Add callback for market data updates (options: queue_size, overflow, batch_size)"""
+        return self.callbacks.subscribe(callback, **options)
     
     def get_recent_data(self, symbol: str = None, limit: int = 100) -> List[MarketDataPoint]:
-        """Get recent market data from buffer"""
+        """Get recent market data from buffer (last `limit` ticks of `symbol` if given)"""
+        buffer = self._buffer_for(symbol)
+        if buffer is None:
+            return []
+        return buffer.to_points(buffer.tail(limit))
+    
+    def get_recent_columns(self, symbol: str = None, limit: int = 100) -> TickColumns:
+        """Get recent market data as zero-copy column views"""
+        buffer = self._buffer_for(symbol)
+        if buffer is None:
+            return self.data_buffer.tail(0)
+        return buffer.tail(limit)
+    
+    def get_latest(self, symbol: str, source: str = None) -> Optional[MarketDataPoint]:
+        """Latest tick for a symbol, optionally from one source"""
+        if source:
+            return self.latest_ticks.get((symbol, source))
+        return self.latest_by_symbol.get(symbol)
+    
+    def _buffer_for(self, symbol: Optional[str]) -> Optional[ColumnarRingBuffer]:
         if symbol:
-            return [data for data in list(self.data_buffer)[-limit:] if data.symbol == symbol]
-        return list(self.data_buffer)[-limit:]
+            return self.symbol_buffers.get(symbol)
+        return self.data_buffer
+
+class ConsensusRollup:
+    """
+    Fixed-resolution min/max/mean buckets of HRI, SSS and quality
+    
+    Buckets are updated in place as results arrive and kept in a mirrored
+    ring like ColumnarRingBuffer, so any run of recent buckets is one slice.
+    Results older than the open bucket are folded into it.
+    """
+    
+    __slots__ = ('label', 'resolution', 'capacity', 'start', 'count',
+                 'minimum', 'maximum', 'total', '_head', '_size', '_bucket')
+    
+    def __init__(self, label: str, resolution: float, capacity: int):
+        self.label = label
+        self.resolution = resolution
+        self.capacity = capacity
+        self.start = np.zeros(2 * capacity, dtype=np.float64)
+        self.count = np.zeros(2 * capacity, dtype=np.int64)
+        self.minimum = np.zeros((2 * capacity, 3), dtype=np.float64)
+        self.maximum = np.zeros((2 * capacity, 3), dtype=np.float64)
+        self.total = np.zeros((2 * capacity, 3), dtype=np.float64)
+        self._head = 0
+        self._size = 0
+        self._bucket: Optional[int] = None
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def add(self, timestamp: float, values: Tuple[float, float, float]):
+        bucket = int(timestamp // self.resolution)
+        if self._bucket is None or bucket > self._bucket:
+            self._bucket = bucket
+            for slot in (self._head, self._head + self.capacity):
+                self.start[slot] = bucket * self.resolution
+                self.count[slot] = 1
+                self.minimum[slot] = values
+                self.maximum[slot] = values
+                self.total[slot] = values
+            self._head = (self._head + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            return
+        
+        current = (self._head - 1) % self.capacity
+        for slot in (current, current + self.capacity):
+            self.count[slot] += 1
+            for i, value in enumerate(values):
+                if value < self.minimum[slot, i]:
+                    self.minimum[slot, i] = value
+                if value > self.maximum[slot, i]:
+                    self.maximum[slot, i] = value
+                self.total[slot, i] += value
+    
+    def covers(self, start: float) -> bool:
+        """True if no bucket at or after start has been evicted"""
+        return self._size < self.capacity or self.start[self._head] <= start
+    
+    def window(self, start: float, end: float) -> slice:
+        """Ring slice of buckets beginning in [start, end), oldest first"""
+        stop = self._head + self.capacity
+        first = stop - self._size
+        starts = self.start[first:stop]
+        return slice(first + int(np.searchsorted(starts, start, side='left')),
+                     first + int(np.searchsorted(starts, end, side='left')))
+    
+    def series(self, start: float, end: float) -> Dict[str, Any]:
+        window = self.window(start, end)
+        count = self.count[window]
+        mean = self.total[window] / count[:, None]
+        result: Dict[str, Any] = {
+            'resolution': self.label,
+            'timestamp': self.start[window].tolist(),
+            'count': count.tolist()
+        }
+        for i, name in enumerate(CONSENSUS_METRICS):
+            result[name] = mean[:, i].tolist()
+            result[f"{name}_min"] = self.minimum[window, i].tolist()
+            result[f"{name}_max"] = self.maximum[window, i].tolist()
+        return result
+
+class ConsensusHistory:
+    """
+    Struct-of-arrays consensus history with multi-resolution rollups
+    
+    The last `capacity` results are kept as parallel arrays (signatures in a
+    plain list) in a mirrored ring, and every result also feeds the 1s/1m/1h
+    rollups, which retain far longer spans at fixed cost. Iterating or
+    indexing rebuilds ConsensusResult objects on demand.
+    """
+    
+    def __init__(self, capacity: int = 1000, rollups=CONSENSUS_ROLLUPS):
+        self.capacity = capacity
+        self.timestamp = np.zeros(2 * capacity, dtype=np.float64)
+        self.values = np.zeros((2 * capacity, 3), dtype=np.float64)
+        self.nodes = np.zeros(2 * capacity, dtype=np.int32)
+        self.signatures: List[Optional[List[str]]] = [None] * capacity
+        self.rollups = [ConsensusRollup(label, resolution, size) for label, resolution, size in rollups]
+        self._head = 0
+        self._count = 0
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    def append(self, result: ConsensusResult):
+        values = (result.hri_value, result.sss_value, result.harmonic_quality)
+        for slot in (self._head, self._head + self.capacity):
+            self.timestamp[slot] = result.consensus_timestamp
+            self.values[slot] = values
+            self.nodes[slot] = result.participating_nodes
+        self.signatures[self._head] = result.validation_signatures
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        
+        for rollup in self.rollups:
+            rollup.add(result.consensus_timestamp, values)
+    
+    def _slots(self, limit: Optional[int] = None) -> slice:
+        n = self._count if limit is None else max(0, min(limit, self._count))
+        end = self._head + self.capacity
+        return slice(end - n, end)
+    
+    def _result(self, slot: int) -> ConsensusResult:
+        hri, sss, quality = self.values[slot].tolist()
+        return ConsensusResult(
+            hri_value=hri,
+            sss_value=sss,
+            harmonic_quality=quality,
+            consensus_timestamp=float(self.timestamp[slot]),
+            participating_nodes=int(self.nodes[slot]),
+            validation_signatures=list(self.signatures[slot % self.capacity])
+        )
+    
+    def __getitem__(self, index: int) -> ConsensusResult:
+        if not -self._count <= index < self._count:
+            raise IndexError("consensus history index out of range")
+        slots = self._slots()
+        return self._result(slots.start + index % self._count)
+    
+    def __iter__(self) -> Iterator[ConsensusResult]:
+        slots = self._slots()
+        return (self._result(slot) for slot in range(slots.start, slots.stop))
+    
+    def to_dicts(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """The last `limit` results as ConsensusResult.to_dict() shaped dicts"""
+        slots = self._slots(limit)
+        signatures = self.signatures
+        capacity = self.capacity
+        return [
+            {
+                'hri_value': hri,
+                'sss_value': sss,
+                'harmonic_quality': quality,
+                'consensus_timestamp': timestamp,
+                'participating_nodes': nodes,
+                'validation_signatures': list(signatures[slot % capacity])
+            }
+            for slot, timestamp, (hri, sss, quality), nodes in zip(
+                range(slots.start, slots.stop), self.timestamp[slots].tolist(),
+                self.values[slots].tolist(), self.nodes[slots].tolist()
+            )
+        ]
+    
+    def series(self, start: float, end: Optional[float] = None, max_points: int = 500) -> Dict[str, Any]:
+        """
+        Columnar HRI/SSS/quality over [start, end) at the finest fitting resolution
+        
+        Raw results are used while they cover the span in at most max_points
+        rows; otherwise the finest rollup that still holds the start of the
+        span and fits in max_points buckets. Rollups add count and per-metric
+        _min/_max columns; their main columns are bucket means.
+        """
+        if end is None:
+            end = time.time()
+        slots = self._slots()
+        timestamps = self.timestamp[slots]
+        first = int(np.searchsorted(timestamps, start, side='left'))
+        last = int(np.searchsorted(timestamps, end, side='left'))
+        raw_covers = self._count < self.capacity or timestamps[0] <= start
+        if raw_covers and last - first <= max_points:
+            window = slice(slots.start + first, slots.start + last)
+            result: Dict[str, Any] = {'resolution': 'raw', 'timestamp': self.timestamp[window].tolist()}
+            for i, name in enumerate(CONSENSUS_METRICS):
+                result[name] = self.values[window, i].tolist()
+            return result
+        
+        for rollup in self.rollups:
+            if rollup.covers(start) and (end - start) / rollup.resolution <= max_points:
+                return rollup.series(start, end)
+        return self.rollups[-1].series(start, end)
+
+class Snapshot(NamedTuple):
+    """
+    Immutable pre-encoded view for high-rate readers
+    
+    `data` is shared by every reader of this version and must be treated as
+    read-only; `body` is its JSON encoding and `etag` identifies the version
+    across process restarts.
+    """
+    version: int
+    etag: str
+    data: Dict[str, Any]
+    body: bytes
+
+class ConsensusScheduler:
+    """
+    Coalesces tick notifications into batched consensus runs
+    
+    notify() is cheap and synchronous, so it can sit on the websocket receive
+    path; the consensus computation itself runs in a separate task. Modes:
+    - 'interval': at most one run every `interval` seconds
+    - 'ticks':    one run per `every_n_ticks` notifications
+    - 'adaptive': interval-driven, but the interval stretches (up to
+                  `max_interval`) so a run occupies at most `target_load` of
+                  wall time, and relaxes back once runs get cheaper
+    """
+    
+    MODES = ('interval', 'ticks', 'adaptive')
+    
+    def __init__(self, compute: Callable[[], Awaitable[None]], mode: str = 'interval',
+                 interval: float = 0.1, every_n_ticks: int = 10,
+                 max_interval: float = 2.0, target_load: float = 0.5):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown consensus scheduler mode: {mode}")
+        self.compute = compute
+        self.mode = mode
+        self.interval = interval
+        self.every_n_ticks = every_n_ticks
+        self.max_interval = max_interval
+        self.target_load = target_load
+        self.current_interval = interval
+        
+        # Scheduler statistics
+        self.runs = 0
+        self.coalesced_ticks = 0
+        self.last_duration = 0.0
+        
+        self._pending = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        
+    @property
+    def pending(self) -> int:
+        return self._pending
+    
+    def notify(self, ticks: int = 1):
+        """Record new ticks and wake the scheduler if a run is due"""
+        self._pending += ticks
+        if self._task is None:
+            self.start()
+        if self.mode == 'ticks' and self._pending < self.every_n_ticks:
+            return
+        self._wakeup.set()
+    
+    def start(self):
+        """Start the scheduler task on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+    
+    async def stop(self, flush: bool = True):
+        """Stop the scheduler, optionally running one last pass over pending ticks"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if flush and self._pending:
+            await self._run_once()
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        last_run = -math.inf
+        while True:
+            await self._wakeup.wait()
+            if self.mode != 'ticks':
+                delay = last_run + self.current_interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self._wakeup.clear()
+            last_run = loop.time()
+            await self._run_once()
+            
+    async def _run_once(self):
+        ticks = self._pending
+        self._pending = 0
+        started = time.perf_counter()
+        try:
+            await self.compute()
+        except Exception as e:
+            logger.error("Error in consensus computation: %s", e)
+        self.last_duration = time.perf_counter() - started
+        self.runs += 1
+        self.coalesced_ticks += ticks
+        if self.mode == 'adaptive':
+            self._adapt(self.last_duration)
+    
+    def _adapt(self, duration: float):
+        wanted = max(self.interval, duration / self.target_load)
+        if wanted > self.current_interval:
+            self.current_interval = min(self.max_interval, wanted)
+        else:
+            # Relax gradually so one cheap run does not undo the backoff
+            self.current_interval = max(wanted, self.current_interval * 0.9)
+
+class ConsensusLogSampler:
+    """
+    Rate-limited consensus logging: one summary line per `interval` seconds
+    
+    Updates between summaries are only counted and min/max-tracked, and
+    nothing at all happens while the logger is disabled for `level`. An
+    interval of 0 logs every update, as the layer used to.
+    """
+    
+    def __init__(self, interval: float = 1.0, log: logging.Logger = logger, level: int = logging.INFO):
+        self.interval = interval
+        self.log = log
+        self.level = level
+        self._reset(time.monotonic())
+        
+    def _reset(self, now: float):
+        self._started = now
+        self.count = 0
+        self.hri_min = self.sss_min = math.inf
+        self.hri_max = self.sss_max = -math.inf
+        self.last: Optional[ConsensusResult] = None
+    
+    def observe(self, result: ConsensusResult):
+        if not self.log.isEnabledFor(self.level):
+            return
+        if self.interval <= 0:
+            self.log.log(self.level, "Consensus Update: HRI=%.2f, SSS=%.2f, Quality=%.2f",
+                         result.hri_value, result.sss_value, result.harmonic_quality)
+            return
+        
+        self.count += 1
+        hri = result.hri_value
+        sss = result.sss_value
+        if hri < self.hri_min:
+            self.hri_min = hri
+        if hri > self.hri_max:
+            self.hri_max = hri
+        if sss < self.sss_min:
+            self.sss_min = sss
+        if sss > self.sss_max:
+            self.sss_max = sss
+        self.last = result
+        
+        now = time.monotonic()
+        if now - self._started >= self.interval:
+            self._emit(now)
+    
+    def flush(self):
+        """Log whatever has been counted since the last summary"""
+        if self.count:
+            self._emit(time.monotonic())
+    
+    def _emit(self, now: float):
+        last = self.last
+        self.log.log(
+            self.level,
+            "Consensus: %d updates in %.1fs, HRI=%.2f [%.2f..%.2f], SSS=%.2f [%.2f..%.2f], Quality=%.2f",
+            self.count, now - self._started, last.hri_value, self.hri_min, self.hri_max,
+            last.sss_value, self.sss_min, self.sss_max, last.harmonic_quality
+        )
+        self._reset(now)
 
 class SensoryDataLayer:
     """Main sensory data layer orchestrating all components"""
     
-    def __init__(self, base_frequency: float = 432.0):
+    def __init__(self, base_frequency: float = 432.0, analysis_window: int = 50,
+                 consensus_mode: str = 'interval', consensus_interval: float = 0.1,
+                 consensus_every_n_ticks: int = 10, window_mode: str = 'ticks',
+                 bar_interval: float = 1.0, consensus_log_interval: float = 1.0):
         self.base_frequency = base_frequency
         self.hri_calculator = HarmonicResonanceCalculator(base_frequency)
         self.sss_calculator = SonicStabilityCalculator(base_frequency)
+        
+        # Streaming calculators over the last analysis_window ticks
+        self.analysis_window = analysis_window
+        self.hri_stream = IncrementalHRICalculator(self.hri_calculator, analysis_window)
+        self.sss_stream = IncrementalSSSCalculator(self.sss_calculator, analysis_window)
+        
         self.ingestion_engine = MarketDataIngestionEngine()
+        self._ingestion: Optional[asyncio.Task] = None
         
         # Consensus state
         self.current_hri = 0.0
         self.current_sss = 0.0
-        self.consensus_history = deque(maxlen=1000)
+        self.consensus_history = ConsensusHistory(capacity=1000)
+        
+        # Pre-encoded read snapshots; the epoch keeps ETags unique across restarts
+        self._snapshot_epoch = format(time.time_ns(), 'x')
+        self._consensus_snapshot = self._make_snapshot(0, 'c', self._consensus_state(time.time()))
+        self._summary_snapshot: Optional[Snapshot] = None
+        
+        # In 'bars' mode the analysis window slides over fixed-interval bars instead of raw ticks
+        if window_mode not in ('ticks', 'bars'):
+            raise ValueError(f"Unknown window mode: {window_mode}")
+        self.window_mode = window_mode
+        self.resampler = BarResampler(bar_interval) if window_mode == 'bars' else None
+        
+        # Ticks (or bars) waiting for the next consensus run; only the last window can matter
+        self._pending_ticks = deque(maxlen=analysis_window)
+        self.consensus_scheduler = ConsensusScheduler(
+            self._run_consensus,
+            mode=consensus_mode,
+            interval=consensus_interval,
+            every_n_ticks=consensus_every_n_ticks
+        )
         
         # Callbacks for external systems
-        self.consensus_callbacks = []
+        self.consensus_callbacks = SubscriberBus('consensus')
+        
+        # Optional stage timings and counters, e.g. metrics.MetricsRegistry
+        self.metrics = None
+        # One consensus summary log line per consensus_log_interval seconds
+        self.consensus_log = ConsensusLogSampler(consensus_log_interval)
+        # Optional result signer, e.g. signing.ConsensusSigner
+        self.signer = None
         
-        # Setup market data callback
-        self.ingestion_engine.add_callback(self._on_market_data_update)
+        # Setup market data callback; blocking so the analysis window never skips ticks
+        self._tick_subscription = self.ingestion_engine.add_callback(
+            self._on_market_data_batch, overflow='block', batch_size=analysis_window
+        )
         
     async def initialize(self, symbols: List[str] = None):
-        """Initialize the sensory data layer"""
+        """Initialize the sensory data layer; ingestion keeps running in the background"""
         if symbols is None:
             symbols = ['BTC', 'ETH', 'SOL', 'ADA']
             
         logger.info("Initializing Orion Rangi Sensory Data Layer")
         
-        # Start market data ingestion
-        await self.ingestion_engine.start_ingestion(symbols)
+        # Source supervisors only return when ingestion is stopped, so run them as a task
+        self._ingestion = asyncio.create_task(self.ingestion_engine.start_ingestion(symbols))
         
         logger.info("Sensory Data Layer initialized successfully")
     
-    async def _on_market_data_update(self, market_data: MarketDataPoint):
-        """Handle market data updates and trigger consensus calculations"""
+    async def wait_closed(self):
+        """Block until ingestion stops, e.g. to serve until cancelled"""
+        if self._ingestion is not None:
+            await asyncio.shield(self._ingestion)
+    
+    def warm_start(self, points: List[MarketDataPoint]):
+        """
+        Prime the tick buffers and analysis windows from stored ticks
+        
+        `points` should be in arrival order; only the most recent
+        analysis_window of them reach the HRI/SSS windows. Consensus is
+        available immediately instead of after analysis_window fresh ticks.
+        """
+        engine = self.ingestion_engine
+        for market_data in points:
+            engine.data_buffer.append_point(market_data)
+            engine._index_market_data(market_data)
+        
+        window_points = points
+        if self.resampler is not None:
+            window_points = [bar for market_data in points for bar in self.resampler.update(market_data)]
+        
+        hri = sss = None
+        for market_data in window_points[-self.analysis_window:]:
+            hri = self.hri_stream.update(market_data)
+            sss = self.sss_stream.update(market_data)
+        if hri is not None and len(self.hri_stream) >= 2:
+            self.current_hri = hri
+            self.current_sss = sss
+            self._publish_snapshot(time.time())
+        logger.info("Warm-started from %d stored ticks", len(points))
+    
+    async def shutdown(self):
+        """Stop ingestion and the consensus scheduler after a final pass over pending ticks"""
+        if self._ingestion is not None:
+            self._ingestion.cancel()
+            await asyncio.gather(self._ingestion, return_exceptions=True)
+            self._ingestion = None
+        await self.ingestion_engine.stop_ingestion()
+        
+        # Deliver every queued tick, then every result including the final flush's
+        await self.ingestion_engine.callbacks.drain()
+        await self.ingestion_engine.callbacks.close()
+        await self.consensus_scheduler.stop()
+        await self.consensus_callbacks.drain()
+        await self.consensus_callbacks.close()
+        if self.signer is not None:
+            await self.signer.flush()
+        self.consensus_log.flush()
+    
+    async def _on_market_data_batch(self, batch: List[MarketDataPoint]):
+        """Queue market data updates for the next consensus run"""
+        if self.resampler is not None:
+            batch = [bar for market_data in batch for bar in self.resampler.update(market_data)]
+            if not batch:
+                return
+        self._pending_ticks.extend(batch)
+        self.consensus_scheduler.notify(len(batch))
+    
+    async def _run_consensus(self):
+        """Fold pending ticks into the analysis window and publish one consensus result"""
+        metrics = self.metrics
+        if metrics is not None:
+            run_started = time.perf_counter_ns()
+        
+        hri = sss = None
+        while self._pending_ticks:
+            market_data = self._pending_ticks.popleft()
+            try:
+                # Slide the analysis window forward by this tick
+                if metrics is None:
+                    hri = self.hri_stream.update(market_data)
+                    sss = self.sss_stream.update(market_data)
+                else:
+                    started = time.perf_counter_ns()
+                    hri = self.hri_stream.update(market_data)
+                    updated = time.perf_counter_ns()
+                    sss = self.sss_stream.update(market_data)
+                    metrics.observe('hri_update', updated - started, market_data.source)
+                    metrics.observe('sss_update', time.perf_counter_ns() - updated, market_data.source)
+            except Exception as e:
+                logger.error("Error processing market data update: %s", e)
+        
+        if hri is not None and len(self.hri_stream) >= 2:
+            await self._publish_consensus(hri, sss)
+        if metrics is not None:
+            metrics.observe('consensus_run', time.perf_counter_ns() - run_started)
+    
+    async def _publish_consensus(self, hri: float, sss: float):
+        """Record a new HRI/SSS pair as the current consensus and notify subscribers"""
         try:
-            # Get recent market data for analysis
-            recent_data = self.ingestion_engine.get_recent_data(limit=50)
+            # Update current values
+            self.current_hri = hri
+            self.current_sss = sss
+            
+            # Create consensus result
+            consensus_result = ConsensusResult(
+                hri_value=hri,
+                sss_value=sss,
+                harmonic_quality=self._calculate_harmonic_quality(hri, sss),
+                consensus_timestamp=time.time(),
+                participating_nodes=1,  # Single node for Genesis Prototype
+                validation_signatures=[]
+            )
+            consensus_result.validation_signatures = self._generate_validation_signatures(consensus_result)
+            
+            # Add to history
+            self.consensus_history.append(consensus_result)
+            self._publish_snapshot(consensus_result.consensus_timestamp)
+            
+            # Notify callbacks
+            await self._notify_consensus_callbacks(consensus_result)
+            if self.metrics is not None:
+                self.metrics.count('consensus_updates')
+            
+            self.consensus_log.observe(consensus_result)
             
-            if len(recent_data) >= 2:
-                # Calculate HRI and SSS
-                hri = self.hri_calculator.calculate_hri(recent_data)
-                sss = self.sss_calculator.calculate_sss(recent_data)
-                
-                # Update current values
-                self.current_hri = hri
-                self.current_sss = sss
-                
-                # Create consensus result
-                consensus_result = ConsensusResult(
-                    hri_value=hri,
-                    sss_value=sss,
-                    harmonic_quality=self._calculate_harmonic_quality(hri, sss),
-                    consensus_timestamp=time.time(),
-                    participating_nodes=1,  # Single node for Genesis Prototype
-                    validation_signatures=[self._generate_validation_signature(hri, sss)]
-                )
-                
-                # Add to history
-                self.consensus_history.append(consensus_result)
-                
-                # Notify callbacks
-                await self._notify_consensus_callbacks(consensus_result)
-                
-                logger.info(f"Consensus Update: HRI={hri:.2f}, SSS={sss:.2f}, Quality={consensus_result.harmonic_quality:.2f}")
-                
         except Exception as e:
-            logger.error(f"Error processing market data update: {e}")
+            logger.error("Error computing consensus: %s", e)
     
     def _calculate_harmonic_quality(self, hri: float, sss: float) -> float:
         """Calculate overall harmonic quality score"""
@@ -553,70 +2446,130 @@ class SensoryDataLayer:
         
         return (hri_quality + sss_quality) / 2.0 * 100.0
     
-    def _generate_validation_signature(self, hri: float, sss: float) -> str:
-        """Generate validation signature for consensus result"""
-        # Simplified signature generation (would use proper cryptography in production)
-        signature_data = f"{hri:.6f}_{sss:.6f}_{self.base_frequency}_{time.time()}"
-        return str(hash(signature_data))
+    def _generate_validation_signatures(self, consensus_result: ConsensusResult) -> List[str]:
+        """
+        Signatures for a consensus result
+        
+        With a signer attached these are its Ed25519 signatures or Merkle batch
+        references; otherwise a SHA-256 digest of the canonical encoding, which
+        anyone can recompute but which proves nothing about who produced it.
+        """
+        if self.signer is not None:
+            return self.signer.sign_result(consensus_result)
+        digest = hashlib.sha256(encode_consensus_result(consensus_result, self.base_frequency))
+        return ['sha256:' + digest.hexdigest()]
     
     async def _notify_consensus_callbacks(self, consensus_result: ConsensusResult):
-        """Notify all consensus callbacks"""
-        for callback in self.consensus_callbacks:
-            try:
-                await callback(consensus_result)
-            except Exception as e:
-                logger.error(f"Error in consensus callback: {e}")
+        """Queue a consensus result for every consensus subscriber"""
+        await self.consensus_callbacks.publish(consensus_result)
     
-    def add_consensus_callback(self, callback):
-        """Add callback for consensus updates"""
-        self.consensus_callbacks.append(callback)
+    def add_consensus_callback(self, callback, **options) -> Subscription:
+        """Add callback for consensus updates (options: queue_size, overflow, batch_size)"""
+        return self.consensus_callbacks.subscribe(callback, **options)
     
-    def get_current_consensus(self) -> Dict[str, Any]:
-        """Get current consensus state"""
+    def get_subscriber_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Lag, drop and delivery counters for every market data and consensus subscriber"""
+        return {**self.ingestion_engine.callbacks.stats(), **self.consensus_callbacks.stats()}
+    
+    def _consensus_state(self, timestamp: float) -> Dict[str, Any]:
         return {
             'hri_value': self.current_hri,
             'sss_value': self.current_sss,
             'harmonic_quality': self._calculate_harmonic_quality(self.current_hri, self.current_sss),
-            'timestamp': time.time(),
+            'timestamp': timestamp,
             'base_frequency': self.base_frequency
         }
     
+    def _make_snapshot(self, version: int, kind: str, data: Dict[str, Any]) -> Snapshot:
+        data['version'] = version
+        return Snapshot(version, f'"{self._snapshot_epoch}-{kind}{version}"', data, fast_dumps(data))
+    
+    def _publish_snapshot(self, timestamp: float):
+        """Encode the current consensus once for every reader until the next update"""
+        version = self._consensus_snapshot.version + 1
+        self._consensus_snapshot = self._make_snapshot(version, 'c', self._consensus_state(timestamp))
+    
+    def get_consensus_snapshot(self, since_version: Optional[int] = None) -> Optional[Snapshot]:
+        """Current consensus snapshot, or None if it has not changed since `since_version`"""
+        snapshot = self._consensus_snapshot
+        if since_version is not None and snapshot.version <= since_version:
+            return None
+        return snapshot
+    
+    def get_current_consensus(self) -> Dict[str, Any]:
+        """Get current consensus state (shared snapshot dict; do not mutate)"""
+        return self._consensus_snapshot.data
+    
     def get_consensus_history(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get consensus history"""
-        return [result.to_dict() for result in list(self.consensus_history)[-limit:]]
+        return self.consensus_history.to_dicts(limit)
+    
+    def get_consensus_series(self, start: float, end: Optional[float] = None,
+                             max_points: int = 500) -> Dict[str, Any]:
+        """Chart-ready consensus columns, downsampled to fit max_points (see ConsensusHistory.series)"""
+        return self.consensus_history.series(start, end, max_points)
+    
+    def get_recent_bars(self, symbol: str, limit: int = 100) -> List[OHLCVBar]:
+        """Closed OHLCV bars of a symbol (bars window mode only)"""
+        if self.resampler is None:
+            return []
+        return self.resampler.bars(symbol, limit)
+    
+    def get_market_summary_snapshot(self, since_version: Optional[int] = None) -> Optional[Snapshot]:
+        """
+        Market summary snapshot, or None if unchanged since `since_version`
+        
+        The summary is rebuilt and encoded at most once per tick version, no
+        matter how many readers poll it in between.
+        """
+        version = self.ingestion_engine.tick_version
+        snapshot = self._summary_snapshot
+        if snapshot is None or snapshot.version != version:
+            snapshot = self._summary_snapshot = self._make_snapshot(version, 'm', self._build_market_data_summary())
+        if since_version is not None and snapshot.version <= since_version:
+            return None
+        return snapshot
     
     def get_market_data_summary(self) -> Dict[str, Any]:
-        """Get summary of current market data"""
-        recent_data = self.ingestion_engine.get_recent_data(limit=10)
+        """Get summary of current market data (shared snapshot dict; do not mutate)"""
+        return self.get_market_summary_snapshot().data
+    
+    def _build_market_data_summary(self) -> Dict[str, Any]:
+        latest_by_symbol = self.ingestion_engine.latest_by_symbol
         
-        if not recent_data:
+        if not latest_by_symbol:
             return {'status': 'no_data'}
         
-        # Calculate summary statistics
-        symbols = list(set(data.symbol for data in recent_data))
         summary = {
-            'symbols': symbols,
-            'data_points': len(recent_data),
-            'latest_timestamp': max(data.timestamp for data in recent_data),
+            'symbols': list(latest_by_symbol),
+            'data_points': len(self.ingestion_engine.data_buffer),
+            'latest_timestamp': max(latest.timestamp for latest in latest_by_symbol.values()),
             'assets': {}
         }
         
-        for symbol in symbols:
-            symbol_data = [data for data in recent_data if data.symbol == symbol]
-            if symbol_data:
-                latest = symbol_data[-1]
-                summary['assets'][symbol] = {
-                    'price': latest.price,
-                    'volume': latest.volume,
-                    'change_24h': latest.change_24h,
-                    'source': latest.source
-                }
+        for symbol, latest in latest_by_symbol.items():
+            summary['assets'][symbol] = {
+                'price': latest.price,
+                'volume': latest.volume,
+                'change_24h': latest.change_24h,
+                'source': latest.source
+            }
         
         return summary
 
 # Example usage and testing
 async def main():
     """Example usage of the Sensory Data Layer"""
+    log_listener = configure_logging(non_blocking=True)
+    try:
+        await run_demo()
+    finally:
+        # None when blocking logging was configured first
+        if log_listener is not None:
+            log_listener.stop()
+
+async def run_demo():
+    """Stream BTC/ETH for a minute, printing every consensus result"""
     # Create sensory data layer
     sensory_layer = SensoryDataLayer(base_frequency=432.0)
     
@@ -636,8 +2589,10 @@ async def main():
     try:
         # Keep running for demonstration
         await asyncio.sleep(60)  # Run for 1 minute
-    except KeyboardInterrupt:
+    finally:
+        # Also reached on Ctrl+C, which cancels this coroutine
         print("⏹️ Shutting down sensory data layer...")
+        await sensory_layer.shutdown()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Orion Rangi Sonic Engine - Session Record and Replay
+Append-only capture of raw feed frames and offline replay into the ingestion engine
+
+Log layout: an 8 byte magic followed by length-prefixed records. Each record
+header is (received_at float64, length uint32, source_id uint8, kind uint8)
+in little-endian order, followed by `length` payload bytes. Source names are
+declared once per recording session with a KIND_SOURCE record, so several
+sessions can be appended to the same file. A torn record at the tail (crash
+mid-write) ends the replay instead of failing it, and is cut off when the
+log is reopened for recording so the next session starts on a record boundary.
+
+W.J. McCrea - Reality Protocol LLC
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import struct
+import time
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from sensory_data_layer import SensoryDataLayer, configure_logging
+
+logger = logging.getLogger(__name__)
+
+LOG_MAGIC = b'ORSLOG1\n'
+RECORD_HEADER = struct.Struct('<dIBB')
+
+KIND_SOURCE = 0
+KIND_TEXT = 1
+KIND_BINARY = 2
+
+Frame = Union[str, bytes]
+
+class SessionRecorder:
+    """
+    Appends raw frames with their receive timestamps to a session log
+
+    Writes go through a large file buffer and are flushed at most every
+    flush_interval seconds of feed time, so a crash loses at most that much.
+    Assign an instance to MarketDataIngestionEngine.recorder to capture a
+    live session.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, buffer_size: int = 1 << 16):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._source_ids: Dict[str, int] = {}
+        self._last_flush = 0.0
+        self.frames = 0
+        self.bytes_written = 0
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            size = os.path.getsize(path)
+            complete = complete_length(path)
+            if complete < size:
+                logger.warning("Dropping %d bytes of torn record at end of %s", size - complete, path)
+                os.truncate(path, complete)
+                exists = complete > 0
+        self._handle = open(path, 'ab', buffering=buffer_size)
+        if not exists:
+            self._handle.write(LOG_MAGIC)
+
+    def record(self, source: str, frame: Frame, received_at: float):
+        """Append one raw frame as received from `source`"""
+        source_id = self._source_ids.get(source)
+        if source_id is None:
+            source_id = self._declare(source, received_at)
+        if isinstance(frame, str):
+            payload = frame.encode('utf-8')
+            kind = KIND_TEXT
+        else:
+            payload = bytes(frame)
+            kind = KIND_BINARY
+        self._handle.write(RECORD_HEADER.pack(received_at, len(payload), source_id, kind))
+        self._handle.write(payload)
+        self.frames += 1
+        self.bytes_written += RECORD_HEADER.size + len(payload)
+        if received_at - self._last_flush >= self.flush_interval:
+            self._handle.flush()
+            self._last_flush = received_at
+
+    def _declare(self, source: str, received_at: float) -> int:
+        source_id = len(self._source_ids)
+        if source_id > 255:
+            raise ValueError("A session log supports at most 256 sources")
+        name = source.encode('utf-8')
+        self._handle.write(RECORD_HEADER.pack(received_at, len(name), source_id, KIND_SOURCE))
+        self._handle.write(name)
+        self._source_ids[source] = source_id
+        return source_id
+
+    def flush(self):
+        self._handle.flush()
+
+    def close(self):
+        if not self._handle.closed:
+            self._handle.close()
+
+    def get_stats(self) -> Dict[str, float]:
+        return {'frames': self.frames, 'bytes': self.bytes_written, 'sources': len(self._source_ids)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def complete_length(path: str) -> int:
+    """Bytes of path up to the end of its last complete record (0 for a torn magic)"""
+    header_size = RECORD_HEADER.size
+    with open(path, 'rb') as handle:
+        magic = handle.read(len(LOG_MAGIC))
+        if magic != LOG_MAGIC:
+            if LOG_MAGIC.startswith(magic):
+                return 0
+            raise ValueError(f"{path} is not a session log")
+        size = os.fstat(handle.fileno()).st_size
+        end = len(LOG_MAGIC)
+        while end + header_size <= size:
+            handle.seek(end)
+            _, length, _, _ = RECORD_HEADER.unpack(handle.read(header_size))
+            if end + header_size + length > size:
+                break
+            end += header_size + length
+        return end
+
+def read_session(path: str, sources: Optional[Iterable[str]] = None) -> Iterator[Tuple[str, Frame, float]]:
+    """Yield (source, frame, received_at) in recorded order"""
+    wanted = set(sources) if sources is not None else None
+    names: Dict[int, str] = {}
+    header_size = RECORD_HEADER.size
+    with open(path, 'rb') as handle:
+        if handle.read(len(LOG_MAGIC)) != LOG_MAGIC:
+            raise ValueError(f"{path} is not a session log")
+        while True:
+            header = handle.read(header_size)
+            if len(header) < header_size:
+                if header:
+                    logger.warning("Truncated record header at end of %s", path)
+                return
+            received_at, length, source_id, kind = RECORD_HEADER.unpack(header)
+            payload = handle.read(length)
+            if len(payload) < length:
+                logger.warning("Truncated record at end of %s", path)
+                return
+            if kind == KIND_SOURCE:
+                names[source_id] = payload.decode('utf-8')
+                continue
+            source = names.get(source_id)
+            if source is None:
+                raise ValueError(f"Frame for undeclared source id {source_id} in {path}")
+            if wanted is not None and source not in wanted:
+                continue
+            yield source, (payload.decode('utf-8') if kind == KIND_TEXT else payload), received_at
+
+class ReplaySource:
+    """
+    Async frame source that replays a session log in place of live websockets
+
+    speed=1.0 keeps the recorded inter-arrival times, speed=N plays N times
+    faster, and speed=None (or 0) replays as fast as the pipeline consumes.
+    Pacing is anchored to the first frame, so sleep overshoot never accumulates.
+    """
+
+    def __init__(self, path: str, speed: Optional[float] = 1.0,
+                 sources: Optional[Iterable[str]] = None, yield_every: int = 1000):
+        if speed is not None and speed < 0:
+            raise ValueError("Replay speed must be positive, or None/0 for as fast as possible")
+        self.path = path
+        self.speed = speed or None
+        self.sources = list(sources) if sources is not None else None
+        self.yield_every = yield_every
+        self.frames = 0
+        self.lag = 0.0
+
+    async def __aiter__(self) -> AsyncIterator[Tuple[str, Frame, float]]:
+        loop = asyncio.get_running_loop()
+        first_recorded = None
+        started = loop.time()
+        for source, frame, received_at in read_session(self.path, self.sources):
+            if self.speed is None:
+                # Let subscriber workers run even when nothing blocks upstream
+                if self.frames % self.yield_every == 0:
+                    await asyncio.sleep(0)
+            else:
+                if first_recorded is None:
+                    first_recorded = received_at
+                    started = loop.time()
+                due = started + (received_at - first_recorded) / self.speed
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                else:
+                    self.lag = max(self.lag, -delay)
+            self.frames += 1
+            yield source, frame, received_at
+
+    def get_stats(self) -> Dict[str, float]:
+        """Frames replayed, plus the worst lag behind schedule in paced modes"""
+        return {'frames': self.frames, 'speed': self.speed, 'max_lag': self.lag}
+
+async def record_session(path: str, symbols: List[str], duration: float) -> Dict[str, float]:
+    """Capture live frames from every source for `duration` seconds"""
+    layer = SensoryDataLayer()
+    engine = layer.ingestion_engine
+    with SessionRecorder(path) as recorder:
+        engine.recorder = recorder
+        ingestion = asyncio.create_task(engine.start_ingestion(symbols))
+        await asyncio.sleep(duration)
+        await engine.stop_ingestion()
+        await ingestion
+        await layer.shutdown()
+        return recorder.get_stats()
+
+async def replay_session(path: str, speed: Optional[float], consensus_mode: str = 'ticks') -> Dict[str, float]:
+    """Replay a session log through a fresh sensory layer and report throughput"""
+    layer = SensoryDataLayer(consensus_mode=consensus_mode)
+    replay = ReplaySource(path, speed)
+    started = time.perf_counter()
+    await layer.ingestion_engine.replay(replay)
+    await layer.shutdown()
+    elapsed = time.perf_counter() - started
+    stats = replay.get_stats()
+    stats.update({
+        'elapsed': elapsed,
+        'frames_per_second': stats['frames'] / elapsed if elapsed else 0.0,
+        'consensus_results': len(layer.consensus_history)
+    })
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay raw market data sessions")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help="Capture live frames to a session log")
+    record.add_argument('path')
+    record.add_argument('--symbols', default='BTC,ETH,SOL,ADA')
+    record.add_argument('--duration', type=float, default=60.0)
+
+    replay = commands.add_parser('replay', help="Replay a session log through the sensory layer")
+    replay.add_argument('path')
+    replay.add_argument('--speed', type=float, default=0.0,
+                        help="1 for real time, N for N times faster, 0 for as fast as possible")
+    replay.add_argument('--consensus-mode', default='ticks', choices=['interval', 'ticks', 'adaptive'])
+    args = parser.parse_args()
+    configure_logging()
+
+    if args.command == 'record':
+        stats = asyncio.run(record_session(args.path, args.symbols.split(','), args.duration))
+        print(f"Recorded {stats['frames']:,} frames ({stats['bytes']:,} bytes) to {args.path}")
+    else:
+        stats = asyncio.run(replay_session(args.path, args.speed, args.consensus_mode))
+        print(f"Replayed {stats['frames']:,} frames in {stats['elapsed']:.2f}s "
+              f"({stats['frames_per_second']:,.0f} frames/s), "
+              f"{stats['consensus_results']:,} consensus results")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,375 @@
+#!/usr/bin/env python3
+"""
+Orion Rangi Sonic Engine - Sharded Sensory Layer
+Multi-process ingestion and analytics with a merging coordinator
+
+Symbols (or sources) are partitioned across worker processes. Each shard runs
+its own SensoryDataLayer, writes ticks into a shared-memory ring and publishes
+the sufficient statistics behind its HRI/SSS. The coordinator merges those
+statistics into the global ConsensusResult.
+
+W.J. McCrea - Reality Protocol LLC
+"""
+
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import queue
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from sensory_data_layer import (
+    ColumnarRingBuffer,
+    MarketDataPoint,
+    SensoryDataLayer,
+    TickColumns,
+    configure_logging,
+    hri_from_stats,
+    merge_hri_stats,
+    merge_sss_stats,
+    sss_from_stats
+)
+
+logger = logging.getLogger(__name__)
+
+# Header slots at the start of each shared ring: head, count, write sequence
+_HEADER_SLOTS = 4
+_HEAD, _COUNT, _SEQUENCE = 0, 1, 2
+
+# Longest pause between snapshot attempts while a write is in progress
+_SNAPSHOT_MAX_BACKOFF = 0.001
+
+# Spawned shards re-import this module (and sensory_data_layer) by name from here
+_MODULE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class SharedColumnarRingBuffer(ColumnarRingBuffer):
+    """
+    ColumnarRingBuffer whose columns live in one shared memory block
+
+    A single writer process appends; other processes attach by name and read
+    with snapshot(), which uses the header's write sequence as a seqlock to
+    avoid torn rows. Symbol and source codes are agreed up front by
+    pre-interning the same name lists on both sides.
+    """
+
+    def __init__(self, capacity: int, symbols: List[str], sources: List[str],
+                 name: Optional[str] = None, create: bool = True):
+        self.capacity = capacity
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=self.block_size(capacity))
+        self._owner = create
+
+        self.header = np.ndarray((_HEADER_SLOTS,), dtype=np.int64, buffer=self.shm.buf)
+        offset = self.header.nbytes
+        columns = {}
+        for column, dtype in (('price', np.float64), ('volume', np.float64), ('change_24h', np.float64),
+                              ('timestamp', np.float64), ('symbol_code', np.int32), ('source_code', np.int32)):
+            columns[column] = np.ndarray((2 * capacity,), dtype=dtype, buffer=self.shm.buf, offset=offset)
+            offset += columns[column].nbytes
+        self.price = columns['price']
+        self.volume = columns['volume']
+        self.change_24h = columns['change_24h']
+        self.timestamp = columns['timestamp']
+        self.symbol_code = columns['symbol_code']
+        self.source_code = columns['source_code']
+        if create:
+            self.header[:] = 0
+
+        self.symbol_names = []
+        self.source_names = []
+        self._symbol_codes = {}
+        self._source_codes = {}
+        for symbol in symbols:
+            self.intern_symbol(symbol)
+        for source in sources:
+            self.intern_source(source)
+
+    @staticmethod
+    def block_size(capacity: int) -> int:
+        return _HEADER_SLOTS * 8 + 2 * capacity * (4 * 8 + 2 * 4)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    # Ring position lives in shared memory so readers in other processes see it
+    @property
+    def _head(self) -> int:
+        return int(self.header[_HEAD])
+
+    @_head.setter
+    def _head(self, value: int):
+        self.header[_HEAD] = value
+
+    @property
+    def _count(self) -> int:
+        return int(self.header[_COUNT])
+
+    @_count.setter
+    def _count(self, value: int):
+        self.header[_COUNT] = value
+
+    def append(self, symbol: str, price: float, volume: float, change_24h: float,
+               timestamp: float, source: str):
+        # Odd sequence marks a write in progress
+        self.header[_SEQUENCE] += 1
+        super().append(symbol, price, volume, change_24h, timestamp, source)
+        self.header[_SEQUENCE] += 1
+
+    def snapshot(self, limit: Optional[int] = None, retries: int = 100) -> TickColumns:
+        """Consistent copy of the last `limit` rows, safe to read from another process"""
+        for attempt in range(retries):
+            if attempt:
+                # Back off so a collision doesn't spin against the writer
+                time.sleep(min(_SNAPSHOT_MAX_BACKOFF, 1e-6 * 2 ** attempt))
+            sequence = int(self.header[_SEQUENCE])
+            if sequence % 2:
+                continue
+            columns = TickColumns(*(np.array(column) for column in self.tail(limit)))
+            if int(self.header[_SEQUENCE]) == sequence:
+                return columns
+        raise RuntimeError(f"Shared ring {self.name} kept changing during snapshot")
+
+    def close(self):
+        # Drop numpy views before releasing the mapping
+        self.header = self.price = self.volume = self.change_24h = None
+        self.timestamp = self.symbol_code = self.source_code = None
+        self.shm.close()
+        if self._owner:
+            self.shm.unlink()
+
+class ShardSpec(NamedTuple):
+    """Symbols and sources handled by one shard process"""
+    index: int
+    symbols: List[str]
+    sources: List[str]
+    ring_name: str
+
+def partition_symbols(symbols: List[str], shards: int) -> List[List[str]]:
+    """Round-robin symbols across shards, dropping empty shards"""
+    parts = [symbols[i::shards] for i in range(shards)]
+    return [part for part in parts if part]
+
+def run_shard(spec: ShardSpec, options: Dict[str, Any], results: Any, stop_event: Any):
+    """Process entry point for one shard"""
+    configure_logging(options.get('log_level', logging.WARNING))
+    asyncio.run(_shard_main(spec, options, results, stop_event))
+
+async def _shard_main(spec: ShardSpec, options: Dict[str, Any], results: Any, stop_event: Any):
+    all_symbols = options['symbols']
+    ring = SharedColumnarRingBuffer(options['buffer_capacity'], all_symbols, options['sources'],
+                                    name=spec.ring_name, create=False)
+    layer = SensoryDataLayer(
+        base_frequency=options['base_frequency'],
+        analysis_window=options['analysis_window'],
+        consensus_mode='interval',
+        consensus_interval=options['publish_interval']
+    )
+    engine = layer.ingestion_engine
+    engine.data_buffer = ring
+    engine.data_sources = {source: options['data_sources'][source] for source in spec.sources}
+
+    async def publish(_consensus_result):
+        results.put({
+            'shard': spec.index,
+            'hri': layer.hri_stream.stats(),
+            'sss': layer.sss_stream.stats(),
+            'latest': dict(engine.latest_ticks),
+            'symbols': list(ring.symbol_names),
+            'ticks': len(ring),
+            'published_at': time.time()
+        })
+
+    layer.add_consensus_callback(publish, queue_size=1, overflow='drop_oldest')
+    ingestion = asyncio.create_task(engine.start_ingestion(spec.symbols))
+
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, stop_event.wait)
+
+    await engine.stop_ingestion()
+    await ingestion
+    await layer.shutdown()
+    ring.close()
+
+class ShardedSensoryLayer(SensoryDataLayer):
+    """
+    Coordinator for a set of shard processes
+
+    Each shard computes HRI/SSS statistics over the last analysis_window ticks
+    of its own partition. The coordinator merges them with merge_hri_stats /
+    merge_sss_stats: moment-based terms are combined exactly, while pairwise
+    price and correlation terms only cover pairs within a shard. The merged
+    HRI therefore depends on the shard count; get_merge_stats reports how
+    many window pairs it leaves out.
+    """
+
+    PARTITIONS = ('symbols', 'sources')
+
+    def __init__(self, shards: int = 2, partition: str = 'symbols',
+                 data_sources: Optional[Dict[str, str]] = None, buffer_capacity: int = 1000,
+                 publish_interval: float = 0.1, **layer_options):
+        super().__init__(**layer_options)
+        if partition not in self.PARTITIONS:
+            raise ValueError(f"Unknown shard partition: {partition}")
+        self.shards = shards
+        self.partition = partition
+        self.data_sources = dict(data_sources or self.ingestion_engine.data_sources)
+        self.buffer_capacity = buffer_capacity
+        self.publish_interval = publish_interval
+
+        self.shard_specs: List[ShardSpec] = []
+        self.shard_rings: List[SharedColumnarRingBuffer] = []
+        self.shard_reports: Dict[int, Dict[str, Any]] = {}
+        self._symbol_shards: Dict[str, List[int]] = {}
+        self._processes: List[mp.Process] = []
+        self._context = mp.get_context('spawn')
+        self._results = self._context.Queue()
+        self._stop_event = self._context.Event()
+        self._running = False
+
+    def _plan_shards(self, symbols: List[str]) -> List[Dict[str, List[str]]]:
+        sources = list(self.data_sources)
+        if self.partition == 'symbols':
+            return [{'symbols': part, 'sources': sources} for part in partition_symbols(symbols, self.shards)]
+        return [{'symbols': symbols, 'sources': part} for part in partition_symbols(sources, self.shards)]
+
+    async def initialize(self, symbols: List[str] = None):
+        """Start shard processes; their results are merged in the background until shutdown"""
+        if symbols is None:
+            symbols = ['BTC', 'ETH', 'SOL', 'ADA']
+        sources = list(self.data_sources)
+
+        options = {
+            'symbols': symbols,
+            'sources': sources,
+            'data_sources': self.data_sources,
+            'base_frequency': self.base_frequency,
+            'analysis_window': self.analysis_window,
+            'buffer_capacity': self.buffer_capacity,
+            'publish_interval': self.publish_interval,
+            'log_level': logger.getEffectiveLevel()
+        }
+
+        # Spawned children inherit sys.path, so pin this directory for their imports
+        # instead of relying on the working directory or relative path entries
+        if _MODULE_DIR not in sys.path:
+            sys.path.append(_MODULE_DIR)
+
+        for index, plan in enumerate(self._plan_shards(symbols)):
+            ring = SharedColumnarRingBuffer(self.buffer_capacity, symbols, sources)
+            spec = ShardSpec(index, plan['symbols'], plan['sources'], ring.name)
+            self.shard_rings.append(ring)
+            self.shard_specs.append(spec)
+            for symbol in spec.symbols:
+                self._symbol_shards.setdefault(symbol, []).append(index)
+
+            process = self._context.Process(
+                target=run_shard, args=(spec, options, self._results, self._stop_event),
+                name=f"sensory-shard-{index}", daemon=True
+            )
+            process.start()
+            self._processes.append(process)
+
+        logger.info("Started %d sensory shards (%s partition)", len(self._processes), self.partition)
+        self._running = True
+        self._ingestion = asyncio.create_task(self._collect_results())
+
+    async def _collect_results(self):
+        loop = asyncio.get_running_loop()
+        while self._running:
+            report = await loop.run_in_executor(None, self._next_report)
+            if report is None:
+                continue
+            self.shard_reports[report['shard']] = report
+            for key, market_data in report['latest'].items():
+                self.ingestion_engine.latest_ticks[key] = market_data
+                latest = self.ingestion_engine.latest_by_symbol.get(market_data.symbol)
+                if latest is None or market_data.timestamp >= latest.timestamp:
+                    self.ingestion_engine.latest_by_symbol[market_data.symbol] = market_data
+            self.ingestion_engine.tick_version += 1
+            self.consensus_scheduler.notify()
+
+    def _next_report(self) -> Optional[Dict[str, Any]]:
+        try:
+            return self._results.get(timeout=0.25)
+        except queue.Empty:
+            return None
+
+    async def _run_consensus(self):
+        """Merge the latest statistics from every shard into one consensus result"""
+        reports = list(self.shard_reports.values())
+        if not reports:
+            return
+        hri_stats = merge_hri_stats([report['hri'] for report in reports])
+        sss_stats = merge_sss_stats([report['sss'] for report in reports])
+        if hri_stats.count < 2:
+            return
+        hri = hri_from_stats(hri_stats, self.hri_calculator.harmonic_weights)
+        sss = sss_from_stats(sss_stats)
+        await self._publish_consensus(hri, sss)
+
+    def get_recent_data(self, symbol: str = None, limit: int = 100) -> List[MarketDataPoint]:
+        """Recent ticks read straight from the shard rings"""
+        shard_indexes = self._symbol_shards.get(symbol, []) if symbol else range(len(self.shard_rings))
+        points = []
+        for index in shard_indexes:
+            ring = self.shard_rings[index]
+            # Pick up symbols the shard interned after start-up
+            report = self.shard_reports.get(index)
+            if report:
+                for name in report['symbols'][len(ring.symbol_names):]:
+                    ring.intern_symbol(name)
+            # Shard rings mix symbols, so symbol queries scan the whole ring
+            columns = ring.snapshot(None if symbol else limit)
+            points.extend(point for point in ring.to_points(columns)
+                          if not symbol or point.symbol == symbol)
+        points.sort(key=lambda point: point.timestamp)
+        return points[-limit:]
+
+    def get_merge_stats(self) -> Dict[str, Any]:
+        """Coverage of the pairwise HRI terms in the merged consensus"""
+        reports = list(self.shard_reports.values())
+        window = sum(report['hri'].count for report in reports)
+        pairs = window * (window - 1) // 2
+        covered = sum(report['hri'].price_pair_count for report in reports)
+        return {
+            'shards': len(reports),
+            'window': window,
+            'pairs_total': pairs,
+            'pairs_covered': covered,
+            # Pairs with one tick in each of two shards never enter the HRI
+            'cross_shard_pairs_excluded': pairs - covered,
+            'pair_coverage': covered / pairs if pairs else 1.0
+        }
+
+    def get_shard_stats(self) -> Dict[int, Dict[str, Any]]:
+        """Per-shard assignment, liveness and last report summary"""
+        stats = {}
+        for spec, process in zip(self.shard_specs, self._processes):
+            report = self.shard_reports.get(spec.index, {})
+            stats[spec.index] = {
+                'symbols': spec.symbols,
+                'sources': spec.sources,
+                'alive': process.is_alive(),
+                'ticks': report.get('ticks', 0),
+                'window': report['hri'].count if report else 0,
+                'published_at': report.get('published_at')
+            }
+        return stats
+
+    async def shutdown(self):
+        """Stop every shard, release shared memory and stop the scheduler"""
+        self._running = False
+        self._stop_event.set()
+        loop = asyncio.get_running_loop()
+        for process in self._processes:
+            await loop.run_in_executor(None, process.join, 10)
+            if process.is_alive():
+                process.terminate()
+        for ring in self.shard_rings:
+            ring.close()
+        await super().shutdown()
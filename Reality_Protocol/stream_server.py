@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Orion Rangi Sonic Engine - Consensus Stream Server
+Push consensus results and per-symbol ticks to websocket and SSE clients
+
+Every update is encoded once and the same frame is written to every client.
+After an initial snapshot message, clients receive deltas that only carry
+the fields that changed since the previous broadcast of the same stream, so
+a client rebuilds state by merging each message into what it already holds:
+
+    {"type": "snapshot", "consensus": {...}, "ticks": {"BTC": {...}, ...}}
+    {"type": "consensus", "hri_value": 71.2, "consensus_timestamp": ...}
+    {"type": "tick", "symbol": "BTC", "price": 64012.5, "timestamp": ...}
+
+Broadcasts never wait on a client: a client whose unsent backlog grows past
+max_buffer bytes is disconnected and has to reconnect for a fresh snapshot.
+
+The HTTP listener serves SSE on /events and the pre-encoded consensus and
+market summary snapshots on /consensus and /summary (with ETag support).
+
+W.J. McCrea - Reality Protocol LLC
+"""
+
+import argparse
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+import websockets
+
+from sensory_data_layer import (
+    ConsensusResult,
+    MarketDataPoint,
+    SensoryDataLayer,
+    Subscription,
+    configure_logging,
+    fast_dumps
+)
+
+logger = logging.getLogger(__name__)
+
+TICK_FIELDS = ('price', 'volume', 'change_24h', 'timestamp', 'source')
+
+def field_delta(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Fields of current that differ from previous (all of them if there is no previous)"""
+    if previous is None:
+        return dict(current)
+    return {name: value for name, value in current.items() if previous.get(name) != value}
+
+class ConsensusStreamServer:
+    """
+    Websocket and SSE broadcaster on top of a SensoryDataLayer
+
+    With conflate_ticks, each tick batch is reduced to the newest tick per
+    symbol before broadcasting, so clients see current prices rather than
+    every intermediate tick.
+    """
+
+    def __init__(self, layer: SensoryDataLayer, host: str = '127.0.0.1', ws_port: int = 8765,
+                 http_port: Optional[int] = 8766, max_buffer: int = 1 << 20,
+                 conflate_ticks: bool = True, tick_batch_size: int = 256):
+        self.layer = layer
+        self.host = host
+        self.ws_port = ws_port
+        self.http_port = http_port
+        self.max_buffer = max_buffer
+        self.conflate_ticks = conflate_ticks
+        self.tick_batch_size = tick_batch_size
+
+        self._ws_clients: Set[Any] = set()
+        self._sse_clients: Set[asyncio.StreamWriter] = set()
+        self._consensus_state: Optional[Dict[str, Any]] = None
+        self._tick_state: Dict[str, Dict[str, Any]] = {}
+
+        self._ws_server = None
+        self._http_server: Optional[asyncio.AbstractServer] = None
+        self._subscriptions: List[Subscription] = []
+
+        # Server statistics
+        self.messages = 0
+        self.bytes_encoded = 0
+        self.evicted = 0
+        self.connections = 0
+
+    async def start(self):
+        """Subscribe to the layer and open the websocket and HTTP listeners"""
+        self._subscriptions = [
+            self.layer.add_consensus_callback(self._on_consensus),
+            self.layer.ingestion_engine.add_callback(
+                self._on_ticks, overflow='drop_oldest', batch_size=self.tick_batch_size
+            )
+        ]
+        self._ws_server = await websockets.serve(self._ws_handler, self.host, self.ws_port)
+        self.ws_port = self._ws_server.sockets[0].getsockname()[1]
+        if self.http_port is not None:
+            self._http_server = await asyncio.start_server(self._http_handler, self.host, self.http_port)
+            self.http_port = self._http_server.sockets[0].getsockname()[1]
+        logger.info("Streaming consensus on ws://%s:%s and http://%s:%s/events",
+                    self.host, self.ws_port, self.host, self.http_port)
+
+    async def stop(self):
+        """Unsubscribe from the layer and disconnect every client"""
+        await self.layer.consensus_callbacks.unsubscribe(self._subscriptions[0])
+        await self.layer.ingestion_engine.callbacks.unsubscribe(self._subscriptions[1])
+        self._subscriptions = []
+
+        self._ws_server.close()
+        await self._ws_server.wait_closed()
+        if self._http_server is not None:
+            self._http_server.close()
+            for writer in list(self._sse_clients):
+                writer.close()
+            self._sse_clients.clear()
+            await self._http_server.wait_closed()
+
+    # Broadcasting
+
+    async def _on_consensus(self, result: ConsensusResult):
+        state = {
+            'hri_value': result.hri_value,
+            'sss_value': result.sss_value,
+            'harmonic_quality': result.harmonic_quality,
+            'consensus_timestamp': result.consensus_timestamp,
+            'participating_nodes': result.participating_nodes,
+            'validation_signatures': result.validation_signatures
+        }
+        delta = field_delta(self._consensus_state, state)
+        self._consensus_state = state
+        if delta:
+            delta['type'] = 'consensus'
+            self._broadcast('consensus', delta)
+            self._evict_slow_clients()
+
+    async def _on_ticks(self, batch: List[MarketDataPoint]):
+        if self.conflate_ticks:
+            batch = list({market_data.symbol: market_data for market_data in batch}.values())
+        for market_data in batch:
+            state = {name: getattr(market_data, name) for name in TICK_FIELDS}
+            delta = field_delta(self._tick_state.get(market_data.symbol), state)
+            self._tick_state[market_data.symbol] = state
+            if delta:
+                delta['type'] = 'tick'
+                delta['symbol'] = market_data.symbol
+                self._broadcast('tick', delta)
+        self._evict_slow_clients()
+
+    def _broadcast(self, event: str, message: Dict[str, Any]):
+        """Encode one message and hand the same frame to every client"""
+        body = fast_dumps(message)
+        self.messages += 1
+        self.bytes_encoded += len(body)
+        if self._ws_clients:
+            websockets.broadcast(self._ws_clients, body.decode('utf-8'))
+        if self._sse_clients:
+            frame = b'event: ' + event.encode('ascii') + b'\ndata: ' + body + b'\n\n'
+            for writer in self._sse_clients:
+                writer.write(frame)
+
+    def _evict_slow_clients(self):
+        """Drop clients whose unsent backlog exceeds max_buffer bytes"""
+        for websocket in [ws for ws in self._ws_clients if ws.transport.get_write_buffer_size() > self.max_buffer]:
+            self._ws_clients.discard(websocket)
+            websocket.transport.abort()
+            self.evicted += 1
+        for writer in [w for w in self._sse_clients if w.transport.get_write_buffer_size() > self.max_buffer]:
+            self._sse_clients.discard(writer)
+            writer.transport.abort()
+            self.evicted += 1
+
+    def _snapshot_message(self) -> bytes:
+        return fast_dumps({
+            'type': 'snapshot',
+            'consensus': self._consensus_state,
+            'ticks': self._tick_state
+        })
+
+    # Websocket clients
+
+    async def _ws_handler(self, websocket, *_):
+        # Snapshot and registration happen without yielding, so no delta can slip in between
+        websockets.broadcast([websocket], self._snapshot_message().decode('utf-8'))
+        self._ws_clients.add(websocket)
+        self.connections += 1
+        try:
+            # Clients only listen; drain anything they send so control frames keep flowing
+            async for _ in websocket:
+                pass
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self._ws_clients.discard(websocket)
+
+    # HTTP clients
+
+    async def _http_handler(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 10.0)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+            writer.close()
+            return
+
+        lines = request.decode('latin-1').split('\r\n')
+        parts = lines[0].split(' ')
+        path = parts[1].split('?', 1)[0] if len(parts) > 1 else ''
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(':')
+            if name:
+                headers[name.strip().lower()] = value.strip()
+
+        if path == '/events':
+            await self._serve_events(reader, writer)
+            return
+
+        if path == '/consensus':
+            snapshot = self.layer.get_consensus_snapshot()
+        elif path == '/summary':
+            snapshot = self.layer.get_market_summary_snapshot()
+        else:
+            snapshot = None
+
+        if snapshot is None:
+            writer.write(b'HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n')
+        elif headers.get('if-none-match') == snapshot.etag:
+            writer.write(b'HTTP/1.1 304 Not Modified\r\nETag: ' + snapshot.etag.encode('ascii') +
+                         b'\r\nConnection: close\r\n\r\n')
+        else:
+            writer.write(
+                b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nETag: ' + snapshot.etag.encode('ascii') +
+                b'\r\nContent-Length: ' + str(len(snapshot.body)).encode('ascii') +
+                b'\r\nConnection: close\r\n\r\n' + snapshot.body
+            )
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _serve_events(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        writer.write(
+            b'HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n'
+            b'Connection: keep-alive\r\n\r\n'
+            b'event: snapshot\ndata: ' + self._snapshot_message() + b'\n\n'
+        )
+        self._sse_clients.add(writer)
+        self.connections += 1
+        try:
+            # SSE is one-way; the read only returns once the client goes away
+            await reader.read()
+        except ConnectionError:
+            pass
+        finally:
+            self._sse_clients.discard(writer)
+            writer.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'websocket_clients': len(self._ws_clients),
+            'sse_clients': len(self._sse_clients),
+            'connections': self.connections,
+            'messages': self.messages,
+            'bytes_encoded': self.bytes_encoded,
+            'evicted': self.evicted
+        }
+
+async def serve(symbols: List[str], host: str, ws_port: int, http_port: int):
+    """Run a sensory layer with its stream server until cancelled"""
+    layer = SensoryDataLayer()
+    server = ConsensusStreamServer(layer, host, ws_port, http_port)
+    await server.start()
+    try:
+        await layer.initialize(symbols)
+        await layer.wait_closed()
+    finally:
+        await server.stop()
+        await layer.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream consensus results and ticks to websocket/SSE clients")
+    parser.add_argument('--symbols', default='BTC,ETH,SOL,ADA')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--ws-port', type=int, default=8765)
+    parser.add_argument('--http-port', type=int, default=8766)
+    args = parser.parse_args()
+    configure_logging()
+    asyncio.run(serve(args.symbols.split(','), args.host, args.ws_port, args.http_port))
+
+if __name__ == "__main__":
+    main()
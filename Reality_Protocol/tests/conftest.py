@@ -0,0 +1,24 @@
+"""Shared test setup: import the engine modules and load recorded frames"""
+
+import os
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+FIXTURES = os.path.join(HERE, 'fixtures')
+
+def load_frames(name):
+    """Raw websocket frames recorded from an exchange, one per line"""
+    with open(os.path.join(FIXTURES, name)) as f:
+        return [line.rstrip('\n') for line in f if line.strip()]
+
+@pytest.fixture
+def binance_frames():
+    return load_frames('binance_frames.jsonl')
+
+@pytest.fixture
+def kraken_frames():
+    return load_frames('kraken_frames.jsonl')
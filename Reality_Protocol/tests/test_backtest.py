@@ -0,0 +1,71 @@
+"""Vectorized rolling backtest against the live calculators, window by window"""
+
+import csv
+import random
+
+import numpy as np
+import pytest
+
+from backtest import NUMERIC_COLUMNS, BacktestEngine
+from sensory_data_layer import HarmonicResonanceCalculator, MarketDataPoint, SonicStabilityCalculator
+
+# Small weights keep HRI well below the clip at 100, so differences cannot hide there
+WEIGHTS = {'price': 0.12, 'volume': 0.1, 'volatility': 0.08, 'momentum': 0.1}
+WINDOW = 20
+
+def random_ticks(count, seed):
+    rng = random.Random(seed)
+    price = 100.0
+    timestamp = 1_700_000_000.0
+    points = []
+    for _ in range(count):
+        price *= 1 + rng.gauss(0, 0.02)
+        timestamp += rng.expovariate(1.0)
+        points.append(MarketDataPoint('BTC', price, 10 ** rng.uniform(2, 5), rng.uniform(-20, 20),
+                                      timestamp, 'test'))
+    return points
+
+def columns(points):
+    return {name: np.array([getattr(point, name) for point in points]) for name in NUMERIC_COLUMNS}
+
+def test_matches_live_calculators_for_every_window():
+    points = random_ticks(120, seed=11)
+    hri_calculator = HarmonicResonanceCalculator()
+    hri_calculator.harmonic_weights = dict(WEIGHTS)
+    sss_calculator = SonicStabilityCalculator()
+    results = BacktestEngine(window=WINDOW, harmonic_weights=WEIGHTS).compute_windows(columns(points))
+
+    assert len(results['hri']) == len(points) - WINDOW + 1
+    assert 5.0 < np.min(results['hri']) and np.max(results['hri']) < 95.0
+    for end in range(WINDOW, len(points) + 1):
+        window = points[end - WINDOW:end]
+        row = end - WINDOW
+        assert results['timestamp'][row] == window[-1].timestamp
+        assert results['hri'][row] == pytest.approx(hri_calculator.calculate_hri(window), rel=1e-9)
+        assert results['sss'][row] == pytest.approx(sss_calculator.calculate_sss(window), rel=1e-9, abs=1e-9)
+
+def test_zero_price_windows_are_nan():
+    points = random_ticks(40, seed=3)
+    ticks = columns(points)
+    ticks['price'][25] = 0.0
+    results = BacktestEngine(window=WINDOW).compute_windows(ticks)
+    nan_rows = np.flatnonzero(np.isnan(results['hri']))
+    assert list(nan_rows) == list(range(25 - WINDOW + 1, len(points) - WINDOW + 1))
+
+def test_chunked_run_matches_one_pass(tmp_path):
+    points = random_ticks(150, seed=5)
+    source = tmp_path / 'ticks.csv'
+    with open(source, 'w', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['symbol', 'price', 'volume', 'change_24h', 'timestamp', 'source'])
+        for point in points:
+            writer.writerow([point.symbol, repr(point.price), repr(point.volume), repr(point.change_24h),
+                             repr(point.timestamp), point.source])
+    output = tmp_path / 'results.csv'
+    engine = BacktestEngine(window=WINDOW, chunk_size=37)
+
+    assert engine.run(str(source), str(output)) == len(points) - WINDOW + 1
+    written = np.loadtxt(output, delimiter=',', skiprows=1)
+    expected = engine.compute_windows(columns(points))
+    np.testing.assert_allclose(written[:, 1], expected['hri'], rtol=1e-9)
+    np.testing.assert_allclose(written[:, 2], expected['sss'], rtol=1e-9)
@@ -0,0 +1,67 @@
+"""Bar resampling: boundaries, carry-forward of quiet intervals, late ticks and flush"""
+
+from sensory_data_layer import BarResampler, MarketDataPoint, OHLCVBar
+
+def tick(symbol, price, timestamp, volume=1000.0):
+    return MarketDataPoint(symbol, price, volume, 2.0, timestamp, 'binance')
+
+def test_bar_closes_when_a_tick_lands_exactly_on_the_boundary():
+    resampler = BarResampler(interval=1.0)
+    assert resampler.update(tick('BTC', 100.0, 10.0)) == []
+    assert resampler.update(tick('BTC', 103.0, 10.4)) == []
+    assert resampler.update(tick('BTC', 99.0, 10.999)) == []
+    # A tick at the boundary starts the next bar instead of joining the open one
+    closed = resampler.update(tick('BTC', 101.0, 11.0, volume=1200.0))
+    assert closed == [OHLCVBar('BTC', 10.0, 100.0, 103.0, 99.0, 99.0, 1000.0, 2.0, 3, 'binance')]
+    assert resampler.flush() == [OHLCVBar('BTC', 11.0, 101.0, 101.0, 101.0, 101.0, 1200.0, 2.0, 1, 'binance')]
+
+def test_empty_intervals_are_carried_forward():
+    resampler = BarResampler(interval=1.0)
+    resampler.update(tick('BTC', 100.0, 10.2))
+    resampler.update(tick('BTC', 104.0, 10.8))
+    closed = resampler.update(tick('BTC', 90.0, 13.5))
+
+    assert [bar.timestamp for bar in closed] == [10.0, 11.0, 12.0]
+    assert closed[0].ticks == 2 and closed[0].close == 104.0
+    for bar in closed[1:]:
+        assert bar.ticks == 0
+        assert bar.open == bar.high == bar.low == bar.close == 104.0
+        assert bar.volume == 1000.0 and bar.source == 'binance'
+    assert resampler.bars('BTC') == closed
+
+def test_quiet_symbols_close_with_the_busy_one_in_time_then_symbol_order():
+    resampler = BarResampler(interval=5.0)
+    resampler.update(tick('SOL', 20.0, 0.0))
+    resampler.update(tick('BTC', 100.0, 1.0))
+    closed = resampler.update(tick('BTC', 101.0, 6.0))
+    closed += resampler.update(tick('BTC', 102.0, 12.0))
+
+    assert [(bar.timestamp, bar.symbol, bar.ticks) for bar in closed] == [
+        (0.0, 'BTC', 1), (0.0, 'SOL', 1), (5.0, 'BTC', 1), (5.0, 'SOL', 0)]
+    assert closed[-1].close == 20.0
+
+def test_late_ticks_fold_into_the_open_bar():
+    resampler = BarResampler(interval=1.0)
+    resampler.update(tick('BTC', 100.0, 10.0))
+    resampler.update(tick('BTC', 101.0, 11.0))
+    assert resampler.update(tick('BTC', 98.0, 10.5)) == []
+    assert resampler.late_ticks == 1
+    (bar,) = resampler.flush()
+    assert (bar.timestamp, bar.low, bar.close, bar.ticks) == (11.0, 98.0, 98.0, 2)
+
+def test_long_gaps_are_back_filled_only_up_to_max_gap_bars():
+    resampler = BarResampler(interval=1.0, max_gap_bars=3)
+    resampler.update(tick('BTC', 100.0, 0.0))
+    closed = resampler.update(tick('BTC', 101.0, 100.0))
+    assert [bar.timestamp for bar in closed] == [0.0, 97.0, 98.0, 99.0]
+
+def test_flush_and_history_limits():
+    resampler = BarResampler(interval=1.0, history=3)
+    assert resampler.flush() == []
+    for second in range(6):
+        resampler.update(tick('BTC', 100.0 + second, second + 0.5))
+    assert len(resampler.flush()) == 1
+    assert resampler.flush() == []
+    assert [bar.close for bar in resampler.bars('BTC')] == [103.0, 104.0, 105.0]
+    assert [bar.close for bar in resampler.bars('BTC', limit=1)] == [105.0]
+    assert resampler.bars('BTC', limit=0) == [] and resampler.bars('ETH') == []
@@ -0,0 +1,58 @@
+"""ConsensusHistory: raw ring and 1s/1m/1h rollups"""
+
+import numpy as np
+import pytest
+
+from sensory_data_layer import ConsensusHistory, ConsensusResult
+
+START = 1_700_000_000.0
+STEP = 0.5
+# Two and a half hours of results, well past the raw ring and the 1s rollup's hour
+COUNT = int(2.5 * 3600 / STEP)
+END = START + COUNT * STEP
+
+@pytest.fixture(scope='module')
+def history():
+    history = ConsensusHistory(capacity=200)
+    for i in range(COUNT):
+        history.append(ConsensusResult(50 + 10 * np.sin(i / 50), 30 + (i % 7), 60.0, START + i * STEP, 1, []))
+    return history
+
+@pytest.fixture(scope='module')
+def raw():
+    i = np.arange(COUNT)
+    return START + i * STEP, 50 + 10 * np.sin(i / 50)
+
+def test_recent_span_uses_raw_results(history, raw):
+    series = history.series(END - 30, END)
+    assert series['resolution'] == 'raw'
+    assert series['timestamp'] == raw[0][-60:].tolist()
+    assert series['hri'] == pytest.approx(raw[1][-60:].tolist())
+
+def test_span_past_the_raw_ring_uses_seconds(history):
+    series = history.series(END - 300, END)
+    assert series['resolution'] == '1s'
+    assert len(series['timestamp']) == 300
+    assert set(series['count']) == {2}
+
+def test_span_past_the_second_rollup_uses_minutes(history, raw):
+    series = history.series(END - 2 * 3600, END)
+    assert series['resolution'] == '1m'
+    assert len(series['timestamp']) == 120
+    timestamps, hri = raw
+    for bucket, start in enumerate(series['timestamp'][:5]):
+        inside = (timestamps >= start) & (timestamps < start + 60)
+        assert series['count'][bucket] == inside.sum()
+        assert series['hri'][bucket] == pytest.approx(hri[inside].mean())
+        assert series['hri_min'][bucket] == hri[inside].min()
+        assert series['hri_max'][bucket] == hri[inside].max()
+
+def test_long_span_with_few_points_uses_hours(history):
+    series = history.series(END - 2 * 3600, END, max_points=100)
+    assert series['resolution'] == '1h'
+    assert series['timestamp'] == [3600.0 * (START // 3600 + h) for h in range(1, 3)]
+
+def test_ring_keeps_the_latest_results(history, raw):
+    assert len(history) == 200
+    assert history[-1].consensus_timestamp == raw[0][-1]
+    assert [result.consensus_timestamp for result in history][0] == raw[0][-200]
@@ -0,0 +1,146 @@
+"""
+Binance and Kraken adapters against recorded frames
+
+The decoders are checked frame by frame, then the full engine is pointed at a
+local websocket stand-in that replays the recordings and drops the connection,
+so subscription, decoding and the reconnect supervisor run end to end.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+websockets = pytest.importorskip('websockets')
+
+from sensory_data_layer import (BinanceTickerDecoder, KrakenTickerDecoder,
+                                MarketDataIngestionEngine)
+
+def binance_tickers(frames):
+    events = [json.loads(frame) for frame in frames]
+    return [event.get('data', event) for event in events
+            if event.get('data', event).get('e') == '24hrTicker']
+
+def kraken_tickers(frames):
+    messages = [json.loads(frame) for frame in frames]
+    return [message for message in messages if isinstance(message, list)]
+
+def test_binance_decoder_matches_recording(binance_frames):
+    decoder = BinanceTickerDecoder()
+    rows = [decoder.decode(frame, 1.0) for frame in binance_frames]
+    rows = [row for row in rows if row is not None]
+    tickers = binance_tickers(binance_frames)
+    
+    assert len(rows) == len(tickers)
+    for row, ticker in zip(rows, tickers):
+        assert row == (ticker['s'][:-4], float(ticker['c']), float(ticker['v']),
+                       float(ticker['P']), 1.0, 'binance')
+
+def test_binance_decoder_accepts_bytes(binance_frames):
+    decoder = BinanceTickerDecoder()
+    text = [decoder.decode(frame, 1.0) for frame in binance_frames]
+    raw = [decoder.decode(frame.encode(), 1.0) for frame in binance_frames]
+    assert raw == text
+
+def test_kraken_decoder_matches_recording(kraken_frames):
+    decoder = KrakenTickerDecoder()
+    rows = [decoder.decode(frame, 2.0) for frame in kraken_frames]
+    rows = [row for row in rows if row is not None]
+    tickers = kraken_tickers(kraken_frames)
+    
+    assert len(rows) == len(tickers)
+    assert {row[0] for row in rows} == {'BTC', 'ETH', 'DOGE'}
+    for row, (_, payload, _, pair) in zip(rows, tickers):
+        price = float(payload['c'][0])
+        open_24h = float(payload['o'][1])
+        assert row[1] == price
+        assert row[2] == float(payload['v'][1])
+        assert row[3] == pytest.approx((price - open_24h) / open_24h * 100)
+        assert row[5] == 'kraken'
+
+def test_subscribe_messages_cover_every_symbol():
+    symbols = ['BTC', 'ETH', 'DOGE']
+    assert BinanceTickerDecoder().subscribe_message(symbols)['params'] == [
+        'btcusdt@ticker', 'ethusdt@ticker', 'dogeusdt@ticker']
+    assert KrakenTickerDecoder().subscribe_message(symbols)['pair'] == [
+        'XBT/USD', 'ETH/USD', 'XDG/USD']
+
+class ReplayServer:
+    """Websocket stand-in that replays a recording, then hangs up"""
+    
+    def __init__(self, frames):
+        self.frames = frames
+        self.subscriptions = []
+        self.server = None
+        
+    async def handler(self, websocket):
+        self.subscriptions.append(json.loads(await websocket.recv()))
+        for frame in self.frames:
+            await websocket.send(frame)
+        await websocket.close()
+    
+    async def __aenter__(self):
+        self.server = await websockets.serve(self.handler, '127.0.0.1', 0)
+        return self
+    
+    async def __aexit__(self, *exc):
+        self.server.close()
+        await self.server.wait_closed()
+    
+    @property
+    def url(self):
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"ws://{host}:{port}"
+
+async def run_source(source, frames, symbols, sessions=2):
+    """Ingest from a replay server until `sessions` full recordings arrived"""
+    engine = MarketDataIngestionEngine(reconnect_base_delay=0.01, reconnect_max_delay=0.05,
+                                       heartbeat_timeout=5.0)
+    ticks = []
+    engine.add_callback(ticks.append)
+    
+    async with ReplayServer(frames) as server:
+        engine.data_sources = {source: server.url}
+        per_session = sum(engine.decoders[source].decode(frame, 0.0) is not None for frame in frames)
+        task = asyncio.create_task(engine.start_ingestion(symbols))
+        try:
+            async def received():
+                while len(ticks) < per_session * sessions:
+                    await asyncio.sleep(0.01)
+            await asyncio.wait_for(received(), 10.0)
+        finally:
+            await engine.stop_ingestion()
+            await task
+            await engine.callbacks.close()
+    return engine, server, ticks, per_session
+
+def test_binance_replay_reconnects_and_resubscribes(binance_frames):
+    engine, server, ticks, per_session = asyncio.run(
+        run_source('binance', binance_frames, ['BTC', 'ETH', 'DOGE']))
+    
+    health = engine.source_health['binance']
+    assert health.connects >= 2
+    assert health.reconnects >= 1
+    assert len(server.subscriptions) >= 2
+    assert all(message['method'] == 'SUBSCRIBE' for message in server.subscriptions)
+    
+    tickers = binance_tickers(binance_frames)
+    first = ticks[:per_session]
+    assert [tick.symbol for tick in first] == [ticker['s'][:-4] for ticker in tickers]
+    assert [tick.price for tick in first] == [float(ticker['c']) for ticker in tickers]
+    assert [tick.change_24h for tick in first] == [float(ticker['P']) for ticker in tickers]
+    assert engine.latest_by_symbol['BTC'].source == 'binance'
+
+def test_kraken_replay_reconnects_and_resubscribes(kraken_frames):
+    engine, server, ticks, per_session = asyncio.run(
+        run_source('kraken', kraken_frames, ['BTC', 'ETH', 'DOGE']))
+    
+    health = engine.source_health['kraken']
+    assert health.connects >= 2
+    assert health.reconnects >= 1
+    assert all(message['pair'] == ['XBT/USD', 'ETH/USD', 'XDG/USD'] for message in server.subscriptions)
+    
+    tickers = kraken_tickers(kraken_frames)
+    first = ticks[:per_session]
+    assert [tick.price for tick in first] == [float(payload['c'][0]) for _, payload, _, _ in tickers]
+    assert set(engine.latest_by_symbol) == {'BTC', 'ETH', 'DOGE'}
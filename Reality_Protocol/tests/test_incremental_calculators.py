@@ -0,0 +1,122 @@
+"""Streaming HRI/SSS calculators against full recomputes of the same window"""
+
+import random
+
+import numpy as np
+import pytest
+
+from sensory_data_layer import (DRIFT_REBUILDS_PER_WINDOW, HarmonicResonanceCalculator, IncrementalHRICalculator,
+                                IncrementalSSSCalculator, MarketDataPoint, RunningMoments,
+                                SonicStabilityCalculator)
+
+# Absolute tolerance on the 0-100 HRI/SSS scale, as documented on the calculators
+TOLERANCE = 1e-9
+
+def ticks(count, seed, volume_decades=3):
+    rng = random.Random(seed)
+    price = 100.0
+    timestamp = 1_700_000_000.0
+    for _ in range(count):
+        price *= 1 + rng.gauss(0, 0.01)
+        timestamp += rng.expovariate(2.0)
+        yield MarketDataPoint('BTC', price, 10 ** rng.uniform(0, volume_decades),
+                              rng.uniform(-60, 60), timestamp, 'test')
+
+def assert_tracks_batch(window, points, resync_interval=1000, every=1):
+    hri = HarmonicResonanceCalculator()
+    sss = SonicStabilityCalculator()
+    incremental_hri = IncrementalHRICalculator(hri, window, resync_interval)
+    incremental_sss = IncrementalSSSCalculator(sss, window, resync_interval)
+    recent = []
+    for i, point in enumerate(points):
+        recent = (recent + [point])[-window:]
+        hri_value = incremental_hri.update(point)
+        sss_value = incremental_sss.update(point)
+        if i % every == 0:
+            assert hri_value == pytest.approx(hri.calculate_hri(recent), abs=TOLERANCE)
+            assert sss_value == pytest.approx(sss.calculate_sss(recent), abs=TOLERANCE)
+
+@pytest.mark.parametrize('window, every', [(2, 1), (5, 1), (50, 1), (300, 37)])
+def test_tracks_batch_calculators(window, every):
+    assert_tracks_batch(window, ticks(1500, seed=window), every=every)
+
+def test_hri_is_not_saturated_by_the_test_stream():
+    # Guards the comparison above against both sides clamping to 0 or 100
+    values = [IncrementalHRICalculator(HarmonicResonanceCalculator(), 50).update(point)
+              for point in ticks(200, seed=1)]
+    assert 1.0 < np.median(values) < 99.0
+
+@pytest.mark.parametrize('window', [3, 5, 8])
+def test_small_windows_with_extreme_volumes_stay_within_tolerance(window):
+    # Twelve decades of volume; periodic resync disabled, so only drift detection helps
+    assert_tracks_batch(window, ticks(3000, seed=window, volume_decades=12), resync_interval=10 ** 9)
+
+def test_large_mean_low_variance_stream_does_not_resync_every_tick():
+    # Volume ~15000 +/- 0.01 drifting slowly upwards, timestamps ~1s apart
+    rng = random.Random(7)
+    window = 500
+    hri = HarmonicResonanceCalculator()
+    sss = SonicStabilityCalculator()
+    incremental_hri = IncrementalHRICalculator(hri, window, resync_interval=10 ** 9)
+    incremental_sss = IncrementalSSSCalculator(sss, window, resync_interval=10 ** 9)
+    resyncs = []
+    incremental_hri.resync = lambda: resyncs.append('hri')
+    incremental_sss.resync = lambda: resyncs.append('sss')
+    points = []
+    price, timestamp = 100.0, 1_700_000_000.0
+    for i in range(3000):
+        price *= 1 + rng.gauss(0, 0.001)
+        timestamp += 1.0 + rng.uniform(-1e-3, 1e-3)
+        points.append(MarketDataPoint('BTC', price, 15000 + i * 1e-4 + rng.uniform(-0.01, 0.01),
+                                      rng.uniform(-5, 5), timestamp, 'test'))
+        incremental_hri.update(points[-1])
+        incremental_sss.update(points[-1])
+    assert resyncs == []
+    assert incremental_hri.moment_rebuilds + incremental_sss.moment_rebuilds <= 3000 // window
+    recent = points[-window:]
+    assert incremental_hri.value() == pytest.approx(hri.calculate_hri(recent), abs=TOLERANCE)
+    assert incremental_sss.value() == pytest.approx(sss.calculate_sss(recent), abs=TOLERANCE)
+    assert incremental_sss._volume.std == pytest.approx(np.std([p.volume for p in recent]), rel=1e-9)
+
+def test_drift_rebuilds_are_rate_limited(monkeypatch):
+    # Moments that always report drift still get rebuilt only every window / DRIFT_REBUILDS_PER_WINDOW ticks
+    monkeypatch.setattr(RunningMoments, 'drifted', property(lambda self: True))
+    window = 64
+    incremental_hri = IncrementalHRICalculator(HarmonicResonanceCalculator(), window, resync_interval=10 ** 9)
+    incremental_sss = IncrementalSSSCalculator(SonicStabilityCalculator(), window, resync_interval=10 ** 9)
+    for point in ticks(1000, seed=3):
+        incremental_hri.update(point)
+        incremental_sss.update(point)
+    expected = 1000 // (window // DRIFT_REBUILDS_PER_WINDOW)
+    assert incremental_hri.moment_rebuilds == incremental_sss.moment_rebuilds == expected
+
+def test_removing_an_outsized_sample_flags_drift():
+    moments = RunningMoments()
+    for value in (1e12, 3.0, 4.0, 5.0):
+        moments.add(value)
+    assert not moments.drifted
+    moments.remove(1e12)
+    assert moments.drifted
+
+def test_identical_samples_have_zero_spread_after_removal():
+    moments = RunningMoments()
+    for value in (1e9, 7.0, 7.0, 7.0):
+        moments.add(value)
+    moments.remove(1e9)
+    assert moments.std == 0.0
+    assert moments.mean == pytest.approx(7.0)
+
+def test_merged_moments_match_numpy():
+    rng = np.random.default_rng(0)
+    parts = [rng.lognormal(5, 2, size) for size in (1, 7, 40)]
+    moments = []
+    for values in parts:
+        part = RunningMoments()
+        for value in values:
+            part.add(float(value))
+        moments.append(part)
+    merged = RunningMoments.merged(moments)
+    combined = np.concatenate(parts)
+    assert merged.count == len(combined)
+    assert merged.mean == pytest.approx(np.mean(combined), rel=1e-12)
+    assert merged.std == pytest.approx(np.std(combined), rel=1e-12)
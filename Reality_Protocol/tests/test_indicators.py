@@ -0,0 +1,104 @@
+"""Live indicator state against the batch series and plain reference loops"""
+
+import numpy as np
+import pytest
+
+from indicators import IndicatorBank, IndicatorState, bollinger, ema, macd, rsi
+
+def prices(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+
+def reference_ema(values, period):
+    alpha = 2.0 / (period + 1)
+    out = []
+    for value in values:
+        out.append(value if not out else out[-1] + alpha * (value - out[-1]))
+    return np.array(out)
+
+def reference_rsi(values, period):
+    out = [np.nan] * len(values)
+    changes = np.diff(values)
+    if len(changes) < period:
+        return np.array(out)
+    avg_gain = np.mean(np.maximum(changes[:period], 0))
+    avg_loss = np.mean(np.maximum(-changes[:period], 0))
+    for i in range(period, len(values)):
+        if i > period:
+            change = changes[i - 1]
+            avg_gain = (avg_gain * (period - 1) + max(change, 0)) / period
+            avg_loss = (avg_loss * (period - 1) + max(-change, 0)) / period
+        out[i] = 100.0 if avg_loss == 0 else 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    return np.array(out)
+
+def live_series(values):
+    state = IndicatorState()
+    readings = [state.update(value) for value in values.tolist()]
+    nan = float('nan')
+    return {
+        'macd': np.array([reading.macd.macd for reading in readings]),
+        'signal': np.array([reading.macd.signal for reading in readings]),
+        'rsi': np.array([nan if reading.rsi is None else reading.rsi for reading in readings]),
+        'bollinger_middle': np.array([nan if reading.bollinger is None else reading.bollinger.middle
+                                      for reading in readings]),
+        'bollinger_upper': np.array([nan if reading.bollinger is None else reading.bollinger.upper
+                                     for reading in readings]),
+    }
+
+def test_batch_ema_matches_reference_across_blocks():
+    # Long enough that the blockwise closed form spans several blocks
+    values = prices(5000)
+    for period in (2, 12, 200):
+        np.testing.assert_allclose(ema(values, period), reference_ema(values, period), rtol=1e-10)
+
+def test_batch_rsi_matches_wilder_reference():
+    values = prices(800, seed=1)
+    np.testing.assert_allclose(rsi(values, 14), reference_rsi(values, 14), rtol=1e-9, equal_nan=True)
+
+def test_batch_bollinger_matches_rolling_std():
+    values = prices(300, seed=2)
+    middle, upper, lower = bollinger(values, 20, 2.0)
+    assert np.isnan(middle[:19]).all()
+    for end in range(20, len(values) + 1):
+        window = values[end - 20:end]
+        assert middle[end - 1] == pytest.approx(window.mean(), rel=1e-12)
+        assert upper[end - 1] == pytest.approx(window.mean() + 2 * window.std(), rel=1e-12)
+        assert lower[end - 1] == pytest.approx(window.mean() - 2 * window.std(), rel=1e-12)
+
+def test_live_updates_match_batch_series():
+    values = prices(3000, seed=3)
+    live = live_series(values)
+    line, signal, _ = macd(values)
+    middle, upper, _ = bollinger(values)
+    np.testing.assert_allclose(live['macd'], line, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(live['signal'], signal, rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(live['rsi'], rsi(values), rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(live['bollinger_middle'], middle, rtol=1e-9, equal_nan=True)
+    np.testing.assert_allclose(live['bollinger_upper'], upper, rtol=1e-9, equal_nan=True)
+
+@pytest.mark.parametrize('history', [1, 5, 14, 15, 19, 20, 500])
+def test_backfill_then_live_equals_live_only(history):
+    values = prices(history + 100, seed=history)
+    bank = IndicatorBank()
+    bank.backfill('BTC', values[:history])
+    continued = [bank.update('BTC', value) for value in values[history:].tolist()]
+    
+    reference = IndicatorState()
+    expected = [reference.update(value) for value in values.tolist()][history:]
+    for got, want in zip(continued, expected):
+        assert got.macd.macd == pytest.approx(want.macd.macd, rel=1e-9, abs=1e-12)
+        assert got.macd.signal == pytest.approx(want.macd.signal, rel=1e-9, abs=1e-12)
+        assert (got.rsi is None) == (want.rsi is None)
+        if want.rsi is not None:
+            assert got.rsi == pytest.approx(want.rsi, rel=1e-9)
+        assert (got.bollinger is None) == (want.bollinger is None)
+        if want.bollinger is not None:
+            assert got.bollinger.upper == pytest.approx(want.bollinger.upper, rel=1e-9)
+
+def test_flat_prices_are_neutral():
+    state = IndicatorState()
+    for _ in range(40):
+        reading = state.update(42.0)
+    assert reading.rsi == 50.0
+    assert reading.bollinger.upper == reading.bollinger.lower == 42.0
+    assert reading.macd.macd == 0.0
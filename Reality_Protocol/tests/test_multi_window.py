@@ -0,0 +1,144 @@
+"""Multi-window scopes against the single-window incremental calculators"""
+
+import random
+
+import pytest
+
+from multi_window import GLOBAL_SCOPE, MultiWindowConsensus
+from sensory_data_layer import (DRIFT_REBUILDS_PER_WINDOW, HarmonicResonanceCalculator,
+                                IncrementalHRICalculator, IncrementalSSSCalculator,
+                                MarketDataPoint, RunningMoments, SonicStabilityCalculator)
+
+TOLERANCE = 1e-9
+
+def interleaved(count, symbols, seed):
+    """Ticks of several symbols at very different price levels, randomly interleaved"""
+    rng = random.Random(seed)
+    prices = {symbol: 10.0 ** index for index, symbol in enumerate(symbols)}
+    timestamp = 1_700_000_000.0
+    for _ in range(count):
+        symbol = rng.choice(symbols)
+        prices[symbol] *= 1 + rng.gauss(0, 0.01)
+        timestamp += rng.expovariate(4.0)
+        yield MarketDataPoint(symbol, prices[symbol], 10 ** rng.uniform(2, 5),
+                              rng.uniform(-40, 40), timestamp, 'test')
+
+class Reference:
+    """Incremental calculators fed with one scope's ticks"""
+    
+    def __init__(self, window):
+        self.hri = IncrementalHRICalculator(HarmonicResonanceCalculator(), window)
+        self.sss = IncrementalSSSCalculator(SonicStabilityCalculator(), window)
+        
+    def update(self, market_data):
+        return self.hri.update(market_data), self.sss.update(market_data)
+
+def assert_matches(result, reference, hri, sss):
+    assert result is not None
+    assert result.count == len(reference.hri)
+    assert result.hri == pytest.approx(hri, abs=TOLERANCE)
+    assert result.sss == pytest.approx(sss, abs=TOLERANCE)
+
+@pytest.mark.parametrize('resync_interval', [1000, 7])
+def test_scopes_match_calculators_on_the_interleaved_stream(resync_interval):
+    windows = (5, 40)
+    consensus = MultiWindowConsensus(tick_windows=windows, time_windows=(), pairs=[('BTC', 'SOL')],
+                                     history_capacity=64, pair_history_capacity=64,
+                                     resync_interval=resync_interval)
+    references = {(scope, window): Reference(window)
+                  for scope in ('BTC', 'BTC/SOL', GLOBAL_SCOPE) for window in windows}
+    
+    for market_data in interleaved(600, ['BTC', 'ETH', 'SOL'], seed=resync_interval):
+        consensus.update(market_data)
+        scopes = [GLOBAL_SCOPE]
+        if market_data.symbol in ('BTC', 'SOL'):
+            scopes.append('BTC/SOL')
+        if market_data.symbol == 'BTC':
+            scopes.append('BTC')
+        for scope in scopes:
+            for window in windows:
+                reference = references[scope, window]
+                hri, sss = reference.update(market_data)
+                if len(reference.hri) >= 2:
+                    assert_matches(consensus.get(scope, f"{window}t"), reference, hri, sss)
+
+def test_pair_scope_includes_cross_symbol_terms():
+    consensus = MultiWindowConsensus(tick_windows=(20,), time_windows=(), pairs=[('BTC', 'SOL')])
+    for market_data in interleaved(200, ['BTC', 'SOL'], seed=3):
+        consensus.update(market_data)
+    pair = consensus.get('BTC/SOL', '20t')
+    assert pair.count == 20
+    assert consensus.get('SOL/BTC', '20t')[2:] == pair[2:]
+    assert pair.hri != consensus.get('BTC', '20t').hri
+
+def test_pair_scope_opens_on_first_query_seeded_from_both_symbols():
+    consensus = MultiWindowConsensus(tick_windows=(10,), time_windows=())
+    reference = Reference(10)
+    early = [MarketDataPoint('BTC', 100.0 + i, 1000.0, float(i), float(i), 'test') for i in range(30)]
+    late = [MarketDataPoint('ETH' if i % 2 else 'BTC', 50.0 + i, 900.0, float(-i), 30.0 + i, 'test')
+            for i in range(6)]
+    for market_data in early + late:
+        consensus.update(market_data)
+        hri, sss = reference.update(market_data)
+    
+    # No pair streams until one is asked for
+    assert consensus.query(kind='pair') == []
+    assert consensus.get('BTC/SOL', '10t') is None
+    assert_matches(consensus.get('ETH/BTC', '10t'), reference, hri, sss)
+    assert [result.scope for result in consensus.query(scope='ETH', kind='pair')] == ['BTC/ETH']
+
+def test_pair_scopes_stay_closed_without_lazy_pairs():
+    consensus = MultiWindowConsensus(tick_windows=(10,), time_windows=(), lazy_pairs=False)
+    for market_data in interleaved(50, ['BTC', 'ETH', 'SOL'], seed=4):
+        consensus.update(market_data)
+    assert consensus.get('BTC/ETH', '10t') is None
+    assert consensus.query(kind='pair') == []
+
+def test_time_windows_match_calculators_over_the_same_ticks():
+    consensus = MultiWindowConsensus(tick_windows=(), time_windows=(30.0,), pairs=[('BTC', 'ETH')])
+    stream = []
+    for market_data in interleaved(400, ['BTC', 'ETH'], seed=5):
+        consensus.update(market_data)
+        stream.append(market_data)
+    
+    horizon = stream[-1].timestamp - 30.0
+    recent = [market_data for market_data in stream if market_data.timestamp >= horizon]
+    result = consensus.get('BTC/ETH', '30s')
+    assert result.count == len(recent)
+    assert result.hri == pytest.approx(HarmonicResonanceCalculator().calculate_hri(recent), abs=TOLERANCE)
+    assert result.sss == pytest.approx(SonicStabilityCalculator().calculate_sss(recent), abs=TOLERANCE)
+
+def test_resync_rebuilds_pair_sums():
+    consensus = MultiWindowConsensus(tick_windows=(30,), time_windows=(), pairs=[])
+    for market_data in interleaved(100, ['BTC'], seed=9):
+        consensus.update(market_data)
+    window = consensus._symbols['BTC'].windows[0]
+    expected = (window.price_pair_sum, window.correlation_pair_sum)
+    window.price_pair_sum = window.correlation_pair_sum = 0.0
+    window.resync(consensus._symbols['BTC'].history)
+    assert window.price_pair_sum == pytest.approx(expected[0], rel=1e-12)
+    assert window.correlation_pair_sum == pytest.approx(expected[1], rel=1e-12)
+
+def windows(consensus):
+    streams = [consensus._global, *consensus._symbols.values()]
+    return [window for stream in streams for window in stream.windows]
+
+def test_large_mean_stream_does_not_rebuild_moments_every_tick():
+    consensus = MultiWindowConsensus(tick_windows=(50, 500), time_windows=(), pairs=[],
+                                     resync_interval=10 ** 9)
+    rng = random.Random(11)
+    for i in range(3000):
+        consensus.update(MarketDataPoint('BTC', 64000.0 * (1 + rng.gauss(0, 1e-4)),
+                                         15000.0 + rng.uniform(-0.01, 0.01), 0.0, float(i), 'test'))
+    assert sum(window.moment_rebuilds for window in windows(consensus)) <= 8
+
+def test_drift_rebuilds_are_rate_limited(monkeypatch):
+    monkeypatch.setattr(RunningMoments, 'drifted', property(lambda self: True))
+    consensus = MultiWindowConsensus(tick_windows=(64,), time_windows=(), pairs=[],
+                                     resync_interval=10 ** 9)
+    for market_data in interleaved(1000, ['BTC'], seed=12):
+        consensus.update(market_data)
+    for window in windows(consensus):
+        # Once the window is full, at most one rebuild per 64 // DRIFT_REBUILDS_PER_WINDOW ticks
+        assert window.moment_rebuilds <= 64 + 1000 // (64 // DRIFT_REBUILDS_PER_WINDOW)
+        assert window.moment_rebuilds < 1000 // 2
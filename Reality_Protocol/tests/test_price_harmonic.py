@@ -0,0 +1,48 @@
+"""NumPy price harmonic against the pure-Python reference"""
+
+import random
+
+import pytest
+
+from sensory_data_layer import (PRICE_HARMONIC_BLOCK_THRESHOLD, PRICE_HARMONIC_TOLERANCE,
+                                HarmonicResonanceCalculator, MarketDataPoint)
+
+def random_walk(count, seed, start=100.0, volatility=0.02):
+    rng = random.Random(seed)
+    price = start
+    points = []
+    for i in range(count):
+        price *= 1 + rng.gauss(0, volatility)
+        points.append(MarketDataPoint('BTC', price, rng.uniform(1, 1e6), rng.uniform(-10, 10),
+                                      1_700_000_000 + i, 'test'))
+    return points
+
+@pytest.mark.parametrize('count', [2, 3, 50, PRICE_HARMONIC_BLOCK_THRESHOLD,
+                                   PRICE_HARMONIC_BLOCK_THRESHOLD + 1, 400])
+def test_matches_python_reference(count):
+    calculator = HarmonicResonanceCalculator()
+    points = random_walk(count, seed=count)
+    assert calculator._calculate_price_harmonic(points) == pytest.approx(
+        calculator._calculate_price_harmonic_python(points), rel=PRICE_HARMONIC_TOLERANCE)
+
+def test_ratios_near_perfect_boundaries():
+    # Ratios halfway between perfect ratios and far above the largest one
+    calculator = HarmonicResonanceCalculator()
+    prices = [1.0, 1.25, 1.75, 2.25, 2.75, 3.5, 4.5, 7.0, 100.0, 0.01]
+    points = [MarketDataPoint('X', p, 1.0, 0.0, float(i), 'test') for i, p in enumerate(prices)]
+    assert calculator._calculate_price_harmonic(points) == pytest.approx(
+        calculator._calculate_price_harmonic_python(points), rel=PRICE_HARMONIC_TOLERANCE)
+
+def test_short_windows_are_neutral():
+    calculator = HarmonicResonanceCalculator()
+    assert calculator._calculate_price_harmonic([]) == 50.0
+    assert calculator._calculate_price_harmonic(random_walk(1, seed=0)) == 50.0
+
+def test_zero_price_divisor_raises_like_reference():
+    calculator = HarmonicResonanceCalculator()
+    points = random_walk(5, seed=1)
+    points[3].price = 0.0
+    with pytest.raises(ZeroDivisionError):
+        calculator._calculate_price_harmonic_python(points)
+    with pytest.raises(ZeroDivisionError):
+        calculator._calculate_price_harmonic(points)
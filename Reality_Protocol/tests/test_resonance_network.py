@@ -0,0 +1,101 @@
+"""Resonance aggregation, gossip acceptance and the node's peer and layer lifecycle"""
+
+import asyncio
+import time
+
+import pytest
+
+pytest.importorskip('cryptography')
+
+from resonance_network import (FRAME_LENGTH, GossipMessage, ResonanceAggregator, ResonanceNode,
+                               encode_gossip)
+from sensory_data_layer import ConsensusResult, SensoryDataLayer, encode_consensus_result
+from signing import ConsensusSigner
+
+def result(hri: float, timestamp: float) -> ConsensusResult:
+    return ConsensusResult(hri, 30.0, 65.0, timestamp, 1, [])
+
+def test_future_dated_node_cannot_push_out_the_majority():
+    now = time.time()
+    aggregator = ResonanceAggregator(window=1.0)
+    for node, hri in enumerate((59.0, 60.0, 60.5, 61.0)):
+        assert aggregator.add(bytes([node]) * 8, result(hri, now - 0.1 * node), 'honest')
+    assert not aggregator.add(b'\xff' * 8, result(0.0, now + 3600.0), 'faulty')
+
+    aggregate = aggregator.aggregate()
+    assert aggregate.participating_nodes == 4
+    assert 59.0 <= aggregate.hri_value <= 61.0
+    assert aggregate.consensus_timestamp <= now
+
+def test_aggregate_ignores_stale_results():
+    now = time.time()
+    aggregator = ResonanceAggregator(window=1.0)
+    aggregator.add(b'\x01' * 8, result(60.0, now - 5.0), 'stale')
+    assert aggregator.aggregate(now) is None
+    aggregator.add(b'\x02' * 8, result(61.0, now), 'fresh')
+    assert aggregator.aggregate(now).participating_nodes == 1
+
+def signed_frame(signer: ConsensusSigner, consensus: ConsensusResult) -> GossipMessage:
+    payload = encode_consensus_result(consensus, signer.base_frequency)
+    return GossipMessage(signer.key_id, 0, payload, signer.sign_bytes(payload))
+
+def receive(node: ResonanceNode, message: GossipMessage):
+    return node._receive(encode_gossip(message)[4:])
+
+def test_tampered_frame_does_not_shadow_the_genuine_one():
+    async def run():
+        peer = ConsensusSigner(mode='each')
+        node = ResonanceNode(ConsensusSigner(mode='each'), {peer.key_id: peer.public_key})
+        genuine = signed_frame(peer, result(60.0, time.time()))
+        tampered = genuine._replace(payload=encode_consensus_result(result(0.0, time.time()), peer.base_frequency))
+        await receive(node, tampered)
+        await receive(node, genuine)
+        await receive(node, genuine)
+        await node.stop()
+        return node
+
+    node = asyncio.run(run())
+    assert (node.rejected, node.accepted, node.duplicates) == (1, 1, 1)
+    assert node.current.hri_value == 60.0
+
+def test_future_dated_frame_is_rejected():
+    async def run():
+        peer = ConsensusSigner(mode='each')
+        node = ResonanceNode(ConsensusSigner(mode='each'), {peer.key_id: peer.public_key})
+        await receive(node, signed_frame(peer, result(0.0, time.time() + 3600.0)))
+        await node.stop()
+        return node
+
+    node = asyncio.run(run())
+    assert (node.rejected, node.accepted, node.current) == (1, 0, None)
+
+def test_peer_announcing_a_wrong_frame_length_is_disconnected_unread():
+    async def run():
+        peer = ConsensusSigner(mode='each')
+        node = ResonanceNode(ConsensusSigner(mode='each'), {peer.key_id: peer.public_key})
+        await node.start()
+        reader, writer = await asyncio.open_connection('127.0.0.1', node.port)
+        writer.write(encode_gossip(signed_frame(peer, result(60.0, time.time()))))
+        # Claims 2 GiB; the node must not wait for (or buffer) that body
+        writer.write(FRAME_LENGTH.pack(1 << 31) + b'\x00' * 64)
+        await writer.drain()
+        closed = await asyncio.wait_for(reader.read(), 2.0)
+        writer.close()
+        await node.stop()
+        return node, closed
+
+    node, closed = asyncio.run(run())
+    assert closed == b''
+    assert (node.accepted, node.rejected) == (1, 1)
+
+def test_stop_removes_the_layer_subscription():
+    async def run():
+        layer = SensoryDataLayer()
+        node = ResonanceNode(ConsensusSigner(mode='each'), {})
+        subscription = node.attach(layer)
+        assert subscription in layer.consensus_callbacks.subscriptions
+        await node.stop()
+        return layer, subscription
+
+    layer, subscription = asyncio.run(run())
+    assert subscription not in layer.consensus_callbacks.subscriptions
@@ -0,0 +1,80 @@
+"""SensoryDataLayer lifecycle against a local Coinbase stand-in"""
+
+import asyncio
+import json
+import logging
+
+import pytest
+
+websockets = pytest.importorskip('websockets')
+
+import sensory_data_layer
+from sensory_data_layer import SensoryDataLayer, configure_logging
+
+TICKS = 120
+
+async def coinbase_feed(websocket):
+    subscribe = json.loads(await websocket.recv())
+    for sequence in range(TICKS):
+        product = subscribe['product_ids'][sequence % len(subscribe['product_ids'])]
+        await websocket.send(json.dumps({
+            'type': 'ticker', 'sequence': sequence, 'product_id': product,
+            'price': str(100 + sequence % 7), 'volume_24h': str(1000 + sequence)
+        }))
+    await websocket.wait_closed()
+
+async def run_layer(**options):
+    server = await websockets.serve(coinbase_feed, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    layer = SensoryDataLayer(**options)
+    layer.ingestion_engine.data_sources = {'coinbase': f'ws://127.0.0.1:{port}'}
+    delivered = []
+    
+    async def collect(result):
+        delivered.append(result)
+    
+    layer.add_consensus_callback(collect)
+    try:
+        # initialize hands ingestion to a background task and returns
+        await asyncio.wait_for(layer.initialize(['BTC', 'ETH']), 1.0)
+        while len(layer.ingestion_engine.data_buffer) < TICKS:
+            await asyncio.sleep(0.01)
+        await asyncio.wait_for(layer.shutdown(), 5.0)
+    finally:
+        server.close()
+        await server.wait_closed()
+    return layer, delivered
+
+def test_initialize_returns_and_shutdown_delivers_every_result():
+    layer, delivered = asyncio.run(run_layer(consensus_mode='ticks', consensus_every_n_ticks=25))
+    
+    assert len(layer.ingestion_engine.data_buffer) == TICKS
+    assert delivered
+    assert len(delivered) == len(layer.consensus_history)
+    assert delivered[-1].consensus_timestamp == layer.consensus_history[-1].consensus_timestamp
+    assert layer.ingestion_engine.source_health['coinbase'].connected is False
+
+def test_shutdown_right_after_initialize():
+    async def scenario():
+        layer = SensoryDataLayer()
+        layer.ingestion_engine.data_sources = {'coinbase': 'ws://127.0.0.1:9'}
+        await layer.initialize(['BTC'])
+        await asyncio.wait_for(layer.shutdown(), 2.0)
+        return layer
+    
+    layer = asyncio.run(scenario())
+    assert layer.ingestion_engine._ingestion_tasks == []
+
+def test_configure_logging_installs_one_handler(monkeypatch):
+    root = logging.getLogger()
+    monkeypatch.setattr(sensory_data_layer, '_log_setup', None)
+    monkeypatch.setattr(root, 'handlers', [])
+    monkeypatch.setattr(root, 'level', root.level)
+    listener = configure_logging(non_blocking=True)
+    try:
+        assert configure_logging(logging.WARNING) is listener
+        assert configure_logging(non_blocking=True) is listener
+        assert len(root.handlers) == 1
+        assert root.level == logging.INFO
+    finally:
+        listener.stop()
@@ -0,0 +1,77 @@
+"""Session log round trips, torn tails and paced replay"""
+
+import asyncio
+import os
+
+import pytest
+
+from session_log import RECORD_HEADER, ReplaySource, SessionRecorder, read_session
+
+def record(path, frames):
+    with SessionRecorder(str(path)) as recorder:
+        for source, frame, received_at in frames:
+            recorder.record(source, frame, received_at)
+
+FIRST = [('binance', '{"p": "1"}', 1.0), ('kraken', b'\x01\x02', 1.5), ('binance', '{"p": "2"}', 2.0)]
+SECOND = [('kraken', b'\x03', 10.0), ('coinbase', '{"price": "3"}', 10.25)]
+
+def test_reopened_log_appends_a_second_session(tmp_path):
+    path = tmp_path / 'session.log'
+    record(path, FIRST)
+    record(path, SECOND)
+    assert list(read_session(str(path))) == FIRST + SECOND
+    assert list(read_session(str(path), sources=['kraken'])) == [FIRST[1], SECOND[0]]
+
+@pytest.mark.parametrize('torn', [3, RECORD_HEADER.size + 2])
+def test_torn_tail_is_cut_before_appending(tmp_path, torn):
+    path = tmp_path / 'session.log'
+    record(path, FIRST)
+    # A crash mid-write leaves part of a header, or a header and part of its payload
+    with open(path, 'ab') as handle:
+        handle.write(RECORD_HEADER.pack(3.0, 100, 0, 1)[:torn] if torn < RECORD_HEADER.size
+                     else RECORD_HEADER.pack(3.0, 100, 0, 1) + b'{"'[:torn - RECORD_HEADER.size])
+    intact = os.path.getsize(path) - torn
+
+    record(path, SECOND)
+    assert list(read_session(str(path))) == FIRST + SECOND
+    with open(path, 'rb') as handle:
+        handle.seek(intact)
+        assert RECORD_HEADER.unpack(handle.read(RECORD_HEADER.size))[0] == SECOND[0][2]
+
+def test_torn_magic_starts_a_fresh_log(tmp_path):
+    path = tmp_path / 'session.log'
+    path.write_bytes(b'ORSL')
+    record(path, SECOND)
+    assert list(read_session(str(path))) == SECOND
+
+def test_foreign_file_is_refused(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_bytes(b'not a session log')
+    with pytest.raises(ValueError):
+        SessionRecorder(str(path))
+
+async def replay_times(path, speed):
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    arrivals = []
+    replay = ReplaySource(str(path), speed)
+    async for _, _, received_at in replay:
+        arrivals.append((received_at, loop.time() - started))
+    return replay, arrivals
+
+def test_replay_keeps_recorded_spacing_at_speed(tmp_path):
+    path = tmp_path / 'session.log'
+    record(path, [('binance', str(i), 100.0 + 0.1 * i) for i in range(6)])
+    replay, arrivals = asyncio.run(replay_times(path, speed=2.0))
+
+    for received_at, elapsed in arrivals:
+        due = (received_at - 100.0) / 2.0
+        assert due - 0.005 <= elapsed <= due + 0.05
+    assert replay.get_stats()['frames'] == 6
+
+def test_unpaced_replay_does_not_sleep(tmp_path):
+    path = tmp_path / 'session.log'
+    record(path, [('binance', str(i), 100.0 + 10.0 * i) for i in range(50)])
+    replay, arrivals = asyncio.run(replay_times(path, speed=None))
+    assert len(arrivals) == 50
+    assert arrivals[-1][1] < 1.0
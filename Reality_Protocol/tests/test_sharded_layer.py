@@ -0,0 +1,51 @@
+"""Shared-memory rings and the shard merge, without starting shard processes"""
+
+import random
+
+import pytest
+
+from sensory_data_layer import (HarmonicResonanceCalculator, IncrementalHRICalculator,
+                                MarketDataPoint)
+from sharded_layer import SharedColumnarRingBuffer, ShardedSensoryLayer, partition_symbols
+
+def test_snapshot_from_a_second_attachment():
+    writer = SharedColumnarRingBuffer(8, ['BTC', 'ETH'], ['coinbase'])
+    reader = SharedColumnarRingBuffer(8, ['BTC', 'ETH'], ['coinbase'], name=writer.name, create=False)
+    try:
+        for i in range(11):
+            writer.append('BTC' if i % 2 else 'ETH', 100.0 + i, 1.0, 0.0, float(i), 'coinbase')
+        points = reader.to_points(reader.snapshot(3))
+        assert [point.price for point in points] == [108.0, 109.0, 110.0]
+        assert [point.symbol for point in points] == ['ETH', 'BTC', 'ETH']
+    finally:
+        reader.close()
+        writer.close()
+
+def test_snapshot_gives_up_on_a_stuck_writer():
+    ring = SharedColumnarRingBuffer(4, ['BTC'], ['coinbase'])
+    try:
+        ring.header[2] += 1  # a write that never finishes
+        with pytest.raises(RuntimeError):
+            ring.snapshot(retries=5)
+    finally:
+        ring.close()
+
+def test_partition_symbols_round_robin():
+    assert partition_symbols(['A', 'B', 'C'], 2) == [['A', 'C'], ['B']]
+    assert partition_symbols(['A'], 3) == [['A']]
+
+def test_merge_stats_report_excluded_cross_shard_pairs():
+    layer = ShardedSensoryLayer(shards=2)
+    rng = random.Random(0)
+    for shard, window in enumerate((30, 20)):
+        stream = IncrementalHRICalculator(HarmonicResonanceCalculator(), window)
+        for i in range(window):
+            stream.update(MarketDataPoint('BTC', rng.uniform(90, 110), 1.0, 0.0, float(i), 'test'))
+        layer.shard_reports[shard] = {'hri': stream.stats()}
+    
+    stats = layer.get_merge_stats()
+    assert stats['window'] == 50
+    assert stats['pairs_total'] == 50 * 49 // 2
+    assert stats['pairs_covered'] == 30 * 29 // 2 + 20 * 19 // 2
+    assert stats['cross_shard_pairs_excluded'] == 30 * 20
+    assert stats['pair_coverage'] == pytest.approx(stats['pairs_covered'] / stats['pairs_total'])
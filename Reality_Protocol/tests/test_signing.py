@@ -0,0 +1,66 @@
+"""Consensus result signing in 'each' and 'merkle' modes"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip('cryptography')
+
+from sensory_data_layer import ConsensusResult, decode_consensus_result, encode_consensus_result
+from signing import ConsensusSigner, merkle_proof, proof_positions, verify_result
+
+def result(i: int) -> ConsensusResult:
+    return ConsensusResult(50.0 + i, 20.0 - i / 10, 60.0, 1_700_000_000.0 + i, 1, [])
+
+def test_encoding_round_trip():
+    original = result(3)
+    decoded, base_frequency = decode_consensus_result(encode_consensus_result(original, 440.0))
+    assert decoded == original
+    assert base_frequency == 440.0
+
+def test_each_mode_signatures_verify():
+    signer = ConsensusSigner(mode='each')
+    [signature] = signer.sign_result(result(0))
+    assert verify_result(result(0), signature, signer.public_key)
+    assert not verify_result(result(1), signature, signer.public_key)
+    assert not verify_result(result(0), signature, ConsensusSigner().public_key)
+
+def test_proof_positions_match_merkle_proof():
+    for count in range(1, 18):
+        leaves = [bytes([i]) * 32 for i in range(count)]
+        for index in range(count):
+            assert [left for _, left in merkle_proof(leaves, index)] == proof_positions(index, count)
+
+async def sign_merkle(count: int):
+    signer = ConsensusSigner(mode='merkle', interval=60.0)
+    references = [signer.sign_result(result(i))[0] for i in range(count)]
+    await signer.close()
+    return signer, references
+
+def test_merkle_references_verify_with_their_proofs():
+    signer, references = asyncio.run(sign_merkle(7))
+    for i, reference in enumerate(references):
+        batch, index, proof = signer.proof(reference)
+        assert index == i
+        assert verify_result(result(i), reference, signer.public_key, batch=batch, proof=proof)
+        assert not verify_result(result(i + 1), reference, signer.public_key, batch=batch, proof=proof)
+
+def test_merkle_reference_with_forged_index_fails():
+    signer, references = asyncio.run(sign_merkle(7))
+    batch, _, proof = signer.proof(references[2])
+    for forged in (references[2].rsplit(':', 1)[0] + ':3', references[2].rsplit(':', 1)[0] + ':99'):
+        assert not verify_result(result(2), forged, signer.public_key, batch=batch, proof=proof)
+
+def test_quiet_batch_is_sealed_after_interval():
+    async def run():
+        signer = ConsensusSigner(mode='merkle', interval=0.05)
+        reference = signer.sign_result(result(0))[0]
+        await asyncio.sleep(0.2)
+        sealed = dict(signer.batches)
+        await signer.close()
+        return signer, reference, sealed
+
+    signer, reference, sealed = asyncio.run(run())
+    assert list(sealed) == [0]
+    batch, _, proof = signer.proof(reference)
+    assert verify_result(result(0), reference, signer.public_key, batch=batch, proof=proof)
@@ -0,0 +1,114 @@
+"""Stream server: snapshot + deltas, HTTP ETags, slow-client eviction and tick conflation"""
+
+import asyncio
+import json
+import socket
+
+import pytest
+
+websockets = pytest.importorskip('websockets')
+httpx = pytest.importorskip('httpx')
+
+from sensory_data_layer import ConsensusResult, MarketDataPoint, SensoryDataLayer
+from stream_server import ConsensusStreamServer, field_delta
+
+def consensus(hri, timestamp, signatures=('sha256:00',)):
+    return ConsensusResult(hri, 25.0, 60.0, timestamp, 1, list(signatures))
+
+def tick(symbol, price, timestamp):
+    return MarketDataPoint(symbol, price, 1000.0, 1.5, timestamp, 'binance')
+
+async def with_server(body, **options):
+    layer = SensoryDataLayer()
+    server = ConsensusStreamServer(layer, ws_port=0, http_port=0, **options)
+    await server.start()
+    try:
+        return await body(server)
+    finally:
+        await server.stop()
+
+async def receive(websocket):
+    return json.loads(await asyncio.wait_for(websocket.recv(), 2.0))
+
+def test_field_delta():
+    assert field_delta(None, {'a': 1}) == {'a': 1}
+    assert field_delta({'a': 1, 'b': 2}, {'a': 1, 'b': 3}) == {'b': 3}
+    assert field_delta({'a': 1}, {'a': 1}) == {}
+
+def test_deltas_follow_the_snapshot():
+    async def body(server):
+        await server._on_consensus(consensus(70.0, 100.0))
+        async with websockets.connect(f'ws://127.0.0.1:{server.ws_port}') as websocket:
+            snapshot = await receive(websocket)
+            assert snapshot['type'] == 'snapshot'
+            assert snapshot['consensus']['hri_value'] == 70.0
+
+            await server._on_consensus(consensus(71.5, 101.0))
+            assert await receive(websocket) == {'type': 'consensus', 'hri_value': 71.5,
+                                                'consensus_timestamp': 101.0}
+            await server._on_ticks([tick('BTC', 64000.0, 101.0)])
+            first = await receive(websocket)
+            assert first['type'] == 'tick' and first['symbol'] == 'BTC' and first['source'] == 'binance'
+            await server._on_ticks([tick('BTC', 64010.0, 102.0)])
+            assert await receive(websocket) == {'type': 'tick', 'symbol': 'BTC', 'price': 64010.0,
+                                                'timestamp': 102.0}
+
+    asyncio.run(with_server(body))
+
+def test_consensus_endpoint_answers_304_for_a_current_etag():
+    async def body(server):
+        url = f'http://127.0.0.1:{server.http_port}'
+        async with httpx.AsyncClient() as client:
+            response = await client.get(f'{url}/consensus')
+            assert response.status_code == 200
+            etag = response.headers['etag']
+            assert response.json() == server.layer.get_current_consensus()
+
+            cached = await client.get(f'{url}/consensus', headers={'If-None-Match': etag})
+            assert cached.status_code == 304 and cached.headers['etag'] == etag
+
+            server.layer._publish_snapshot(123.0)
+            changed = await client.get(f'{url}/consensus', headers={'If-None-Match': etag})
+            assert changed.status_code == 200 and changed.headers['etag'] != etag
+
+            assert (await client.get(f'{url}/missing')).status_code == 404
+
+    asyncio.run(with_server(body))
+
+def test_client_that_stops_reading_is_evicted():
+    async def body(server):
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.connect(('127.0.0.1', server.http_port))
+        sock.setblocking(False)
+        reader, writer = await asyncio.open_connection(sock=sock)
+        writer.write(b'GET /events HTTP/1.1\r\nHost: test\r\n\r\n')
+        await writer.drain()
+        while not server._sse_clients:
+            await asyncio.sleep(0.01)
+
+        # Large, ever-changing messages fill the socket buffers, then the server's backlog
+        padding = 'x' * 65536
+        for i in range(2000):
+            await server._on_consensus(consensus(50.0, float(i), [padding + str(i)]))
+            if server.evicted:
+                break
+            await asyncio.sleep(0)
+        assert server.evicted == 1
+        assert server.get_stats()['sse_clients'] == 0
+        writer.close()
+
+    asyncio.run(with_server(body, max_buffer=1 << 16))
+
+@pytest.mark.parametrize('conflate, expected', [(True, [('BTC', 3.0), ('ETH', 2.0)]),
+                                                (False, [('BTC', 1.0), ('ETH', 2.0), ('BTC', 3.0)])])
+def test_conflate_ticks_keeps_the_newest_tick_per_symbol(conflate, expected):
+    async def body(server):
+        async with websockets.connect(f'ws://127.0.0.1:{server.ws_port}') as websocket:
+            await receive(websocket)
+            await server._on_ticks([tick('BTC', 1.0, 10.0), tick('ETH', 2.0, 10.5), tick('BTC', 3.0, 11.0)])
+            messages = [await receive(websocket) for _ in expected]
+            assert [(message['symbol'], message['price']) for message in messages] == expected
+            assert server.messages == len(expected)
+
+    asyncio.run(with_server(body, conflate_ticks=conflate))
@@ -0,0 +1,104 @@
+"""Memory-mapped tick store: reopening, range lookups and growth"""
+
+import asyncio
+import random
+
+import numpy as np
+
+from sensory_data_layer import ConsensusResult, MarketDataPoint, SensoryDataLayer
+from tick_store import TICK_DTYPES, MappedColumns, TickStore, attach_tick_store
+
+def ticks(count, symbol='BTC', seed=0, start=1_700_000_000.0):
+    rng = random.Random(seed)
+    timestamp = start
+    points = []
+    for _ in range(count):
+        # Repeated timestamps are allowed and must not confuse the sparse index
+        timestamp += rng.choice((0.0, 0.25, 1.0))
+        points.append(MarketDataPoint(symbol, rng.uniform(90, 110), rng.uniform(1, 1e4),
+                                      rng.uniform(-5, 5), timestamp, rng.choice(('binance', 'kraken'))))
+    return points
+
+def test_reopened_store_keeps_rows_and_sources(tmp_path):
+    store = TickStore(str(tmp_path), grow_rows=16, index_stride=4)
+    points = ticks(50)
+    for point in points:
+        assert store.append_point(point)
+    store.flush()
+
+    reopened = TickStore(str(tmp_path), grow_rows=16, index_stride=4)
+    assert reopened.symbols() == ['BTC']
+    assert reopened.sources == store.sources
+    assert reopened.to_points('BTC', reopened.series('BTC').tail(50)) == points
+    assert reopened.recent_points(10) == points[-10:]
+
+    # Appends after reopening continue the same series, and out-of-order rows are refused
+    later = MarketDataPoint('BTC', 100.0, 1.0, 0.0, points[-1].timestamp + 1, 'coinbase')
+    assert reopened.append_point(later)
+    assert not reopened.append_point(MarketDataPoint('BTC', 1.0, 1.0, 0.0, points[0].timestamp - 1, 'x'))
+    assert len(reopened.series('BTC')) == 51
+    assert reopened.get_stats()['BTC']['rejected'] == 1
+
+def test_range_through_the_sparse_index_matches_a_scan(tmp_path):
+    columns = MappedColumns(str(tmp_path / 'series'), TICK_DTYPES, grow_rows=32, index_stride=4)
+    points = ticks(300, seed=1)
+    for point in points:
+        columns.append(point.timestamp, point.price, point.volume, point.change_24h, 0)
+    times = np.array([point.timestamp for point in points])
+
+    rng = random.Random(2)
+    probes = [times[0] - 1, times[-1] + 1] + [rng.uniform(times[0], times[-1]) for _ in range(100)]
+    probes += [float(t) for t in times[::17]]
+    for t0 in probes:
+        assert columns.search(t0) == int(np.searchsorted(times, t0, side='left'))
+        t1 = t0 + rng.choice((0.0, 0.5, 5.0, 50.0))
+        selected = columns.range(t0, t1)
+        expected = (times >= t0) & (times < t1)
+        np.testing.assert_array_equal(selected['timestamp'], times[expected])
+        np.testing.assert_array_equal(selected['price'], np.array([p.price for p in points])[expected])
+
+def test_growth_past_the_initial_mapping(tmp_path):
+    directory = str(tmp_path / 'series')
+    columns = MappedColumns(directory, TICK_DTYPES, grow_rows=8, index_stride=4)
+    points = ticks(10, seed=3)
+    for point in points:
+        columns.append(point.timestamp, point.price, point.volume, point.change_24h, 1)
+    early = columns.tail(10)
+    for point in ticks(200, seed=4, start=points[-1].timestamp):
+        columns.append(point.timestamp, point.price, point.volume, point.change_24h, 1)
+    assert columns.capacity >= 210 > 8
+    # Views handed out before a remap stay valid
+    np.testing.assert_array_equal(early['price'], [point.price for point in points])
+    columns.flush()
+
+    reopened = MappedColumns(directory, TICK_DTYPES, grow_rows=8, index_stride=4)
+    assert len(reopened) == 210
+    assert reopened.capacity == columns.capacity
+    np.testing.assert_array_equal(reopened.tail(210)['timestamp'], columns.tail(210)['timestamp'])
+
+def test_consensus_series(tmp_path):
+    store = TickStore(str(tmp_path))
+    for i in range(5):
+        store.append_consensus(ConsensusResult(50.0 + i, 20.0, 65.0, 100.0 + i, 1, []))
+    selected = store.consensus_range(101.0, 103.0)
+    assert selected['timestamp'].tolist() == [101.0, 102.0]
+    assert selected['hri'].tolist() == [51.0, 52.0]
+    assert store.symbols() == []
+
+def test_attached_store_warm_starts_the_next_session(tmp_path):
+    points = ticks(80, symbol='ETH', seed=5)
+
+    async def first_session():
+        layer = SensoryDataLayer()
+        attach_tick_store(layer, TickStore(str(tmp_path)))
+        for point in points:
+            await layer.ingestion_engine._process_market_data(point)
+        layer.ingestion_engine.tick_store.flush()
+
+    asyncio.run(first_session())
+    layer = SensoryDataLayer()
+    store = attach_tick_store(layer, TickStore(str(tmp_path)))
+    assert len(store.series('ETH')) == len(points)
+    assert layer.ingestion_engine.get_latest('ETH') == points[-1]
+    assert len(layer.hri_stream) == min(len(points), layer.analysis_window)
+    assert layer.current_hri == layer.hri_stream.value() > 0.0
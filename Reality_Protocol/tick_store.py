@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Orion Rangi Sonic Engine - Persistent Tick Store
+Memory-mapped, append-only columnar storage for ticks and consensus history
+
+Each symbol gets a directory holding one flat file per column plus a tiny
+row-count file. Files grow in grow_rows steps and are mapped with np.memmap,
+so appends are plain array stores and range scans return views straight
+into the page cache. A sparse index keeps every index_stride-th timestamp,
+which narrows a lookup to one block before a binary search inside it.
+
+W.J. McCrea - Reality Protocol LLC
+"""
+
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from sensory_data_layer import ConsensusResult, MarketDataPoint, SensoryDataLayer
+
+logger = logging.getLogger(__name__)
+
+TICK_DTYPES = {
+    'timestamp': np.float64,
+    'price': np.float64,
+    'volume': np.float64,
+    'change_24h': np.float64,
+    'source_code': np.int16
+}
+
+CONSENSUS_DTYPES = {
+    'timestamp': np.float64,
+    'hri': np.float64,
+    'sss': np.float64,
+    'harmonic_quality': np.float64
+}
+
+CONSENSUS_SERIES = '_consensus'
+
+class MappedColumns:
+    """
+    Append-only memory-mapped columns sharing a row count
+
+    The first column is the time column. Rows must arrive in non-decreasing
+    time order; older rows are rejected and counted so the sparse index stays
+    valid for binary search.
+    """
+
+    def __init__(self, directory: str, dtypes: Dict[str, type], grow_rows: int = 65536,
+                 index_stride: int = 1024):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.dtypes = {name: np.dtype(dtype) for name, dtype in dtypes.items()}
+        self.names = tuple(self.dtypes)
+        self.time_column = self.names[0]
+        self.grow_rows = grow_rows
+        self.index_stride = index_stride
+        self.rejected = 0
+
+        count_path = os.path.join(directory, 'rows.i64')
+        mode = 'r+' if os.path.exists(count_path) else 'w+'
+        self._rows = np.memmap(count_path, dtype=np.int64, mode=mode, shape=(1,))
+        self.count = int(self._rows[0])
+
+        self.columns: Dict[str, np.memmap] = {}
+        self.capacity = 0
+        self._map(max(grow_rows, self.count))
+
+        times = self.columns[self.time_column]
+        self._index = np.array(times[:self.count:index_stride], dtype=np.float64)
+        self._last_time = float(times[self.count - 1]) if self.count else -np.inf
+
+    def _map(self, capacity: int):
+        """(Re)map every column file with room for at least `capacity` rows"""
+        paths = {
+            name: os.path.join(self.directory, f"{name}.{dtype.str[1:]}")
+            for name, dtype in self.dtypes.items()
+        }
+        # Reopened stores keep the room already allocated on disk
+        capacity = max([capacity] + [
+            os.path.getsize(path) // self.dtypes[name].itemsize
+            for name, path in paths.items() if os.path.exists(path)
+        ])
+        for name, dtype in self.dtypes.items():
+            path = paths[name]
+            size = capacity * dtype.itemsize
+            with open(path, 'ab') as handle:
+                if handle.tell() < size:
+                    handle.truncate(size)
+            # Views handed out earlier keep the old mapping alive and stay valid
+            self.columns[name] = np.memmap(path, dtype=dtype, mode='r+', shape=(capacity,))
+        self.capacity = capacity
+
+    def append(self, *values) -> bool:
+        """Append one row given in column order; False if it is older than the last row"""
+        timestamp = values[0]
+        if timestamp < self._last_time:
+            self.rejected += 1
+            return False
+        row = self.count
+        if row == self.capacity:
+            self._map(self.capacity + self.grow_rows * max(1, self.capacity // self.grow_rows))
+        columns = self.columns
+        for name, value in zip(self.names, values):
+            columns[name][row] = value
+        if row % self.index_stride == 0:
+            self._index = np.append(self._index, timestamp)
+        # Publish the row only after its columns are written
+        self.count = row + 1
+        self._rows[0] = self.count
+        self._last_time = timestamp
+        return True
+
+    def search(self, timestamp: float) -> int:
+        """Index of the first row at or after timestamp"""
+        block = int(np.searchsorted(self._index, timestamp, side='left'))
+        start = max(block - 1, 0) * self.index_stride
+        stop = min(block * self.index_stride + 1, self.count)
+        times = self.columns[self.time_column]
+        return start + int(np.searchsorted(times[start:stop], timestamp, side='left'))
+
+    def range(self, t0: float, t1: float) -> Dict[str, np.ndarray]:
+        """Zero-copy views of the rows with t0 <= time < t1"""
+        start = self.search(t0)
+        stop = max(start, self.search(t1))
+        return {name: column[start:stop] for name, column in self.columns.items()}
+
+    def tail(self, limit: int) -> Dict[str, np.ndarray]:
+        """Zero-copy views of the last `limit` rows"""
+        start = max(0, self.count - limit)
+        return {name: column[start:self.count] for name, column in self.columns.items()}
+
+    def flush(self):
+        for column in self.columns.values():
+            column.flush()
+        self._rows.flush()
+
+    def __len__(self) -> int:
+        return self.count
+
+class TickStore:
+    """
+    Per-symbol tick columns plus a consensus series under one root directory
+
+    Assign to MarketDataIngestionEngine.tick_store (or use attach_tick_store)
+    to persist every processed tick.
+    """
+
+    def __init__(self, root: str, grow_rows: int = 65536, index_stride: int = 1024):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.grow_rows = grow_rows
+        self.index_stride = index_stride
+        self._series: Dict[str, MappedColumns] = {}
+
+        self._sources_path = os.path.join(root, 'sources.json')
+        self.sources: List[str] = []
+        if os.path.exists(self._sources_path):
+            with open(self._sources_path) as handle:
+                self.sources = json.load(handle)
+        self._source_codes = {source: code for code, source in enumerate(self.sources)}
+
+    def _open(self, name: str, dtypes: Dict[str, type]) -> MappedColumns:
+        series = self._series.get(name)
+        if series is None:
+            directory = os.path.join(self.root, name.replace(os.sep, '_'))
+            series = MappedColumns(directory, dtypes, self.grow_rows, self.index_stride)
+            self._series[name] = series
+        return series
+
+    def _source_code(self, source: str) -> int:
+        code = self._source_codes.get(source)
+        if code is None:
+            code = len(self.sources)
+            self.sources.append(source)
+            self._source_codes[source] = code
+            with open(self._sources_path, 'w') as handle:
+                json.dump(self.sources, handle)
+        return code
+
+    def symbols(self) -> List[str]:
+        """Symbols with stored ticks"""
+        return sorted(
+            entry for entry in os.listdir(self.root)
+            if entry != CONSENSUS_SERIES and os.path.isdir(os.path.join(self.root, entry))
+        )
+
+    def series(self, symbol: str) -> MappedColumns:
+        return self._open(symbol, TICK_DTYPES)
+
+    def append(self, symbol: str, price: float, volume: float, change_24h: float,
+               timestamp: float, source: str) -> bool:
+        return self.series(symbol).append(timestamp, price, volume, change_24h, self._source_code(source))
+
+    def append_point(self, market_data: MarketDataPoint) -> bool:
+        return self.append(market_data.symbol, market_data.price, market_data.volume,
+                           market_data.change_24h, market_data.timestamp, market_data.source)
+
+    def range(self, symbol: str, t0: float, t1: float) -> Dict[str, np.ndarray]:
+        """Zero-copy tick columns for symbol with t0 <= timestamp < t1"""
+        return self.series(symbol).range(t0, t1)
+
+    def to_points(self, symbol: str, columns: Dict[str, np.ndarray]) -> List[MarketDataPoint]:
+        """Materialize stored columns as MarketDataPoint objects"""
+        sources = self.sources
+        return [
+            MarketDataPoint(symbol, price, volume, change, timestamp, sources[code])
+            for timestamp, price, volume, change, code in zip(
+                columns['timestamp'].tolist(), columns['price'].tolist(), columns['volume'].tolist(),
+                columns['change_24h'].tolist(), columns['source_code'].tolist()
+            )
+        ]
+
+    def recent_points(self, limit: int, symbols: Optional[Iterable[str]] = None) -> List[MarketDataPoint]:
+        """The last `limit` ticks across symbols, merged in timestamp order"""
+        points: List[MarketDataPoint] = []
+        for symbol in (symbols if symbols is not None else self.symbols()):
+            points.extend(self.to_points(symbol, self.series(symbol).tail(limit)))
+        points.sort(key=lambda point: point.timestamp)
+        return points[-limit:] if limit else []
+
+    def append_consensus(self, result: ConsensusResult) -> bool:
+        return self._open(CONSENSUS_SERIES, CONSENSUS_DTYPES).append(
+            result.consensus_timestamp, result.hri_value, result.sss_value, result.harmonic_quality
+        )
+
+    def consensus_range(self, t0: float, t1: float) -> Dict[str, np.ndarray]:
+        """Zero-copy consensus columns with t0 <= timestamp < t1"""
+        return self._open(CONSENSUS_SERIES, CONSENSUS_DTYPES).range(t0, t1)
+
+    def flush(self):
+        for series in self._series.values():
+            series.flush()
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            name: {'rows': len(series), 'capacity': series.capacity, 'rejected': series.rejected}
+            for name, series in self._series.items()
+        }
+
+def attach_tick_store(layer: SensoryDataLayer, store: TickStore, warm_start: bool = True) -> TickStore:
+    """Persist a layer's ticks and consensus results, warm-starting it from earlier sessions"""
+    engine = layer.ingestion_engine
+    if warm_start:
+        layer.warm_start(store.recent_points(engine.data_buffer.capacity))
+    engine.tick_store = store
+
+    async def persist_consensus(result: ConsensusResult):
+        store.append_consensus(result)
+
+    layer.add_consensus_callback(persist_consensus)
+    return store
@@ -1,25 +1,71 @@
 # oracles/market_oracle.py
-from pythclient import PythClient
-from solana.rpc.async_api import AsyncClient
+import os
+import sys
+
+from price_feeds import TOP_FEEDS, PriceFeedFetcher
+
+# Indicators are shared with the sensory layer in Reality_Protocol
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Reality_Protocol"))
+from indicators import IndicatorBank
+
+_solana_client = None
+
+def shared_solana_client():
+    """One Solana RPC client per process instead of one per oracle"""
+    global _solana_client
+    if _solana_client is None:
+        # Imported on first use so price and indicator work runs without solana installed
+        from solana.rpc.async_api import AsyncClient
+        _solana_client = AsyncClient("https://api.mainnet-beta.solana.com")
+    return _solana_client
 
 class CryptoBoxingOracle:
-    def __init__(self):
-        self.client = PythClient()
-        self.solana_client = AsyncClient("https://api.mainnet-beta.solana.com")
-        
+    def __init__(self, symbols=None, fetcher=None, solana_client=None):
+        self.symbols = list(symbols or TOP_FEEDS)
+        # Batched, cached Pyth quotes over the process-wide pooled HTTP client
+        self.feeds = fetcher or PriceFeedFetcher()
+        # Injected, or the shared client created the first time it is used
+        self._solana_client = solana_client
+        # Incremental per-symbol MACD / RSI / Bollinger state, O(1) per price update
+        self.indicators = IndicatorBank()
+        # Pyth publish time of the last price fed to each symbol's indicators
+        self.published = {}
+
+    @property
+    def solana_client(self):
+        if self._solana_client is None:
+            self._solana_client = shared_solana_client()
+        return self._solana_client
+
+    def backfill(self, symbol, prices):
+        """Seed a symbol's indicators from historical prices before live updates"""
+        return self.indicators.backfill(symbol, prices)
+
     async def get_crypto_data(self):
-        # Get top 50 crypto prices
-        feeds = await self.client.get_price_feeds([
-            "BTC", "SOL", "ETH", "BNB", "ADA",  # Add 45 more
-        ])
-        
+        # Get top 50 crypto prices in a few concurrent batched requests
+        quotes = await self.feeds.fetch(self.symbols)
+
         processed = {}
-        for symbol, feed in feeds.items():
+        for symbol, quote in quotes.items():
+            # Cached and stale-while-revalidate quotes repeat; count each price once
+            if quote.publish_time > self.published.get(symbol, -1):
+                self.published[symbol] = quote.publish_time
+                self.indicators.update(symbol, quote.price)
             processed[symbol] = {
-                "price": feed.aggregate.price,
-                "confidence": feed.aggregate.confidence,
-                "bollinger": self._calculate_bollinger(feed),
-                "rsi": self._calculate_rsi(feed),
-                "macd": self._calculate_macd(feed)
+                "price": quote.price,
+                "confidence": quote.confidence,
+                "bollinger": self._calculate_bollinger(symbol),
+                "rsi": self._calculate_rsi(symbol),
+                "macd": self._calculate_macd(symbol)
             }
         return processed
+
+    def _calculate_bollinger(self, symbol):
+        bands = self.indicators.latest(symbol).bollinger
+        return bands._asdict() if bands is not None else None
+
+    def _calculate_rsi(self, symbol):
+        return self.indicators.latest(symbol).rsi
+
+    def _calculate_macd(self, symbol):
+        return self.indicators.latest(symbol).macd._asdict()
@@ -0,0 +1,213 @@
+# oracles/price_feeds.py
+"""
+Batched, concurrent Pyth price-feed fetching with a stale-while-revalidate cache
+
+Symbols are resolved to Pyth feed ids once through Hermes' feed catalogue,
+then quotes are requested in batches of batch_size ids per call, with at most
+max_concurrency calls in flight. Cached quotes younger than ttl are served
+as-is; quotes up to stale_ttl old are served immediately while one background
+refresh runs; anything older is fetched before returning. Concurrent callers
+asking for the same symbols share the in-flight request.
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HERMES_URL = "https://hermes.pyth.network"
+
+# Seconds before a symbol missing from the catalogue is looked up again
+CATALOGUE_RETRY = 300.0
+
+TOP_FEEDS = [
+    "BTC", "ETH", "SOL", "BNB", "ADA", "XRP", "DOGE", "AVAX", "DOT", "LINK",
+    "TRX", "LTC", "BCH", "SHIB", "UNI", "ATOM", "XLM", "ETC", "NEAR", "APT",
+    "ARB", "OP", "FIL", "ICP", "HBAR", "VET", "INJ", "SUI", "SEI", "TIA",
+    "AAVE", "MKR", "GRT", "ALGO", "EGLD", "SAND", "MANA", "AXS", "XTZ", "THETA",
+    "FLOW", "STX", "IMX", "RUNE", "LDO", "PEPE", "WIF", "BONK", "JUP", "PYTH",
+]
+
+_shared_client: Optional[httpx.AsyncClient] = None
+
+def shared_client() -> httpx.AsyncClient:
+    """Process-wide pooled AsyncClient reused by every fetcher and oracle"""
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(5.0),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _shared_client
+
+class PriceQuote(NamedTuple):
+    symbol: str
+    price: float
+    confidence: float
+    publish_time: int
+
+class PriceFeedFetcher:
+    def __init__(self, base_url: str = HERMES_URL, client: Optional[httpx.AsyncClient] = None,
+                 feed_ids: Optional[Dict[str, str]] = None, batch_size: int = 25,
+                 max_concurrency: int = 4, ttl: float = 1.0, stale_ttl: float = 10.0):
+        self.base_url = base_url.rstrip("/")
+        self.client = client
+        self.feed_ids = {symbol: _normalize_id(feed_id) for symbol, feed_id in (feed_ids or {}).items()}
+        self.batch_size = batch_size
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._cache: Dict[str, tuple] = {}  # symbol -> (fetched_at, PriceQuote)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Strong references to running refreshes; the loop only keeps weak ones
+        self._refreshes: Set[asyncio.Task] = set()
+        self._catalogue_lock = asyncio.Lock()
+        self._unlisted: Dict[str, float] = {}  # symbol -> when the catalogue lacked it
+
+        # Fetcher statistics
+        self.requests = 0
+        self.cache_hits = 0
+        self.stale_hits = 0
+        self.errors = 0
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        return self.client if self.client is not None else shared_client()
+
+    async def fetch(self, symbols: Iterable[str]) -> Dict[str, PriceQuote]:
+        """Quotes for every symbol that could be priced"""
+        symbols = list(dict.fromkeys(symbols))
+        now = time.monotonic()
+        quotes: Dict[str, PriceQuote] = {}
+        missing: List[str] = []
+        stale: List[str] = []
+        for symbol in symbols:
+            cached = self._cache.get(symbol)
+            age = now - cached[0] if cached else None
+            if age is not None and age <= self.ttl:
+                quotes[symbol] = cached[1]
+                self.cache_hits += 1
+            elif age is not None and age <= self.stale_ttl:
+                quotes[symbol] = cached[1]
+                stale.append(symbol)
+                self.stale_hits += 1
+            else:
+                missing.append(symbol)
+
+        if stale:
+            # Serve stale quotes now and refresh them behind the caller's back
+            self._request([symbol for symbol in stale if symbol not in self._inflight])
+        if missing:
+            waits = self._request(missing)
+            await asyncio.gather(*waits, return_exceptions=True)
+            for symbol in missing:
+                cached = self._cache.get(symbol)
+                if cached is not None:
+                    quotes[symbol] = cached[1]
+        return quotes
+
+    def _request(self, symbols: List[str]) -> List[asyncio.Future]:
+        """Start (or join) batched requests for symbols; returns one future per symbol"""
+        loop = asyncio.get_running_loop()
+        waits = []
+        new = []
+        for symbol in symbols:
+            future = self._inflight.get(symbol)
+            if future is None:
+                future = self._inflight[symbol] = loop.create_future()
+                new.append(symbol)
+            waits.append(future)
+        if new:
+            task = loop.create_task(self._refresh(new))
+            self._refreshes.add(task)
+            task.add_done_callback(self._refreshes.discard)
+        return waits
+
+    async def _refresh(self, symbols: List[str]):
+        try:
+            await self._resolve(symbols)
+            batches = [symbols[i:i + self.batch_size] for i in range(0, len(symbols), self.batch_size)]
+            await asyncio.gather(*(self._fetch_batch(batch) for batch in batches))
+        finally:
+            for symbol in symbols:
+                future = self._inflight.pop(symbol, None)
+                if future is not None and not future.done():
+                    future.set_result(None)
+
+    async def _fetch_batch(self, symbols: List[str]):
+        ids = {self.feed_ids[symbol]: symbol for symbol in symbols if symbol in self.feed_ids}
+        if not ids:
+            return
+        params = [("ids[]", feed_id) for feed_id in ids] + [("parsed", "true")]
+        try:
+            async with self._semaphore:
+                self.requests += 1
+                response = await self.http.get(f"{self.base_url}/v2/updates/price/latest", params=params)
+                response.raise_for_status()
+                payload = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            self.errors += 1
+            logger.error("Price feed request for %d feeds failed: %s", len(ids), e)
+            return
+
+        fetched_at = time.monotonic()
+        for item in payload.get("parsed", []):
+            symbol = ids.get(_normalize_id(item.get("id", "")))
+            if symbol is None:
+                continue
+            price = item["price"]
+            scale = 10.0 ** int(price["expo"])
+            self._cache[symbol] = (fetched_at, PriceQuote(
+                symbol, int(price["price"]) * scale, int(price["conf"]) * scale, int(price["publish_time"])
+            ))
+
+    async def _resolve(self, symbols: List[str]):
+        """Look up feed ids for symbols that have none yet (one catalogue call)"""
+        now = time.monotonic()
+        unknown = [
+            symbol for symbol in symbols
+            if symbol not in self.feed_ids and now - self._unlisted.get(symbol, -CATALOGUE_RETRY) >= CATALOGUE_RETRY
+        ]
+        if not unknown:
+            return
+        async with self._catalogue_lock:
+            unknown = [symbol for symbol in unknown if symbol not in self.feed_ids]
+            if not unknown:
+                return
+            try:
+                async with self._semaphore:
+                    self.requests += 1
+                    response = await self.http.get(f"{self.base_url}/v2/price_feeds",
+                                                   params={"asset_type": "crypto"})
+                    response.raise_for_status()
+                    catalogue = response.json()
+            except (httpx.HTTPError, ValueError) as e:
+                self.errors += 1
+                logger.error("Price feed catalogue request failed: %s", e)
+                return
+            wanted = set(unknown)
+            for feed in catalogue:
+                attributes = feed.get("attributes", {})
+                base = attributes.get("base")
+                if base in wanted and attributes.get("quote_currency") == "USD":
+                    self.feed_ids[base] = _normalize_id(feed["id"])
+            for symbol in wanted - self.feed_ids.keys():
+                self._unlisted[symbol] = now
+                logger.warning("No USD price feed found for %s", symbol)
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "stale_hits": self.stale_hits,
+            "errors": self.errors,
+            "cached": len(self._cache),
+            "in_flight": len(self._inflight),
+        }
+
+def _normalize_id(feed_id: str) -> str:
+    feed_id = feed_id.lower()
+    return feed_id[2:] if feed_id.startswith("0x") else feed_id
@@ -0,0 +1,45 @@
+"""CryptoBoxingOracle indicator updates from repeated and fresh quotes"""
+
+import asyncio
+
+from Market_oracle import CryptoBoxingOracle
+from price_feeds import PriceQuote
+
+class ScriptedFeed:
+    """Fetcher stand-in returning one scripted quote set per poll"""
+    
+    def __init__(self, polls):
+        self.polls = iter(polls)
+        
+    async def fetch(self, symbols):
+        return next(self.polls)
+
+def quote(price, publish_time):
+    return {'BTC': PriceQuote('BTC', price, 0.1, publish_time)}
+
+def test_repeated_quotes_update_indicators_once():
+    oracle = CryptoBoxingOracle(symbols=['BTC'], fetcher=ScriptedFeed([quote(100.0, 1)] * 25))
+    
+    async def poll():
+        for _ in range(25):
+            data = await oracle.get_crypto_data()
+        return data
+    
+    data = asyncio.run(poll())
+    assert oracle.indicators.state('BTC')._rsi.previous == 100.0
+    assert oracle.indicators.state('BTC')._rsi.seen == 0
+    assert data['BTC']['rsi'] is None
+    assert data['BTC']['bollinger'] is None
+
+def test_new_publish_times_advance_indicators():
+    polls = [quote(100.0 + i, i // 2) for i in range(60)]
+    oracle = CryptoBoxingOracle(symbols=['BTC'], fetcher=ScriptedFeed(polls))
+    
+    async def poll():
+        for _ in range(60):
+            await oracle.get_crypto_data()
+    
+    asyncio.run(poll())
+    # 30 distinct publish times -> 30 prices -> 29 price changes seen by RSI
+    assert oracle.indicators.state('BTC')._rsi.seen == 29
+    assert oracle.published['BTC'] == 29
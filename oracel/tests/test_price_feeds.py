@@ -0,0 +1,116 @@
+"""PriceFeedFetcher against a local stand-in for the Hermes API"""
+
+import asyncio
+
+import httpx
+
+from price_feeds import TOP_FEEDS, PriceFeedFetcher, PriceQuote
+
+class FakeHermes:
+    """Serves a feed catalogue and parsed latest prices; counts calls and concurrency"""
+    
+    def __init__(self, listed=TOP_FEEDS[:48], delay=0.02):
+        self.listed = list(listed)
+        self.delay = delay
+        self.catalogue_calls = 0
+        self.price_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.publish_time = 1
+        self.fail = False
+        
+    @staticmethod
+    def feed_id(index):
+        return "0x%064x" % index
+    
+    async def handler(self, request):
+        if request.url.path == '/v2/price_feeds':
+            self.catalogue_calls += 1
+            return httpx.Response(200, json=[
+                {"id": self.feed_id(index), "attributes": {"base": symbol, "quote_currency": "USD"}}
+                for index, symbol in enumerate(self.listed)
+            ])
+        self.price_calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.in_flight -= 1
+        if self.fail:
+            return httpx.Response(503)
+        ids = request.url.params.get_list('ids[]')
+        return httpx.Response(200, json={"parsed": [
+            {"id": feed_id, "price": {"price": str(int(feed_id, 16) + 100), "conf": "5", "expo": -2,
+                                      "publish_time": self.publish_time}}
+            for feed_id in ids
+        ]})
+    
+    def fetcher(self, **options):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+        return PriceFeedFetcher("http://hermes.test", client=client, **options)
+
+def test_batches_concurrency_and_request_sharing():
+    hermes = FakeHermes()
+    
+    async def scenario():
+        fetcher = hermes.fetcher(batch_size=10, max_concurrency=2)
+        first, second = await asyncio.gather(fetcher.fetch(TOP_FEEDS), fetcher.fetch(TOP_FEEDS))
+        return fetcher, first, second
+    
+    fetcher, first, second = asyncio.run(scenario())
+    assert len(first) == len(second) == 48
+    assert first['ETH'] == PriceQuote('ETH', 1.01, 0.05, 1)
+    # One catalogue lookup, 48 listed feeds in batches of 10, shared by both callers
+    assert hermes.catalogue_calls == 1
+    assert hermes.price_calls == 5
+    assert hermes.max_in_flight <= 2
+
+def test_fresh_stale_and_expired_cache_entries():
+    hermes = FakeHermes()
+    
+    async def scenario():
+        fetcher = hermes.fetcher(ttl=0.1, stale_ttl=0.4)
+        await fetcher.fetch(['BTC'])
+        calls = [hermes.price_calls]
+        await fetcher.fetch(['BTC'])  # fresh: served from cache
+        calls.append(hermes.price_calls)
+        await asyncio.sleep(0.15)
+        hermes.publish_time = 2
+        stale = await fetcher.fetch(['BTC'])  # stale: served now, refreshed behind
+        calls.append(hermes.price_calls)
+        await asyncio.sleep(0.1)
+        refreshed = await fetcher.fetch(['BTC'])
+        return fetcher, calls, stale, refreshed
+    
+    fetcher, calls, stale, refreshed = asyncio.run(scenario())
+    assert calls[0] == calls[1]
+    assert stale['BTC'].publish_time == 1
+    assert refreshed['BTC'].publish_time == 2
+    assert fetcher.get_stats()['cache_hits'] >= 2
+    assert fetcher.get_stats()['stale_hits'] == 1
+
+def test_unlisted_symbols_do_not_refetch_the_catalogue():
+    hermes = FakeHermes(listed=['BTC'])
+    
+    async def scenario():
+        fetcher = hermes.fetcher(ttl=0.0, stale_ttl=0.0)
+        for _ in range(3):
+            quotes = await fetcher.fetch(['BTC', 'NOPE'])
+        return quotes
+    
+    quotes = asyncio.run(scenario())
+    assert set(quotes) == {'BTC'}
+    assert hermes.catalogue_calls == 1
+
+def test_failed_requests_are_counted_not_raised():
+    hermes = FakeHermes()
+    hermes.fail = True
+    
+    async def scenario():
+        fetcher = hermes.fetcher()
+        return fetcher, await fetcher.fetch(['BTC', 'ETH'])
+    
+    fetcher, quotes = asyncio.run(scenario())
+    assert quotes == {}
+    assert fetcher.get_stats()['errors'] == 1